@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# بعد الـ settings (هي اللي بتضيف alx_common للـ path)
+from alx_common.sse import EventStreamRouter  # noqa: E402
+
+# الـ SSE streams بتتخدم قبل الـ middleware (من غير thread لكل connection)
+application = EventStreamRouter(django_application)
@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# alx_common: كود مشترك بين المشاريع (في جذر الريبو)
+sys.path.append(str(BASE_DIR.parent))
+
+from alx_common.db import database_config, replica_config  # noqa: E402
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -30,7 +37,12 @@ ALLOWED_HOSTS = []
 
 # Application definition
 INSTALLED_APPS = [
-    # ... القوائم الحالية ...
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
     'rest_framework',
     'django_filters',
     'api',
@@ -43,11 +55,80 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # JSON أسرع (orjson لو متسطب، غير كده stdlib)
+    'DEFAULT_RENDERER_CLASSES': [
+        'alx_common.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'alx_common.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # token bucket لكل مستخدم / IP (alx_common/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'alx_common.throttling.AnonBucketThrottle',
+        'alx_common.throttling.UserBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '1000/min',
+        'user': '2000/min',
+    },
     # إعدادات أخرى ممكن تضيفها هنا...
 }
 
+TOKEN_BUCKET_THROTTLE = {
+    'ENABLED': True,
+    'MAX_KEYS': 100000,
+    'SHARED_CACHE': None,
+}
+
+# كاش الـ responses بتاعة BookListView / BookDetailView (api/cache.py)
+API_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'TTL': 60,
+    'MAX_ENTRIES': 1024,
+    # versions الـ tags: None = جدول في الداتابيز، مشترك مع الـ job worker وكل
+    # الـ workers. alias من CACHES بس لو الـ cache ده مشترك (Redis / Memcached)
+    'TAG_CACHE': None,
+    # requests متطابقة في نفس اللحظة = query + serialize واحدة
+    'COALESCE': True,
+    'COALESCE_TIMEOUT': 10,
+}
+
+# Background jobs (api/jobs.py): manage.py run_jobs بيشغلهم
+API_JOBS = {
+    'LEASE_SECONDS': 60,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF': 5,
+    # كتب في كل transaction لما كاتب بيتمسح
+    'DELETE_BATCH_SIZE': 500,
+}
+
+# Change-data feed (api/changes.py): GET /api/changes/?since=<seq>
+API_CHANGE_FEED = {
+    # compact_changes بيشيل التغييرات اللي ليها تغيير أحدث بعد المدة دي
+    'RETENTION_SECONDS': 7 * 86400,
+    # و الـ delete tombstones بعد المدة دي (consumer أقدم منها -> 410)
+    'TOMBSTONE_RETENTION_SECONDS': 30 * 86400,
+    'PAGE_SIZE': 1000,
+    'MAX_PAGE_SIZE': 10000,
+}
+
+# Live feed GET /api/books/live/ (alx_common/broker.py + alx_common/sse.py)، محتاج ASGI server
+LIVE_EVENTS = {
+    'HISTORY': 1000,
+    # consumer متأخر بالعدد ده بيتقفل ويعمل resume بـ Last-Event-ID
+    'MAX_QUEUE': 256,
+    'MAX_SUBSCRIBERS': 10000,
+    'HEARTBEAT': 15,
+}
+
 
 MIDDLEWARE = [
+    # query count / SQL / serialize / render time -> Server-Timing + /metrics/
+    'alx_common.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +136,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # read-your-writes للـ replicas
+    'api.routers.ReplicaPinningMiddleware',
 ]
 
 ROOT_URLCONF = 'advanced_api_project.urls'
@@ -80,11 +163,33 @@ WSGI_APPLICATION = 'advanced_api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# persistent connections + SQLite PRAGMAs (WAL لو DATABASE_SQLITE_WAL=1) من مكان واحد: alx_common/db.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR / 'db.sqlite3'),
+}
+
+# read replicas: مثلاً API_READ_REPLICAS=replica (فاضي = كل حاجة على default ومفيش alias زيادة)
+# محلياً كل replica ملف SQLite تاني بيتنسخ من الـ primary، شوف api/replication.py
+READ_REPLICA_ALIASES = [alias for alias in os.environ.get('API_READ_REPLICAS', '').split(',') if alias]
+for alias in READ_REPLICA_ALIASES:
+    # في الـ tests الـ replica هي الـ default نفسها (MIRROR): مفيش داتابيز زيادة
+    DATABASES[alias] = replica_config(BASE_DIR / f'db.{alias}.sqlite3', TEST={'MIRROR': 'default'})
+
+TESTING = sys.argv[1:2] == ['test']
+if TESTING:
+    # replica حقيقية (in-memory) بس للـ tests اللي بتجرب الـ replication
+    # (databases = {'default', 'test_replica'})، ومش بتتعمل غير لو test طلبها
+    DATABASES['test_replica'] = replica_config(BASE_DIR / 'db.test_replica.sqlite3')
+
+# list / detail بتاعة الكتب (ReplicaReadMixin) بتقرا من الـ replicas، الباقي كله default (api/routers.py)
+DATABASE_ROUTERS = ['api.routers.PrimaryReplicaRouter']
+
+API_READ_REPLICAS = {
+    # الـ tests بتقرا الـ primary، إلا اللي بتطلب replica بـ override_settings
+    'ALIASES': [] if TESTING else READ_REPLICA_ALIASES,
+    'STICKY_SECONDS': 5,
+    'SQLITE_REPLICATION': True,
+    'REPLICATION_LAG': float(os.environ.get('API_REPLICATION_LAG', 0)),
 }
 
 
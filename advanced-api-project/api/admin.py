@@ -1,7 +1,150 @@
 from django.contrib import admin
-from .models import Author, Book
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 
-admin.site.register(Author)
-admin.site.register(Book)
+from .models import Author, Book, BookCounter
+from .search import get_search_backend
 
-# Register your models here.
+# أكبر عدد بنعده بالظبط، بعد كده رقم تقريبي
+EXACT_COUNT_LIMIT = 10000
+CURSOR_VAR = 'cursor'
+
+
+def estimated_row_count(model, using):
+    """عدد صفوف الجدول كله من غير COUNT(*) (None لو الـ backend مش مدعوم)"""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'sqlite':
+            # max(rowid) = بحث واحد في الـ b-tree (الحذف بيخلي الرقم أكبر شوية)
+            cursor.execute(f'SELECT MAX(rowid) FROM {table}')
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+# EstimatedCountPaginator:
+# الجدول كله -> رقم تقريبي، مع فلتر -> COUNT على LIMIT (مابيعديش EXACT_COUNT_LIMIT)
+class EstimatedCountPaginator(Paginator):
+    approximate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > EXACT_COUNT_LIMIT:
+                self.approximate = True
+                return estimate
+        count = queryset.order_by()[:EXACT_COUNT_LIMIT + 1].count()
+        self.approximate = count > EXACT_COUNT_LIMIT
+        return count
+
+
+# KeysetChangeList:
+# لما الترتيب -pk (الافتراضي): ?cursor=<pk> -> WHERE pk < cursor LIMIT n
+# بدل OFFSET، فآخر صفحة زي أول صفحة. أي ترتيب تاني = pagination عادي
+class KeysetChangeList(ChangeList):
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # لينكات الترتيب / الفلاتر / البحث بترجع لأول صفحة
+        if CURSOR_VAR not in (new_params or {}):
+            remove = [*(remove or ()), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_results(self, request):
+        self.keyset = list(self.queryset.query.order_by) == ['-pk']
+        if not self.keyset:
+            return super().get_results(request)
+        try:
+            self.keyset_cursor = int(request.GET[CURSOR_VAR]) if CURSOR_VAR in request.GET else None
+        except ValueError:
+            self.keyset_cursor = None
+        queryset = self.queryset
+        if self.keyset_cursor is not None:
+            queryset = queryset.filter(pk__lt=self.keyset_cursor)
+        rows = list(queryset[:self.list_per_page + 1])
+
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.result_count = self.paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows[:self.list_per_page]
+        self.can_show_all = False
+        self.multi_page = len(rows) > self.list_per_page or self.keyset_cursor is not None
+        self.keyset_first_url = self.get_query_string()
+        self.keyset_next_url = None
+        if len(rows) > self.list_per_page:
+            self.keyset_next_url = self.get_query_string({CURSOR_VAR: self.result_list[-1].pk})
+
+
+class FastChangeListAdmin(admin.ModelAdmin):
+    """Estimated counts, no second COUNT for the total, keyset paging on -pk."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 100
+    change_list_template = 'admin/api/keyset_change_list.html'
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+# فلتر السنة من الـ counters (api/counters.py) بدل SELECT DISTINCT على Book
+class PublicationYearFilter(admin.SimpleListFilter):
+    title = 'publication year'
+    parameter_name = 'publication_year'
+
+    def lookups(self, request, model_admin):
+        years = BookCounter.objects.filter(dimension=BookCounter.YEAR).order_by('-key')
+        return [(str(year), f'{year} ({count})') for year, count in years.values_list('key', 'count')]
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            # api_book_year_id_idx: فلتر + ترتيب -pk من الـ index
+            return queryset.filter(publication_year=int(self.value()))
+        except ValueError:
+            return queryset.none()
+
+
+@admin.register(Author)
+class AuthorAdmin(FastChangeListAdmin):
+    list_display = ('name', 'updated_at')
+    # لازم للـ autocomplete بتاع BookAdmin.author
+    search_fields = ['name']
+
+    def get_search_results(self, request, queryset, search_term):
+        queryset, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        # الـ autocomplete بيعمل paginate على النتيجة من غير ترتيب؛ الـ changelist
+        # بيكمّل على أي ترتيب موجود، فمنحطوش هناك عشان الـ keyset (-pk) يفضل شغال
+        if getattr(request.resolver_match, 'url_name', None) == 'autocomplete':
+            queryset = queryset.order_by('name', 'pk')
+        return queryset, may_have_duplicates
+
+
+@admin.register(Book)
+class BookAdmin(FastChangeListAdmin):
+    list_display = ('title', 'publication_year', 'author')
+    list_select_related = ('author',)
+    list_filter = (PublicationYearFilter,)
+    # بحث بالـ index (FTS5 / in-memory) بدل icontains على العنوان واسم الكاتب
+    search_fields = ['title', 'author_name']
+    autocomplete_fields = ['author']
+    readonly_fields = ('author_name', 'updated_at')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return get_search_backend(queryset.db).filter(queryset, search_term.split()), False
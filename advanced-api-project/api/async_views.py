@@ -0,0 +1,140 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+
+from alx_common.renderers import FastJSONRenderer
+from alx_common.sse import EventStreamView
+
+from .compiled import get_compiled
+from .query import plan_queryset
+from .routers import allow_replica_reads
+from .views import AuthorDetailView, AuthorListView, BookDetailView, BookListView
+
+
+# Async views:
+# نفس endpoints القراءة بتاعة Book/Author بس async def، فتحت ASGI الـ worker
+# مش بيحجز thread لكل request (الـ DB بس هو اللي بيروح الـ thread pool)
+class AsyncReadView(View):
+    """
+    Read-only async base view, configured like a DRF generic view
+    (queryset, serializer_class, filter_backends, pagination_class).
+
+    Rows come from the async ORM (``aiterator()`` / ``aget()``) through the
+    compiled serializer, so no model instances are built. Filter backends
+    that validate against the DB (e.g. ``?author=<pk>``) run in
+    ``sync_to_async``. Only JSON is rendered. There is no response cache or
+    ETag here: those stay on the sync endpoints.
+    """
+    queryset = None
+    serializer_class = None
+    filter_backends = ()
+    pagination_class = None
+    http_method_names = ['get', 'head', 'options']
+    renderer = FastJSONRenderer()
+    chunk_size = 2000
+    # زي ReplicaReadMixin: القراءات من replica لو الـ request مش pinned
+    replica_reads = False
+
+    def get_queryset(self):
+        return plan_queryset(self.queryset.all(), self.serializer_class)
+
+    async def get(self, request, *args, **kwargs):
+        if self.replica_reads:
+            allow_replica_reads()
+        try:
+            data = await self.get_data(Request(request), **kwargs)
+        except APIException as exc:
+            return self.render(exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail},
+                               exc.status_code)
+        return self.render(data)
+
+    def render(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), status=status, content_type='application/json')
+
+    async def serialize(self, rows, compiled, many=True):
+        if compiled is not None:
+            return rows
+        # serializer مش compiled: الـ prefetch اتعمل، بس نأمن أي lazy access
+        return await sync_to_async(lambda: self.serializer_class(rows, many=many).data)()
+
+
+class AsyncListView(AsyncReadView):
+
+    def filter_queryset(self, request, queryset):
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+        return queryset
+
+    async def get_data(self, request, **kwargs):
+        compiled = get_compiled(self.serializer_class)
+        queryset = await sync_to_async(self.filter_queryset)(request, self.get_queryset())
+        if compiled is not None:
+            queryset = compiled.select(queryset)
+
+        if self.pagination_class is not None:
+            paginator = self.pagination_class()
+            page = await paginator.apaginate_queryset(queryset, request, self)
+            if page is not None:
+                return paginator.get_paginated_response(await self.serialize(page, compiled)).data
+
+        # compiled: الـ nested بيتجاب جوه الـ iterable (query واحدة لكل batch)
+        rows = [row async for row in queryset.aiterator(chunk_size=self.chunk_size)]
+        return await self.serialize(rows, compiled)
+
+
+class AsyncDetailView(AsyncReadView):
+
+    async def get_data(self, request, pk=None, **kwargs):
+        compiled = get_compiled(self.serializer_class)
+        queryset = self.get_queryset()
+        if compiled is not None:
+            queryset = compiled.select(queryset)
+        model = self.queryset.model
+        try:
+            row = await queryset.aget(pk=pk)
+        except model.DoesNotExist:
+            raise NotFound(f'No {model._meta.object_name} matches the given query.')
+        return await self.serialize(row, compiled, many=False)
+
+
+class AsyncBookListView(AsyncListView):
+    """Async BookListView: same filter / search / ordering / cursor params"""
+    replica_reads = True
+    queryset = BookListView.queryset
+    serializer_class = BookListView.serializer_class
+    filter_backends = BookListView.filter_backends
+    filterset_class = BookListView.filterset_class
+    search_fields = BookListView.search_fields
+    ordering_fields = BookListView.ordering_fields
+    ordering = BookListView.ordering
+    pagination_class = BookListView.pagination_class
+
+
+class AsyncBookDetailView(AsyncDetailView):
+    """Async BookDetailView"""
+    replica_reads = True
+    queryset = BookDetailView.queryset
+    serializer_class = BookDetailView.serializer_class
+
+
+class AsyncAuthorListView(AsyncListView):
+    """Async AuthorListView (nested books: one extra query per batch)"""
+    queryset = AuthorListView.queryset
+    serializer_class = AuthorListView.serializer_class
+
+
+class AsyncAuthorDetailView(AsyncDetailView):
+    """Async AuthorDetailView"""
+    queryset = AuthorDetailView.queryset
+    serializer_class = AuthorDetailView.serializer_class
+
+
+class BookLiveView(EventStreamView):
+    """
+    New books as server-sent events (``event: book.created``, data = the
+    BookSerializer fields), published after commit by api/signals.py.
+    Resumes after ``Last-Event-ID``. ASGI only.
+    """
+    topics = ('book.created',)
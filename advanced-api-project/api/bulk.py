@@ -0,0 +1,242 @@
+import itertools
+import uuid
+from dataclasses import dataclass, field
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Author, Book, ImportItem
+from .parsers import InvalidItem
+from .serializers import BookSerializer
+from .signals import books_bulk_deleted, books_bulk_written
+
+
+# BulkAuthorField:
+# زي PrimaryKeyRelatedField بس بيدور في dict الكتّاب اللي اتجاب مرة واحدة للـ batch
+class BulkAuthorField(serializers.PrimaryKeyRelatedField):
+
+    def to_internal_value(self, data):
+        authors = self.context.get('authors')
+        if authors is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        author = authors.get(pk)
+        if author is None:
+            self.fail('does_not_exist', pk_value=data)
+        return author
+
+
+class BookBulkSerializer(BookSerializer):
+    """BookSerializer (نفس validate_publication_year) مع lookup للكاتب من غير query لكل item"""
+    author = BulkAuthorField(queryset=Author.objects.all())
+
+    class Meta(BookSerializer.Meta):
+        pass
+
+
+@dataclass
+class BulkResult:
+    created: int = 0
+    updated: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, index, errors):
+        self.errors.append({'index': index, 'errors': errors})
+
+
+def _batches(items, size):
+    iterator = enumerate(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def spool_import(items, batch_size=1000):
+    """
+    Write ``items`` (a list or the NDJSON parser's iterator) to ImportItem
+    ``batch_size`` rows at a time, so a queued import never sits in memory
+    or in the job's payload. Returns ``(upload id, count)``; if reading the
+    request fails halfway, the rows written so far are removed.
+    """
+    upload = uuid.uuid4()
+    count = 0
+    try:
+        for batch in _batches(items, batch_size):
+            ImportItem.objects.bulk_create([
+                ImportItem(upload=upload, index=index, error=item.error) if isinstance(item, InvalidItem)
+                else ImportItem(upload=upload, index=index, data=item)
+                for index, item in batch
+            ])
+            count += len(batch)
+    except BaseException:
+        discard_import(upload)
+        raise
+    return upload, count
+
+
+def staged_items(upload, start, stop):
+    """Items ``start`` to ``stop - 1`` of a spooled upload (InvalidItem stays InvalidItem)."""
+    rows = ImportItem.objects.filter(upload=upload, index__gte=start, index__lt=stop).order_by('index')
+    return [InvalidItem(error) if error else data for data, error in rows.values_list('data', 'error')]
+
+
+def discard_import(upload):
+    ImportItem.objects.filter(upload=upload).delete()
+
+
+def _author_ids(batch):
+    ids = set()
+    for _, item in batch:
+        if isinstance(item, dict):
+            try:
+                ids.add(int(item.get('author')))
+            except (TypeError, ValueError):
+                pass
+    return ids
+
+
+def _check_item(result, index, item):
+    if isinstance(item, InvalidItem):
+        result.add_error(index, {'non_field_errors': [item.error]})
+        return False
+    if not isinstance(item, dict):
+        result.add_error(index, {'non_field_errors': ['Expected a JSON object.']})
+        return False
+    return True
+
+
+def bulk_create_books(items, batch_size=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Validate and insert ``items`` (any iterable of dicts) ``batch_size`` at a
+    time. Each batch is one transaction + one bulk_create; invalid items are
+    reported by index and skipped without aborting the rest.
+    """
+    result = BulkResult()
+    for batch in _batches(items, batch_size):
+        context = {'authors': Author.objects.using(using).in_bulk(_author_ids(batch))}
+        books, indexes = [], []
+        for index, item in batch:
+            if not _check_item(result, index, item):
+                continue
+            serializer = BookBulkSerializer(data=item, context=context)
+            if serializer.is_valid():
+                book = Book(**serializer.validated_data)
+                # bulk_create مش بيبعت pre_save (load_original_row)
+                book.author_name = book.author.name
+                books.append(book)
+                indexes.append(index)
+            else:
+                result.add_error(index, serializer.errors)
+        if not books:
+            continue
+        try:
+            with transaction.atomic(using=using):
+                Book.objects.using(using).bulk_create(books)
+                books_bulk_written.send(sender=Book, created=books, updated=[], using=using)
+        except DatabaseError as exc:
+            for index in indexes:
+                result.add_error(index, {'non_field_errors': [str(exc)]})
+            continue
+        result.created += len(books)
+    return result
+
+
+def _valid_id(value):
+    # bool subclass من int: true مش id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def bulk_update_books(items, batch_size=1000, partial=False, using=DEFAULT_DB_ALIAS):
+    """
+    Same as bulk_create_books but every item carries the ``id`` of an
+    existing Book; the batch's books are loaded with one in_bulk() and
+    written back with one bulk_update().
+    """
+    result = BulkResult()
+    fields = list(BookBulkSerializer.Meta.fields)
+    fields.remove('id')
+    # bulk_update مش بيشغل auto_now ولا pre_save (load_original_row)
+    fields += ['updated_at', 'author_name']
+    for batch in _batches(items, batch_size):
+        ids = set()
+        for _, item in batch:
+            if isinstance(item, dict) and _valid_id(item.get('id')):
+                ids.add(item['id'])
+        existing = Book.objects.using(using).in_bulk(ids)
+        context = {'authors': Author.objects.using(using).in_bulk(_author_ids(batch))}
+
+        books, indexes = {}, []
+        for index, item in batch:
+            if not _check_item(result, index, item):
+                continue
+            if not _valid_id(item.get('id')):
+                # {"id": [1]} أو "1" من الـ client: error للـ item ده مش 500
+                result.add_error(index, {'id': ['A valid integer is required.']})
+                continue
+            book = existing.get(item['id'])
+            if book is None:
+                result.add_error(index, {'id': ['Book not found.']})
+                continue
+            serializer = BookBulkSerializer(book, data=item, partial=partial, context=context)
+            if not serializer.is_valid():
+                result.add_error(index, serializer.errors)
+                continue
+            for attr, value in serializer.validated_data.items():
+                setattr(book, attr, value)
+            book.updated_at = timezone.now()
+            if 'author' in serializer.validated_data:
+                book.author_name = book.author.name
+            books[book.pk] = book
+            indexes.append(index)
+        if not books:
+            continue
+        try:
+            with transaction.atomic(using=using):
+                # القيم القديمة للـ counters من الصف المقفول، مش من in_bulk فوق
+                # (ممكن يكون اتكتب بعده)
+                originals = Book._base_manager.using(using).select_for_update().filter(pk__in=books).values_list(
+                    'pk', 'author_id', 'publication_year')
+                for pk, author_id, year in originals:
+                    books[pk]._db_keys = (author_id, year)
+                Book.objects.using(using).bulk_update(list(books.values()), fields)
+                books_bulk_written.send(sender=Book, created=[], updated=list(books.values()), using=using)
+        except DatabaseError as exc:
+            for index in indexes:
+                result.add_error(index, {'non_field_errors': [str(exc)]})
+            continue
+        result.updated += len(indexes)
+    return result
+
+
+def bulk_delete_books(queryset, batch_size=500, progress=None, using=DEFAULT_DB_ALIAS):
+    """
+    Delete the books in ``queryset`` ``batch_size`` at a time. Each chunk is its own short transaction (one DELETE ... WHERE id
+    IN (...) + one books_bulk_deleted signal), so the write lock is never
+    held for the whole set. ``progress(deleted so far)`` runs after every
+    chunk. Returns the number of deleted books.
+    """
+    # من غير ORDER BY: كل chunk بياخد أول batch_size من الـ index (اللي قبله اتمسح)
+    # بدل ما يرتب كل الكتب الباقية في كل مرة
+    books = queryset.using(using).only('id', 'author_id', 'publication_year').order_by()
+    deleted = 0
+    while True:
+        with transaction.atomic(using=using):
+            # FOR UPDATE: الـ counters بتتنقص بالقيم اللي اتمسحت فعلاً
+            chunk = list(books.select_for_update()[:batch_size])
+            if not chunk:
+                return deleted
+            # _raw_delete: DELETE واحدة من غير Collector ومن غير post_delete لكل صف
+            # (Book مالوش reverse relations؛ الـ FTS بيتحدث بالـ triggers)
+            Book._base_manager.using(using).filter(pk__in=[book.pk for book in chunk])._raw_delete(using)
+            books_bulk_deleted.send(sender=Book, deleted=chunk, using=using)
+        deleted += len(chunk)
+        if progress is not None:
+            progress(deleted)
@@ -0,0 +1,210 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.response import Response
+
+from alx_common.singleflight import SingleFlight
+
+from .models import CacheTagVersion
+from .routers import pinned_to_primary
+
+DEFAULTS = {
+    'ENABLED': True,
+    'TTL': 60,            # seconds
+    'MAX_ENTRIES': 1024,
+    # مكان versions الـ tags. None = جدول CacheTagVersion في الداتابيز، مشترك بين
+    # كل الـ workers والـ job worker (manage.py run_jobs) من غير أي setup.
+    # أو alias من CACHES بس لو مشترك (Redis / Memcached): LocMemCache لكل process
+    # نسختها، ومسح من process تانية (زي الـ jobs) مايوصلش لحد TTL
+    'TAG_CACHE': None,
+    # requests متطابقة في نفس اللحظة بيستنوا نتيجة واحدة (حتى لو الكاش مقفول)
+    'COALESCE': True,
+    'COALESCE_TIMEOUT': 10,   # seconds
+}
+TAG_PREFIX = 'api:tag:'
+
+
+# DatabaseTagStore:
+# نفس get_many / add / set_many بتاعة الـ Django cache، على جدول CacheTagVersion.
+# دايماً على الـ primary: version من replica متأخرة = entry قديمة بتتحسب hit،
+# و using صريح كمان مابيعديش على db_for_write (مايعملش pin لـ GET)
+class DatabaseTagStore:
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def get_many(self, keys):
+        rows = CacheTagVersion.objects.using(self.using).filter(key__in=list(keys))
+        return dict(rows.values_list('key', 'version'))
+
+    def add(self, key, value, timeout=None):
+        # الـ versions هنا مابتنتهيش، فالـ timeout مالوش لازمة
+        CacheTagVersion.objects.using(self.using).bulk_create(
+            [CacheTagVersion(key=key, version=value)], ignore_conflicts=True,
+        )
+
+    def set_many(self, data, timeout=None):
+        CacheTagVersion.objects.using(self.using).bulk_create(
+            [CacheTagVersion(key=key, version=value) for key, value in data.items()],
+            update_conflicts=True, unique_fields=['key'], update_fields=['version'],
+        )
+
+
+database_tag_store = DatabaseTagStore()
+
+
+# TaggedLRUCache:
+# كاش في الذاكرة بـ TTL + LRU، وكل entry ليها tags عشان نمسح بدقة
+# (مثلاً year:2015 أو author:3) بدل ما نمسح الكاش كله.
+# كل tag ليه version مشتركة (DatabaseTagStore أو cache مشترك): المسح بيكتب version جديدة، وأي
+# process شايلة entry بالـ version القديمة بتعتبرها miss
+class TaggedLRUCache:
+
+    def __init__(self, ttl=60, max_entries=1024, tag_cache=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.tag_cache = tag_cache
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # key -> (expires_at, value, {tag: version})
+
+    @property
+    def backend(self):
+        alias = self.tag_cache or _config()['TAG_CACHE']
+        return database_tag_store if alias is None else caches[alias]
+
+    def versions(self, tags):
+        """
+        Current ``{tag: version}`` in one cache round trip. Take them before
+        computing a value and pass them to set(), so a write that lands in
+        between invalidates it.
+        """
+        keys = {f'{TAG_PREFIX}{tag}': tag for tag in tags}
+        found = self.backend.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        for key in missing:
+            # add مش set: لو process تانية سبقتنا ناخد بتاعتها. في الـ cache
+            # الـ version بتنتهي بعد TTL (في الداتابيز مابتنتهيش)
+            self.backend.add(key, uuid.uuid4().hex, timeout=self.ttl)
+        if missing:
+            found.update(self.backend.get_many(missing))
+        return {tag: found.get(key) for key, tag in keys.items()}
+
+    def get(self, key, versions=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        current = self.versions(entry[2]) if versions is None else versions
+        if any(version is None or current.get(tag) != version for tag, version in entry[2].items()):
+            with self.lock:
+                if self.entries.get(key) is entry:
+                    del self.entries[key]
+            return None
+        return entry[1]
+
+    def set(self, key, value, tags=(), ttl=None, versions=None):
+        versions = self.versions(tags) if versions is None else {tag: versions.get(tag) for tag in tags}
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (expires_at, value, versions)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def invalidate_tags(self, tags):
+        """New version for every tag: entries with the old one miss in every process."""
+        self.backend.set_many({f'{TAG_PREFIX}{tag}': uuid.uuid4().hex for tag in tags}, timeout=self.ttl)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'API_RESPONSE_CACHE', {})}
+
+
+response_cache = TaggedLRUCache(ttl=_config()['TTL'], max_entries=_config()['MAX_ENTRIES'])
+# نفس الـ keys بتاعة response_cache (list_cache_key / detail)
+inflight = SingleFlight(timeout=_config()['COALESCE_TIMEOUT'])
+
+
+def book_tags(publication_year, author_id, book_id):
+    """الـ tags اللي لازم تتمسح لما كتاب يتغير (بقيمه القديمة أو الجديدة)"""
+    return {'books', f'year:{publication_year}', f'author:{author_id}', f'book:{book_id}'}
+
+
+def list_cache_key(request):
+    # query string متطبع (مترتب) عشان ?a=1&b=2 و ?b=2&a=1 يبقوا نفس الـ key
+    params = sorted((name, tuple(values)) for name, values in request.query_params.lists())
+    return ('list', request.get_host(), request.accepted_media_type, tuple(params))
+
+
+def list_cache_tags(request):
+    """
+    Tags for a list response, as narrow as its filters allow:
+      - ?author=<id>          -> author:<id>
+      - ?publication_year=<y> -> year:<y>
+      - otherwise             -> books (any book change)
+    Search / author__name results also depend on author names.
+    """
+    params = request.query_params
+    if params.get('author'):
+        tags = {f"author:{params['author']}"}
+    elif params.get('publication_year'):
+        tags = {f"year:{params['publication_year']}"}
+    else:
+        tags = {'books'}
+    if params.get('search') or params.get('author__name'):
+        tags.add('author-names')
+    return tags
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized ``response.data`` of successful GETs. Permissions
+    still run on every request (they are checked before the handler).
+    """
+
+    def cached_response(self, key, tags, handler, *args, versions=None, **kwargs):
+        """``versions``: response_cache.versions(tags) if the caller already has them."""
+        if pinned_to_primary():
+            # read-your-writes: الـ entry (أو الـ flight) ممكن يكون جه من replica لسه
+            # ماشافش كتابة الـ client ده، فالـ request ده بيقرا الـ primary بنفسه
+            response = handler(*args, **kwargs)
+            response['X-Cache'] = 'BYPASS'
+            return response
+        config = _config()
+        if config['ENABLED']:
+            # قبل الـ handler: كتابة بعد كده بتغير الـ version والـ entry دي تبقى miss
+            versions = response_cache.versions(tags) if versions is None else versions
+            data = response_cache.get(key, versions)
+            if data is not None:
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+        if not config['COALESCE']:
+            response = handler(*args, **kwargs)
+        else:
+            response, shared = inflight.do(key, handler, *args, **kwargs)
+            if shared:
+                # الـ Response بيتعمله render لكل request لوحده، فبنشارك الـ data بس
+                response = Response(response.data, status=response.status_code)
+                response['X-Cache'] = 'COALESCED'
+                return response
+        if config['ENABLED'] and response.status_code == 200:
+            response_cache.set(key, response.data, tags, versions=versions)
+            response['X-Cache'] = 'MISS'
+        return response
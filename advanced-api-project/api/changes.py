@@ -0,0 +1,197 @@
+"""
+Change-data feed for Book and Author.
+
+Every create / update / delete (including the bulk paths) appends a Change
+row inside the same transaction as the write, so the log never shows a
+change that was rolled back and never misses one that was committed.
+Consumers keep the last ``seq`` they applied and ask for what came after:
+
+    GET /api/changes/?since=<seq>          JSON page + ``next``
+    GET /api/changes/?since=<seq>&format=ndjson   everything after <seq>, streamed
+
+Entries are upserts: apply ``create`` / ``update`` by replacing the row
+with ``data``, ``delete`` by removing it. compact_changes() drops entries
+that a newer entry for the same object supersedes, and old delete
+tombstones; a consumer whose ``since`` is older than a dropped tombstone
+gets 410 Gone and has to resync from the list endpoint.
+
+``seq`` is the table's autoincrement key, and consumers rely on seq order
+being commit order (a row that commits late with a lower seq than one
+already read would be skipped). SQLite has one writer at a time, so that
+holds by itself. On PostgreSQL sequence values are handed out before
+commit, so record_changes() takes a transaction-level advisory lock first:
+writers that log changes commit one at a time from that point on. Other
+backends are refused (NotSupportedError).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Author, Book, Change
+
+DEFAULTS = {
+    # تغييرات أقدم من كده ولها تغيير أحدث لنفس الـ object بتتشال
+    'RETENTION_SECONDS': 7 * 86400,
+    # delete tombstones أقدم من كده بتتشال (consumer أقدم منها -> 410)
+    'TOMBSTONE_RETENTION_SECONDS': 30 * 86400,
+    'COMPACT_BATCH_SIZE': 5000,
+    'PAGE_SIZE': 1000,
+    'MAX_PAGE_SIZE': 10000,
+}
+ROWS_PER_CHUNK = 500
+# pg_advisory_xact_lock key: بيتساب مع الـ commit / rollback
+SEQ_LOCK_ID = 0x61706963   # 'apic'
+
+# model -> (اسم في الـ feed، (اسم الحقل في الـ API، attname))، نفس حقول الـ serializers
+TRACKED = {
+    Book: ('book', (('id', 'id'), ('title', 'title'), ('publication_year', 'publication_year'),
+                    ('author', 'author_id'))),
+    Author: ('author', (('id', 'id'), ('name', 'name'))),
+}
+FEED_MODELS = tuple(name for name, _ in TRACKED.values())
+FEED_COLUMNS = ('seq', 'model', 'object_id', 'op', 'data', 'created_at')
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'API_CHANGE_FEED', {})}
+
+
+def snapshot(instance):
+    _, fields = TRACKED[type(instance)]
+    return {name: getattr(instance, attname) for name, attname in fields}
+
+
+def change_for(instance, op, now=None):
+    name, _ = TRACKED[type(instance)]
+    return Change(
+        model=name, object_id=instance.pk, op=op,
+        data=None if op == Change.DELETE else snapshot(instance),
+        created_at=now or timezone.now(),
+    )
+
+
+def _serialize_seq(using):
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        # BEGIN IMMEDIATE: writer واحد، فالـ seq بترتيب الـ commit
+        return
+    if connection.vendor == 'postgresql':
+        # الـ writers بيستنوا بعض من هنا لحد الـ commit: seq أصغر = commit أبدري
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [SEQ_LOCK_ID])
+        return
+    raise NotSupportedError(
+        f"The change feed needs seq order = commit order, which isn't guaranteed on {connection.vendor}."
+    )
+
+
+def record_changes(instances, op, using=DEFAULT_DB_ALIAS):
+    """Append one Change per instance (call inside the write's transaction)."""
+    if not instances:
+        return
+    _serialize_seq(using)
+    now = timezone.now()
+    Change.objects.using(using).bulk_create([change_for(instance, op, now) for instance in instances])
+
+
+def compacted_through(using=DEFAULT_DB_ALIAS):
+    """Highest seq whose tombstones compaction has dropped (0 if none)."""
+    return Change.objects.using(using).filter(op=Change.COMPACTED).aggregate(
+        through=Max('object_id'))['through'] or 0
+
+
+def page_limit(value=None):
+    """``?limit=`` clamped to [1, MAX_PAGE_SIZE] (PAGE_SIZE if missing); ValueError if not a number."""
+    config = _config()
+    if value is None:
+        return config['PAGE_SIZE']
+    return max(1, min(int(value), config['MAX_PAGE_SIZE']))
+
+
+def feed_queryset(since, models=None, using=None):
+    changes = Change.objects.filter(seq__gt=since).exclude(op=Change.COMPACTED)
+    if using is not None:
+        changes = changes.using(using)
+    if models:
+        changes = changes.filter(model__in=models)
+    return changes.order_by('seq')
+
+
+def feed_entry(row):
+    seq, model, object_id, op, data, created_at = row
+    return {'seq': seq, 'model': model, 'id': object_id, 'op': op, 'data': data, 'at': created_at}
+
+
+def read_page(since, limit, models=None):
+    """``(entries, has_more)``: up to ``limit`` changes after ``since``."""
+    rows = list(feed_queryset(since, models).values_list(*FEED_COLUMNS)[:limit + 1])
+    return [feed_entry(row) for row in rows[:limit]], len(rows) > limit
+
+
+def stream_ndjson(since, models=None, chunk_size=2000):
+    # نفس encoding الـ JSON page (تواريخ بالـ microseconds زي DRF)
+    dumps = JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    buffer = []
+    for row in feed_queryset(since, models).values_list(*FEED_COLUMNS).iterator(chunk_size=chunk_size):
+        buffer.append(dumps(feed_entry(row)))
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ('\n'.join(buffer) + '\n').encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ('\n'.join(buffer) + '\n').encode('utf-8')
+
+
+def compact_changes(now=None, batch_size=None, progress=None, using=DEFAULT_DB_ALIAS):
+    """
+    Walk the log oldest first in seq windows of ``batch_size`` (one short
+    transaction each) and delete:
+      - entries older than RETENTION_SECONDS with a newer entry for the
+        same object (the consumer gets the newer one anyway)
+      - delete tombstones older than TOMBSTONE_RETENTION_SECONDS; the
+        highest dropped seq is kept as a COMPACTED marker for the 410 check
+    Returns ``{'superseded': n, 'tombstones': n, 'compacted_through': seq}``.
+    """
+    config = _config()
+    now = now or timezone.now()
+    batch_size = batch_size or config['COMPACT_BATCH_SIZE']
+    cutoff = now - timedelta(seconds=config['RETENTION_SECONDS'])
+    tombstone_cutoff = now - timedelta(seconds=config['TOMBSTONE_RETENTION_SECONDS'])
+
+    changes = Change.objects.using(using).exclude(op=Change.COMPACTED)
+    newer = Change.objects.using(using).filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'), seq__gt=OuterRef('seq'))
+    last = changes.aggregate(last=Max('seq'))['last']
+    superseded = tombstones = 0
+    through = compacted_through(using)
+    low = 0
+    while True:
+        # نبدأ الـ window من أول seq موجود (الـ compaction اللي فاتت سابت فجوات)
+        first = changes.filter(seq__gt=low).order_by('seq').values_list('seq', flat=True).first()
+        if first is None:
+            break
+        window = changes.filter(seq__gte=first, seq__lt=first + batch_size)
+        low = first + batch_size - 1
+        old = window.filter(created_at__lt=cutoff)
+        if not old.exists():
+            # created_at ماشي مع الـ seq: window مافيهاش حاجة قديمة = خلصنا
+            break
+        with transaction.atomic(using=using):
+            superseded += old.filter(Exists(newer)).delete()[0]
+            # اللي فاضل من الـ deletes هو آخر تغيير للـ object بتاعه
+            dead = old.filter(op=Change.DELETE, created_at__lt=tombstone_cutoff)
+            last_dead = dead.aggregate(last=Max('seq'))['last']
+            if last_dead is not None:
+                tombstones += dead.delete()[0]
+                through = max(through, last_dead)
+        if progress is not None:
+            progress(min(low, last), last)
+
+    if through > compacted_through(using):
+        with transaction.atomic(using=using):
+            Change.objects.using(using).create(model='', object_id=through, op=Change.COMPACTED)
+            Change.objects.using(using).filter(op=Change.COMPACTED, object_id__lt=through).delete()
+    return {'superseded': superseded, 'tombstones': tombstones, 'compacted_through': through}
@@ -0,0 +1,148 @@
+import itertools
+from functools import lru_cache
+
+from django.db.models.query import BaseIterable, ValuesListIterable
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from alx_common.instrumentation import timed
+
+from .query import _child_queryset
+
+# الحقول اللي قيمتها من الـ DB هي نفسها ناتج to_representation
+# (int -> int, str -> str, FK id -> pk)، فمش محتاجين نعدّي عليها
+PASSTHROUGH_FIELDS = tuple(filter(None, (
+    serializers.IntegerField,
+    # DRF >= 3.15: BigAutoField -> BigIntegerField (int إلا لو coerce_to_string)
+    getattr(serializers, 'BigIntegerField', None),
+    serializers.CharField,
+    serializers.PrimaryKeyRelatedField,
+)))
+NESTED_BATCH_SIZE = 1000
+
+
+class NotCompilable(Exception):
+    pass
+
+
+# CompiledSerializer:
+# serializer للقراءة بس: values_list() -> dicts على طول من غير model instances
+# ولا to_representation لكل حقل، والناتج نفس ناتج الـ ModelSerializer بالظبط
+class CompiledSerializer:
+
+    def __init__(self, serializer_class):
+        if serializer_class.to_representation is not serializers.Serializer.to_representation:
+            raise NotCompilable(f'{serializer_class.__name__} overrides to_representation')
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+        self.names, self.columns, self.nested = [], [], []
+
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.ListSerializer) and \
+                    isinstance(field.child, serializers.ModelSerializer):
+                relation = self.model._meta.get_field(field.source)
+                if not relation.one_to_many:
+                    raise NotCompilable(f'{name}: only reverse FK nesting is supported')
+                self.nested.append((name, field.source, CompiledSerializer(type(field.child)), relation.field.attname))
+                self.names.append(name)
+                self.columns.append(None)
+                continue
+            self.names.append(name)
+            self.columns.append(self._column(name, field))
+
+        # صف الـ DB = (pk, *الأعمدة)، الـ pk بنحتاجه لربط الـ nested
+        self.column_names = [name for name, column in zip(self.names, self.columns) if column]
+        self.select_columns = [self.model._meta.pk.attname] + [c for c in self.columns if c]
+        self.iterable_class = type(
+            f'{serializer_class.__name__}Iterable', (CompiledIterable,), {'compiled': self}
+        )
+
+    def _column(self, name, field):
+        if not any(type(field).to_representation is cls.to_representation for cls in PASSTHROUGH_FIELDS) \
+                or getattr(field, 'coerce_to_string', False):
+            raise NotCompilable(f'{name}: {type(field).__name__} is not supported')
+        if '.' in field.source or field.source == '*':
+            raise NotCompilable(f'{name}: dotted source')
+        model_field = self.model._meta.get_field(field.source)
+        if model_field.many_to_many or not model_field.concrete:
+            raise NotCompilable(f'{name}: not a concrete column')
+        return model_field.attname
+
+    def select(self, queryset, extra_columns=()):
+        """
+        الـ queryset لسه queryset (ينفع filter / order_by / slice للـ pagination)
+        بس بيرجع dicts جاهزة للـ Response.
+        """
+        queryset = queryset.prefetch_related(None).values_list(*extra_columns, *self.select_columns)
+        queryset._iterable_class = self.iterable_class
+        return queryset
+
+    def build(self, rows, extra=0):
+        """rows: tuples من select() -> [(extra values, pk, dict), ...]"""
+        names = self.column_names
+        start = extra + 1
+        built = [(row[:extra], row[extra], dict(zip(names, row[start:]))) for row in rows]
+        for name, source, child, fk in self.nested:
+            children = {}
+            if built:
+                child_qs = _child_queryset(self.model, source, child.serializer_class)
+                child_qs = child.select(child_qs.filter(**{f'{fk}__in': [pk for _, pk, _ in built]}), (fk,))
+                for (parent_pk,), _, data in child.build(ValuesListIterable(child_qs), extra=1):
+                    children.setdefault(parent_pk, []).append(data)
+            for _, pk, data in built:
+                data[name] = children.get(pk, [])
+        if self.nested:
+            # رجّع ترتيب المفاتيح زي ترتيب حقول الـ serializer
+            built = [(values, pk, {name: data[name] for name in self.names}) for values, pk, data in built]
+        return built
+
+
+class CompiledIterable(BaseIterable):
+    compiled = None
+
+    def __iter__(self):
+        rows = ValuesListIterable(self.queryset, self.chunked_fetch, self.chunk_size)
+        if not self.compiled.nested:
+            names = self.compiled.column_names
+            for row in rows:
+                yield dict(zip(names, row[1:]))
+            return
+        # nested: query واحدة للأبناء لكل batch من الصفوف
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, NESTED_BATCH_SIZE))
+            if not batch:
+                return
+            for _, _, data in self.compiled.build(batch):
+                yield data
+
+
+@lru_cache(maxsize=None)
+def get_compiled(serializer_class):
+    """CompiledSerializer أو None لو الـ serializer مينفعش يتعمله compile"""
+    try:
+        return CompiledSerializer(serializer_class)
+    except NotCompilable:
+        return None
+
+
+class CompiledListMixin:
+    """
+    List views: serialize through the compiled path when the serializer
+    allows it (falls back to the normal serializer otherwise). Works with
+    pagination because select() still returns a queryset.
+    """
+
+    def list(self, request, *args, **kwargs):
+        compiled = get_compiled(self.get_serializer_class())
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+        queryset = compiled.select(self.filter_queryset(self.get_queryset()))
+        # الـ dicts بتتبني وإحنا بنقرا الصفوف، فده وقت الـ serialize (من غير الـ SQL)
+        with timed('serialize'):
+            page = self.paginate_queryset(queryset)
+            if page is None:
+                page = list(queryset)
+            else:
+                return self.get_paginated_response(page)
+        return Response(page)
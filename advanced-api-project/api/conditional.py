@@ -0,0 +1,75 @@
+import hashlib
+
+from django.db import router, transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+# Conditional GET:
+# ETag / Last-Modified من updated_at (صف واحد) أو من versions الكاش (list)، من غير serialize
+def make_etag(*parts):
+    return quote_etag(hashlib.md5('|'.join(map(str, parts)).encode('utf-8')).hexdigest())
+
+
+def list_etag(key, versions):
+    """
+    ETag لـ list = الـ cache key (query string متطبع) + versions الـ tags بتاعته
+    (api/cache.py). أي كتابة بتمس الـ list بتغير version، فمفيش query خالص.
+    None لو version ناقصة (cache مش شغال) عشان مانرجعش 304 غلط.
+    """
+    if any(version is None for version in versions.values()):
+        return None
+    return make_etag(*key, *sorted(versions.items()))
+
+
+def object_validators(model, pk, lock=False):
+    """
+    (etag, last_modified) لصف واحد، أو (None, None) لو مش موجود.
+    ``lock``: من الـ primary بـ SELECT ... FOR UPDATE (جوه transaction.atomic)
+    """
+    rows = model._default_manager.filter(pk=pk)
+    if lock:
+        rows = rows.using(router.db_for_write(model)).select_for_update()
+    updated_at = rows.values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None, None
+    # نفس الـ ETag للـ GET والـ PUT/DELETE عشان If-Match يشتغل
+    return make_etag(model._meta.label, pk, updated_at.isoformat()), updated_at.timestamp()
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """
+    304 (GET/HEAD) أو 412 (If-Match / If-None-Match / If-Unmodified-Since على
+    PUT/PATCH/DELETE) لو الـ preconditions بتقول كده، غير كده None.
+    """
+    return get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalObjectMixin:
+    """
+    For BookUpdateView / BookDeleteView: send ``If-Match: <etag from GET>``
+    so a write fails with 412 if someone else changed the book in between
+    (``If-None-Match`` / ``If-Unmodified-Since`` are honoured too).
+
+    The check locks the row, so run it and the write inside one
+    ``preconditions_atomic()`` block: two writers with the same ETag are
+    serialized and the second one gets 412.
+    """
+
+    def preconditions_atomic(self):
+        # SQLite: BEGIN IMMEDIATE (alx_common/db.py) بياخد الـ write lock من الأول
+        return transaction.atomic(using=router.db_for_write(self.get_queryset().model))
+
+    def check_preconditions(self, request, pk):
+        etag, last_modified = object_validators(self.get_queryset().model, pk, lock=True)
+        if etag is None:
+            return None
+        return conditional_response(request, etag, last_modified)
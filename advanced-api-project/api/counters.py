@@ -0,0 +1,111 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Author, Book, BookCounter
+
+# (dimension, عمود Book اللي بيتعد بيه)
+DIMENSIONS = (
+    (BookCounter.AUTHOR, 'author_id'),
+    (BookCounter.YEAR, 'publication_year'),
+)
+
+
+# Materialized counters:
+# الـ signals (api/signals.py) بتحسب delta لكل (dimension, key) وتطبقها
+# جوه نفس الـ transaction بتاعة الكتابة
+def book_keys(author_id, publication_year):
+    return ((BookCounter.AUTHOR, author_id), (BookCounter.YEAR, publication_year))
+
+
+def book_deltas(created=(), deleted=(), changed=()):
+    """
+    created / deleted: ``(author_id, publication_year)`` pairs.
+    changed: ``((old author_id, old year), (new author_id, new year))``.
+    """
+    deltas = Counter()
+    for keys in created:
+        deltas.update(book_keys(*keys))
+    for keys in deleted:
+        deltas.subtract(book_keys(*keys))
+    for old, new in changed:
+        if old != new:
+            deltas.subtract(book_keys(*old))
+            deltas.update(book_keys(*new))
+    return deltas
+
+
+def apply_deltas(deltas, using=DEFAULT_DB_ALIAS):
+    """UPDATE count = count + delta لكل key (ويعمل الصف لو مش موجود)"""
+    counters = BookCounter.objects.using(using)
+    # ترتيب ثابت للـ keys عشان الـ locks تتاخد بنفس الترتيب
+    for (dimension, key), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        row = counters.filter(dimension=dimension, key=key)
+        if not row.update(count=F('count') + delta):
+            try:
+                with transaction.atomic(using=using):
+                    counters.create(dimension=dimension, key=key, count=delta)
+            except IntegrityError:
+                # request تاني عمل الصف في نفس اللحظة
+                row.update(count=F('count') + delta)
+        if delta < 0:
+            row.filter(count__lte=0).delete()
+
+
+def expected_counts(using=DEFAULT_DB_ALIAS):
+    """الـ counters زي ما المفروض تكون، من GROUP BY حقيقي: {(dimension, key): count}"""
+    expected = {}
+    books = Book.objects.using(using).order_by()
+    for dimension, column in DIMENSIONS:
+        for key, count in books.values(column).annotate(n=Count('pk')).values_list(column, 'n'):
+            expected[(dimension, key)] = count
+    return expected
+
+
+def stored_counts(using=DEFAULT_DB_ALIAS):
+    rows = BookCounter.objects.using(using).values_list('dimension', 'key', 'count')
+    return {(dimension, key): count for dimension, key, count in rows}
+
+
+def diff_counters(using=DEFAULT_DB_ALIAS):
+    """[(dimension, key, stored, expected), ...] لكل key مختلف (فاضية = الـ counters سليمة)"""
+    with transaction.atomic(using=using):
+        stored, expected = stored_counts(using), expected_counts(using)
+    return [
+        (dimension, key, stored.get((dimension, key), 0), expected.get((dimension, key), 0))
+        for dimension, key in sorted(stored.keys() | expected.keys())
+        if stored.get((dimension, key), 0) != expected.get((dimension, key), 0)
+    ]
+
+
+def rebuild_counters(using=DEFAULT_DB_ALIAS):
+    """Replace every counter with a fresh GROUP BY. Returns the number of rows."""
+    with transaction.atomic(using=using):
+        BookCounter.objects.using(using).all().delete()
+        rows = [
+            BookCounter(dimension=dimension, key=key, count=count)
+            for (dimension, key), count in expected_counts(using).items()
+        ]
+        BookCounter.objects.using(using).bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def book_stats(using=DEFAULT_DB_ALIAS):
+    """
+    ``{'total', 'by_author', 'by_year'}`` من الـ counters بس (query للـ counters
+    + query لأسماء الكتّاب)، من غير أي GROUP BY على Book.
+    """
+    by_author, by_year = [], []
+    for dimension, key, count in BookCounter.objects.using(using).values_list('dimension', 'key', 'count'):
+        (by_author if dimension == BookCounter.AUTHOR else by_year).append((key, count))
+    names = dict(Author.objects.using(using).filter(pk__in=[key for key, _ in by_author]).values_list('pk', 'name'))
+    by_author.sort(key=lambda item: (-item[1], item[0]))
+    by_year.sort()
+    return {
+        'total': sum(count for _, count in by_year),
+        'by_author': [{'author': key, 'name': names.get(key), 'count': count} for key, count in by_author],
+        'by_year': [{'publication_year': key, 'count': count} for key, count in by_year],
+    }
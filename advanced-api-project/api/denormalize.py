@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Author, Book
+
+
+# Book.author_name:
+# نسخة من Author.name على كل كتاب عشان فلتر/بحث اسم الكاتب مايعملش join.
+# الـ signals (api/signals.py) بتحدثها، و backfill_author_names بيصلح أي drift
+# (مثلاً بعد queryset.update(author=...) أو SQL خام)
+def author_name_field():
+    """
+    ``'author_name'`` (no join) unless ``API_DENORMALIZED_AUTHOR_NAME = False``,
+    then ``'author__name'``. The column is kept in sync either way.
+    """
+    return 'author_name' if getattr(settings, 'API_DENORMALIZED_AUTHOR_NAME', True) else 'author__name'
+
+
+def _current_name():
+    return Subquery(Author.objects.filter(pk=OuterRef('author_id')).values('name')[:1])
+
+
+def stale_author_names(using=DEFAULT_DB_ALIAS):
+    """Books whose ``author_name`` doesn't match their author's name."""
+    return Book._base_manager.using(using).exclude(author_name=_current_name())
+
+
+def backfill_author_names(batch_size=10000, using=DEFAULT_DB_ALIAS):
+    """
+    Rewrite stale ``author_name`` values, one id range per transaction
+    (short write locks, each batch is a single UPDATE ... SET = (SELECT ...)).
+    Returns the number of rows fixed.
+    """
+    books = Book._base_manager.using(using)
+    last = books.aggregate(n=Max('pk'))['n'] or 0
+    fixed = 0
+    for start in range(0, last + 1, batch_size):
+        with transaction.atomic(using=using):
+            fixed += stale_author_names(using).filter(
+                pk__gte=start, pk__lt=start + batch_size,
+            ).update(author_name=_current_name(), updated_at=timezone.now())
+    return fixed
@@ -0,0 +1,101 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from alx_common.renderers import FastJSONRenderer
+
+# عدد الصفوف في كل chunk بيتبعت للعميل
+ROWS_PER_CHUNK = 500
+
+
+class StreamingExportRenderer(BaseRenderer):
+    """
+    For content negotiation only (Accept / ?format=): the export view streams
+    the rows itself. render() is only reached for error responses.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class JSONExportRenderer(StreamingExportRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+
+class _Echo:
+    """csv.writer محتاج file؛ ده بيرجع السطر بدل ما يكتبه"""
+
+    def write(self, value):
+        return value
+
+
+def export_columns(serializer_class):
+    """
+    (output name, queryset column) لكل حقل في الـ serializer.
+    FK زي author بيطلع كـ pk، فبنقرا author_id مباشرة من غير join.
+    """
+    model = serializer_class.Meta.model
+    columns = []
+    for name in serializer_class.Meta.fields:
+        model_field = model._meta.get_field(name)
+        columns.append((name, model_field.attname))
+    return columns
+
+
+def _rows(queryset, columns, chunk_size):
+    return queryset.values_list(*[column for _, column in columns]).iterator(chunk_size=chunk_size)
+
+
+def stream_ndjson(queryset, columns, chunk_size=2000):
+    names = [name for name, _ in columns]
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    buffer = []
+    for row in _rows(queryset, columns, chunk_size):
+        buffer.append(dumps(dict(zip(names, row))))
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ('\n'.join(buffer) + '\n').encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ('\n'.join(buffer) + '\n').encode('utf-8')
+
+
+def stream_csv(queryset, columns, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns]).encode('utf-8')
+    buffer = []
+    for row in _rows(queryset, columns, chunk_size):
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= ROWS_PER_CHUNK:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode('utf-8')
+
+
+def stream_json(queryset, columns, chunk_size=2000):
+    """One JSON array, rendered ROWS_PER_CHUNK rows at a time (FastJSONRenderer.render_chunks)."""
+    names = [name for name, _ in columns]
+    rows = (dict(zip(names, row)) for row in _rows(queryset, columns, chunk_size))
+    return FastJSONRenderer().render_chunks(rows, ROWS_PER_CHUNK)
+
+
+STREAMERS = {
+    'ndjson': stream_ndjson,
+    'csv': stream_csv,
+    'json': stream_json,
+}
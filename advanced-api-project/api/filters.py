@@ -0,0 +1,18 @@
+from django_filters import rest_framework as filters
+
+from .denormalize import author_name_field
+from .models import Book
+
+
+# BookFilterSet:
+# فلاتر BookListView: ?author__name= بيتقرا من Book.author_name (عمود عليه
+# index) بدل الـ join على Author
+class BookFilterSet(filters.FilterSet):
+    author__name = filters.CharFilter(method='filter_author_name')
+
+    class Meta:
+        model = Book
+        fields = ['title', 'publication_year', 'author', 'author__name']
+
+    def filter_author_name(self, queryset, name, value):
+        return queryset.filter(**{author_name_field(): value})
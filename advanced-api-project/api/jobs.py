@@ -0,0 +1,277 @@
+"""
+Database-backed background jobs for writes too heavy for a request
+(cascading author deletes, large imports).
+
+    job = enqueue('delete_author', {'author_id': 3}, user=request.user)
+
+A worker (``manage.py run_jobs``) claims queued jobs with a lease: a
+conditional UPDATE sets ``status = running`` and ``lease_until``, so two
+workers never run the same job and a job whose worker died is picked up
+again once its lease runs out. Handlers report progress (which also
+renews the lease); failures are retried with exponential backoff until
+``max_attempts``.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from .bulk import bulk_create_books, bulk_delete_books, discard_import, staged_items
+from .changes import compact_changes
+from .models import Author, Book, Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # الـ job بيرجع للـ queue لو الـ worker ماعملش progress في المدة دي
+    'LEASE_SECONDS': 60,
+    'POLL_INTERVAL': 1.0,   # seconds بين كل محاولة والتانية لما الـ queue فاضية
+    'MAX_ATTEMPTS': 3,
+    # retry n بيستنى RETRY_BACKOFF * 2 ** (n - 1) لحد RETRY_BACKOFF_MAX
+    'RETRY_BACKOFF': 5,
+    'RETRY_BACKOFF_MAX': 300,
+    # كتب في كل transaction في الحذف بالـ chunks
+    'DELETE_BATCH_SIZE': 500,
+    'IMPORT_BATCH_SIZE': 1000,
+}
+# عدد الـ jobs اللي بنجرب ناخدها لو worker تاني سبقنا على الأولى
+CLAIM_CANDIDATES = 5
+
+HANDLERS = {}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'API_JOBS', {})}
+
+
+class JobError(Exception):
+    """Raised by a handler for a failure that a retry won't fix (no more attempts)."""
+
+
+class LeaseLost(Exception):
+    """The job's lease ran out and another worker has it now."""
+
+
+def handler(kind):
+    """Register ``func(job) -> result`` as the handler for ``kind``."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, payload=None, user=None, max_attempts=None):
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or _config()['MAX_ATTEMPTS'],
+    )
+
+
+def _lease(now):
+    return now + timedelta(seconds=_config()['LEASE_SECONDS'])
+
+
+def requeue_expired(now=None):
+    """
+    Jobs whose worker stopped renewing the lease go back to the queue, or
+    fail if they're out of attempts. Returns ``(requeued, failed)``.
+    """
+    now = now or timezone.now()
+    expired = Job.objects.filter(status=Job.RUNNING, lease_until__lt=now)
+    failed = expired.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error='Lease expired (worker stopped).', locked_by='', lease_until=None,
+        finished_at=now, updated_at=now,
+    )
+    requeued = expired.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, run_after=now, locked_by='', lease_until=None, updated_at=now,
+    )
+    return requeued, failed
+
+
+def claim(worker, kinds=None, now=None):
+    """Lease the next due job for ``worker``, or None if the queue is empty."""
+    now = now or timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+    if kinds:
+        due = due.filter(kind__in=kinds)
+    for pk in due.order_by('run_after', 'pk').values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        # UPDATE ... WHERE status = 'queued': worker واحد بس هيلاقي rowcount = 1
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, lease_until=_lease(now),
+            attempts=F('attempts') + 1, updated_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def report_progress(job, progress, total=None, result=None):
+    """
+    Save progress (and optionally a partial result, so a retry can resume)
+    and renew the lease. Raises LeaseLost if the job isn't ours anymore, so
+    the handler stops instead of racing the new owner.
+    """
+    now = timezone.now()
+    fields = {'progress': progress, 'lease_until': _lease(now), 'updated_at': now}
+    if total is not None:
+        fields['total'] = total
+    if result is not None:
+        fields['result'] = result
+    if not Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by).update(**fields):
+        raise LeaseLost(f"Lost the lease on job {job.pk}")
+    job.progress = progress
+    if total is not None:
+        job.total = total
+    if result is not None:
+        job.result = result
+
+
+def _retry_delay(attempts):
+    config = _config()
+    return min(config['RETRY_BACKOFF'] * 2 ** (attempts - 1), config['RETRY_BACKOFF_MAX'])
+
+
+def _finish(job, **fields):
+    now = timezone.now()
+    fields.update(locked_by='', lease_until=None, updated_at=now)
+    if fields['status'] != Job.QUEUED:
+        fields['finished_at'] = now
+    # نفس شرط الـ lease: لو worker تاني خده مانكتبش فوقه
+    Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**fields)
+
+
+def execute(job):
+    """Run a claimed job and record the outcome."""
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise JobError(f"No handler for job kind {job.kind!r}")
+        result = func(job)
+    except LeaseLost:
+        logger.warning("Job %s: lease lost, leaving it to the new owner", job.pk)
+        return
+    except Exception as exc:
+        error = ''.join(traceback.format_exception_only(type(exc), exc)).strip()
+        if isinstance(exc, JobError) or job.attempts >= job.max_attempts:
+            logger.exception("Job %s (%s) failed", job.pk, job.kind)
+            _finish(job, status=Job.FAILED, error=error)
+        else:
+            logger.warning("Job %s (%s) attempt %s failed, retrying: %s", job.pk, job.kind, job.attempts, error)
+            _finish(job, status=Job.QUEUED, error=error,
+                    run_after=timezone.now() + timedelta(seconds=_retry_delay(job.attempts)))
+        return
+    _finish(job, status=Job.SUCCEEDED, result=result, error='')
+
+
+# Worker:
+# loop بياخد job ويشغلها؛ كل process (manage.py run_jobs --processes N) فيها worker واحد
+class Worker:
+
+    def __init__(self, name=None, kinds=None, poll_interval=None):
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.kinds = kinds
+        self.poll_interval = _config()['POLL_INTERVAL'] if poll_interval is None else poll_interval
+        self.stopping = False
+
+    def run_once(self):
+        """Requeue expired leases, then claim and run one job. Returns it (or None)."""
+        # برة request: كل القراءات من الـ primary (api/routers.py)
+        requeue_expired()
+        job = claim(self.name, self.kinds)
+        if job is not None:
+            execute(job)
+        return job
+
+    def run(self, burst=False, max_jobs=None):
+        """
+        Work until ``stop()`` (e.g. SIGTERM; the current job finishes first).
+        ``burst``: return as soon as the queue is empty. Returns the number
+        of jobs run.
+        """
+        done = 0
+        while not self.stopping:
+            # زي request cycle: connection بايظة أو قديمة تتقفل قبل وبعد كل job
+            close_old_connections()
+            job = self.run_once()
+            close_old_connections()
+            if job is None:
+                if burst:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            done += 1
+            if max_jobs and done >= max_jobs:
+                break
+        return done
+
+    def stop(self, *args):
+        self.stopping = True
+
+
+# Handlers:
+# لازم تبقى idempotent: retry بعد فشل في النص بيكمل من مكان ما وقف
+@handler('delete_author')
+def delete_author(job):
+    """Delete an author's books in chunks, then the author (nothing left to cascade)."""
+    author_id = job.payload['author_id']
+    books = Book.objects.filter(author_id=author_id)
+    report_progress(job, 0, total=books.count())
+    deleted = bulk_delete_books(books, _config()['DELETE_BATCH_SIZE'], lambda n: report_progress(job, n))
+    # كتاب اتضاف في الآخر خالص بيتمسح هنا بالـ cascade العادي
+    author_deleted, _ = Author.objects.filter(pk=author_id).delete()
+    return {'author_id': author_id, 'deleted_books': deleted, 'author_deleted': bool(author_deleted)}
+
+
+@handler('delete_books')
+def delete_books(job):
+    books = Book.objects.filter(pk__in=job.payload['ids'])
+    report_progress(job, 0, total=len(job.payload['ids']))
+    deleted = bulk_delete_books(books, _config()['DELETE_BATCH_SIZE'], lambda n: report_progress(job, n))
+    return {'deleted_books': deleted}
+
+
+@handler('import_books')
+def import_books(job):
+    """
+    bulk_create_books over the upload spool_import() staged (``payload['upload']``,
+    ``payload['total']`` items); error indexes are into the whole upload.
+    """
+    upload, total = job.payload['upload'], job.payload['total']
+    batch_size = job.payload.get('batch_size') or _config()['IMPORT_BATCH_SIZE']
+    # retry: نكمل بعد آخر batch اتعمله commit (progress + النتيجة لحد هناك محفوظين)
+    start = job.progress
+    summary = job.result or {'created': 0, 'errors': []}
+    try:
+        report_progress(job, start, total=total)
+        while start < total:
+            result = bulk_create_books(staged_items(upload, start, start + batch_size), batch_size)
+            summary['created'] += result.created
+            summary['errors'] += [{**error, 'index': error['index'] + start} for error in result.errors]
+            start = min(start + batch_size, total)
+            report_progress(job, start, result=summary)
+    except LeaseLost:
+        raise
+    except Exception as exc:
+        # آخر محاولة: مفيش retry هيقرا الـ items دي تاني
+        if isinstance(exc, JobError) or job.attempts >= job.max_attempts:
+            discard_import(upload)
+        raise
+    discard_import(upload)
+    return summary
+
+
+@handler('compact_changes')
+def compact_change_log(job):
+    """compact_changes() (api/changes.py); progress = seq reached / last seq."""
+    return compact_changes(progress=lambda done, total: report_progress(job, done, total=total))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.denormalize import backfill_author_names, stale_author_names
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy Author.name into Book.author_name wherever it is stale, one id "
+        "range per transaction. --check only reports (and fails if any are stale)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--check', action='store_true', help="Report stale rows without fixing them.")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            stale = stale_author_names(options['database']).count()
+            if stale:
+                raise CommandError(f"{stale} books have a stale author_name (run without --check to fix).")
+            self.stdout.write("author_name is consistent.")
+            return
+        fixed = backfill_author_names(options['batch_size'], options['database'])
+        self.stdout.write(f"Backfilled author_name on {fixed} books.")
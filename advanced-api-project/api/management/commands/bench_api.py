@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from alx_common.bench import WORDS, BenchCommand, Scenario, fake_name, fake_title
+from api.bulk import bulk_create_books
+from api.counters import rebuild_counters
+from api.models import Author, Book
+
+BATCH_SIZE = 10000
+YEARS = (1900, 2020)
+
+
+class Command(BenchCommand):
+    help = (
+        "Benchmark the Book API (list, filter, search, ordering, detail, "
+        "create, update, delete) on a seeded database of --size rows; "
+        "--output writes JSON, --baseline compares with a previous run."
+    )
+    project = 'advanced-api-project'
+    # نقيس الـ views نفسها: من غير response cache ولا replicas
+    settings_overrides = {
+        'API_RESPONSE_CACHE': {'ENABLED': False},
+        'API_READ_REPLICAS': {'ALIASES': []},
+    }
+
+    def seed(self, rows, rng):
+        Author.objects.bulk_create((Author(name=fake_name(rng)) for _ in range(max(rows // 10, 1))), batch_size=5000)
+        authors = list(Author.objects.values_list('pk', 'name'))
+        for start in range(0, rows, BATCH_SIZE):
+            with transaction.atomic():
+                # bulk_create مابيبعتش signals: author_name لازم يتملى هنا (api/denormalize.py)
+                Book.objects.bulk_create([
+                    Book(title=fake_title(rng), publication_year=rng.randint(*YEARS), author_id=author_id,
+                         author_name=author_name)
+                    for author_id, author_name in (rng.choice(authors) for _ in range(min(BATCH_SIZE, rows - start)))
+                ], batch_size=5000)
+        rebuild_counters()
+
+    def get_client(self):
+        user, _ = User.objects.get_or_create(username='bench-api')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def scenarios(self, rows):
+        books = reverse('book-list')
+        max_book = Book.objects.aggregate(n=Max('pk'))['n']
+        max_author = Author.objects.aggregate(n=Max('pk'))['n']
+        victims = []
+
+        def payload(rng):
+            return {'title': fake_title(rng), 'publication_year': rng.randint(*YEARS),
+                    'author': rng.randint(1, max_author)}
+
+        def make_victims(count):
+            bulk_create_books([{'title': f'Bench Delete {i}', 'publication_year': 2000, 'author': 1}
+                               for i in range(count)])
+            victims.extend(Book.objects.filter(title__startswith='Bench Delete').values_list('pk', flat=True))
+
+        return [
+            Scenario('list', lambda rng: ('GET', f'{books}?page_size=50', None)),
+            Scenario('filter_year', lambda rng: (
+                'GET', f'{books}?publication_year={rng.randint(*YEARS)}&page_size=50', None)),
+            Scenario('filter_author', lambda rng: (
+                'GET', f'{books}?author={rng.randint(1, max_author)}&page_size=50', None)),
+            Scenario('search', lambda rng: ('GET', f'{books}?search={rng.choice(WORDS)[:4]}&page_size=50', None)),
+            Scenario('ordering', lambda rng: ('GET', f'{books}?ordering=-publication_year&page_size=50', None)),
+            Scenario('detail', lambda rng: (
+                'GET', reverse('book-detail', kwargs={'pk': rng.randint(1, max_book)}), None)),
+            Scenario('create', lambda rng: ('POST', reverse('book-create'), payload(rng)), expect=201),
+            Scenario('update', lambda rng: (
+                'PUT', reverse('book-update', kwargs={'pk': rng.randint(1, max_book)}), payload(rng))),
+            Scenario('delete', lambda rng: ('DELETE', reverse('book-delete', kwargs={'pk': victims.pop()}), None),
+                     expect=204, setup=make_victims),
+        ]
@@ -0,0 +1,90 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from api.models import Author, Book
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync Book/Author read views with their async versions "
+        "(api/async_views.py) under concurrent requests, through the "
+        "in-process ASGI client. Seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per run (default 500).")
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50],
+                            help="In-flight requests per run (default 1 10 50).")
+        parser.add_argument('--books', type=int, default=2000, help="Books to seed (default 2000).")
+
+    def handle(self, *args, **options):
+        # الـ response cache بيخبي الفرق، إحنا عايزين نقيس الـ views نفسها
+        overrides = override_settings(
+            API_RESPONSE_CACHE={'ENABLED': False}, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            TOKEN_BUCKET_THROTTLE={'ENABLED': False},
+        )
+        with transaction.atomic(), overrides:
+            try:
+                book = self.seed(options['books'])
+                self.run(book, options)
+            finally:
+                transaction.set_rollback(True)
+
+    def seed(self, count):
+        authors = Author.objects.bulk_create(Author(name=f'Bench Author {i}') for i in range(50))
+        books = Book.objects.bulk_create(
+            Book(title=f'Bench Book {i}', publication_year=1900 + i % 120,
+                 author=authors[i % len(authors)], author_name=authors[i % len(authors)].name)
+            for i in range(count)
+        )
+        return books[0]
+
+    def run(self, book, options):
+        endpoints = (
+            ('books?page_size=50', f"{reverse('book-list')}?page_size=50",
+             f"{reverse('async-book-list')}?page_size=50"),
+            ('book detail', reverse('book-detail', kwargs={'pk': book.pk}),
+             reverse('async-book-detail', kwargs={'pk': book.pk})),
+            ('books?author=', f"{reverse('book-list')}?author={book.author_id}",
+             f"{reverse('async-book-list')}?author={book.author_id}"),
+        )
+        for label, sync_url, async_url in endpoints:
+            for concurrency in options['concurrency']:
+                results = [
+                    (kind, async_to_sync(self.load)(url, options['requests'], concurrency))
+                    for kind, url in (('sync', sync_url), ('async', async_url))
+                ]
+                baseline = results[0][1][0]
+                for kind, (rate, p50, p99) in results:
+                    self.stdout.write(
+                        f"{label:<18} c={concurrency:<4} {kind:<5} {rate:8.0f} req/s  "
+                        f"p50 {p50 * 1000:7.1f}ms  p99 {p99 * 1000:7.1f}ms  x{rate / baseline:.2f}"
+                    )
+
+    async def load(self, url, total, concurrency):
+        client = AsyncClient(headers={'Accept': 'application/json'})
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url}: HTTP {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+        quantiles = statistics.quantiles(sorted(latencies), n=100)
+        return total / elapsed, quantiles[49], quantiles[98]
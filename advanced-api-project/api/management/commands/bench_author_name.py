@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author, Book
+from api.views import BookListView
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ?author__name= on BookListView with and without the "
+        "denormalized Book.author_name column: query plan, timing and "
+        "identical results. Rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20, help="Queries per variant (best time reported).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            try:
+                self.run(options)
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, options):
+        authors = Author.objects.bulk_create(
+            Author(name=f'Bench Author {i}') for i in range(options['authors'])
+        )
+        Book.objects.bulk_create(
+            (Book(title=f'Bench Book {i}', publication_year=1900 + i % 120,
+                  author=authors[i % len(authors)], author_name=authors[i % len(authors)].name)
+             for i in range(options['rows'])),
+            batch_size=5000,
+        )
+        request = APIRequestFactory().get('/', {'author__name': authors[len(authors) // 2].name})
+
+        results = {}
+        for label, enabled in (('join', False), ('author_name', True)):
+            with override_settings(API_DENORMALIZED_AUTHOR_NAME=enabled):
+                queryset = self.queryset(request)
+                ids = list(queryset.values_list('pk', flat=True))
+                best = min(self.timed(queryset) for _ in range(options['repeat']))
+                plan = queryset.explain()
+            results[label] = ids
+            self.stdout.write(f"{label:<12} {best * 1000:8.2f} ms  ({len(ids)} rows)")
+            self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if results['join'] != results['author_name']:
+            raise CommandError("author_name and author__name returned different books")
+        with override_settings(API_DENORMALIZED_AUTHOR_NAME=True):
+            if Author._meta.db_table in str(self.queryset(request).query):
+                raise CommandError("The denormalized query still joins api_author")
+        self.stdout.write(self.style.SUCCESS("Same results; the author_name query has no join."))
+
+    @staticmethod
+    def queryset(django_request):
+        view = BookListView()
+        view.request = Request(django_request)
+        view.args, view.kwargs, view.format_kwarg = (), {}, None
+        return view.filter_queryset(view.get_queryset())
+
+    @staticmethod
+    def timed(queryset):
+        start = time.perf_counter()
+        list(queryset.all().values_list('pk', flat=True))
+        return time.perf_counter() - start
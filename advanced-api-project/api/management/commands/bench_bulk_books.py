@@ -0,0 +1,63 @@
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.models import Author
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare import throughput of the single-item BookCreateView against "
+        "the bulk endpoint (JSON array and NDJSON). Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=2000, help="Books per run (default 2000).")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count, batch_size = options['count'], options['batch_size']
+        with transaction.atomic():
+            try:
+                self.run(count, batch_size)
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, count, batch_size):
+        user = User.objects.create_user(username='bench-bulk-books')
+        author = Author.objects.create(name='Bench Author')
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user=user)
+        items = [
+            {'title': f'Bench Book {i}', 'publication_year': 1900 + i % 120, 'author': author.pk}
+            for i in range(count)
+        ]
+
+        def single():
+            url = reverse('book-create')
+            for item in items:
+                client.post(url, data=item, format='json')
+
+        def bulk_json():
+            client.post(f"{reverse('book-bulk-create')}?batch_size={batch_size}", data=items, format='json')
+
+        def bulk_ndjson():
+            body = '\n'.join(json.dumps(item) for item in items)
+            client.post(
+                f"{reverse('book-bulk-create')}?batch_size={batch_size}",
+                data=body, content_type='application/x-ndjson',
+            )
+
+        baseline = None
+        for label, func in (('single-item', single), ('bulk JSON', bulk_json), ('bulk NDJSON', bulk_ndjson)):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            rate = count / elapsed
+            baseline = baseline or rate
+            self.stdout.write(f"{label:<12} {count} books in {elapsed:7.3f}s  {rate:10.0f} books/s  x{rate / baseline:.1f}")
@@ -0,0 +1,129 @@
+import random
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from alx_common.db import database_config
+from api.models import Author, Book
+
+# الـ journal_mode بيتخزن في ملف الداتابيز نفسه، فلازم نرجعه صراحة في الـ profiles القديمة
+ROLLBACK_JOURNAL = {'init_command': 'PRAGMA journal_mode=DELETE'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the Book endpoints from several threads against a scratch "
+        "SQLite file, once per connection profile: a new connection per "
+        "request (CONN_MAX_AGE=0), persistent connections, and the shared "
+        "alx_common.db config (persistent + WAL/PRAGMAs). The project's own "
+        "database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help="Client threads (default 8).")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per thread (default 200).")
+        parser.add_argument('--books', type=int, default=2000, help="Books to seed (default 2000).")
+        parser.add_argument('--write-every', type=int, default=10,
+                            help="Every Nth request is a PATCH (0 = read only, default 10).")
+
+    def handle(self, *args, **options):
+        db_settings = connections.settings['default']
+        original = dict(db_settings)
+        with tempfile.TemporaryDirectory() as tmp:
+            profiles = (
+                ('per-request', {'CONN_MAX_AGE': 0, 'OPTIONS': ROLLBACK_JOURNAL}),
+                ('persistent', {'CONN_MAX_AGE': None, 'OPTIONS': ROLLBACK_JOURNAL}),
+                ('alx_common.db', database_config(Path(tmp) / 'bench.sqlite3', env={'DATABASE_SQLITE_WAL': '1'})),
+            )
+            try:
+                self.use_database(db_settings, {**original, 'NAME': Path(tmp) / 'bench.sqlite3'})
+                call_command('migrate', verbosity=0)
+                self.seed(options['books'])
+                # response cache بيخبي الـ DB، إحنا عايزين نقيس الـ connections
+                with override_settings(API_RESPONSE_CACHE={'ENABLED': False}, TOKEN_BUCKET_THROTTLE={'ENABLED': False}):
+                    baseline = None
+                    for label, profile in profiles:
+                        self.use_database(db_settings, {**db_settings, **profile})
+                        rate = self.run(label, options)
+                        baseline = baseline or rate
+                        self.stdout.write(f"{'':<14} x{rate / baseline:.2f} vs per-request")
+            finally:
+                self.use_database(db_settings, original)
+
+    def use_database(self, db_settings, values):
+        connections.close_all()
+        db_settings.clear()
+        db_settings.update(values)
+
+    def seed(self, count):
+        authors = Author.objects.bulk_create(Author(name=f'Bench Author {i}') for i in range(50))
+        Book.objects.bulk_create(
+            Book(title=f'Bench Book {i}', publication_year=1900 + i % 120,
+                 author=authors[i % len(authors)], author_name=authors[i % len(authors)].name)
+            for i in range(count)
+        )
+        User.objects.create_user(username='bench-connections')
+
+    def run(self, label, options):
+        book_ids = list(Book.objects.values_list('pk', flat=True))
+        user = User.objects.get(username='bench-connections')
+        connections.close_all()
+
+        latencies, errors, opened = [], [], []
+        lock = threading.Lock()
+        on_connect = lambda sender, connection, **kwargs: opened.append(1)  # noqa: E731
+        connection_created.connect(on_connect)
+
+        def worker(seed):
+            rng = random.Random(seed)
+            client = APIClient(SERVER_NAME='localhost', raise_request_exception=False)
+            client.force_authenticate(user=user)
+            mine, failed = [], 0
+            for i in range(options['requests']):
+                start = time.perf_counter()
+                # الـ test client بيفصل close_old_connections عن request_started/finished،
+                # فبنعمل اللي الـ handler الحقيقي بيعمله
+                close_old_connections()
+                if options['write_every'] and i % options['write_every'] == options['write_every'] - 1:
+                    url = reverse('book-update', kwargs={'pk': rng.choice(book_ids)})
+                    response = client.patch(url, data={'title': f'Bench Book {seed}-{i}'}, format='json')
+                else:
+                    year = 1900 + rng.randrange(120)
+                    response = client.get(f"{reverse('book-list')}?publication_year={year}")
+                close_old_connections()
+                mine.append(time.perf_counter() - start)
+                failed += response.status_code >= 400
+            connections.close_all()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        connection_created.disconnect(on_connect)
+
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100)
+        rate = len(latencies) / elapsed
+        self.stdout.write(
+            f"{label:<14} {len(latencies)} req in {elapsed:6.2f}s  {rate:8.0f} req/s  "
+            f"p50 {quantiles[49] * 1000:6.1f}ms  p99 {quantiles[98] * 1000:6.1f}ms  "
+            f"connections {len(opened):5}  errors {sum(errors)}"
+        )
+        return rate
@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from alx_common.renderers import FastJSONRenderer
+from api.compiled import get_compiled
+from api.models import Author, Book
+from api.query import plan_queryset
+from api.serializers import BookSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Render BookSerializer pages with DRF's JSONRenderer and FastJSONRenderer: "
+        "time and peak memory allocated while rendering (tracemalloc), identical "
+        "output checked. Rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs for the timing (default 3).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            try:
+                self.run(sorted(options['rows']), options['repeat'])
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, sizes, repeat):
+        author = Author.objects.create(name='Bench Author')
+        compiled = get_compiled(BookSerializer)
+        renderers = (('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer()))
+        created = 0
+
+        for size in sizes:
+            Book.objects.bulk_create(
+                (Book(title=f'Bench Book {i} – ✓', publication_year=1900 + i % 120, author=author,
+                      author_name=author.name)
+                 for i in range(created, size)),
+                batch_size=5000,
+            )
+            created = size
+            # نفس شكل الـ page بتاع KeysetPagination
+            data = {'next': None, 'previous': None,
+                    'results': list(compiled.select(plan_queryset(Book.objects.order_by('id'), BookSerializer)))}
+
+            outputs = set()
+            for label, renderer in renderers:
+                elapsed, peak, body = self.measure(renderer, data, repeat)
+                outputs.add(body)
+                # peak / حجم الـ body: 1.0 = نسخة واحدة من الـ payload
+                self.stdout.write(
+                    f"{size:>8} rows  {label:<17} {elapsed * 1000:8.1f} ms  "
+                    f"peak {peak / 2 ** 20:7.1f} MiB  x{peak / len(body):.2f} of the {len(body) / 2 ** 20:.1f} MiB body"
+                )
+            if len(outputs) != 1:
+                raise CommandError(f"Output differs at {size} rows")
+
+    @staticmethod
+    def measure(renderer, data, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            renderer.render(data)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        # الـ peak في run لوحده (tracemalloc بيبطأ، فمنفصل عن التوقيت)
+        tracemalloc.start()
+        try:
+            body = renderer.render(data)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return best, peak, body
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.compiled import get_compiled
+from api.models import Author, Book
+from api.query import plan_queryset
+from api.serializers import BookSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark BookSerializer against the compiled read path at several "
+        "sizes and check that both render to the same bytes. Rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--repeat', type=int, default=3, help="Best of N runs (default 3).")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            try:
+                self.run(sorted(options['rows']), options['repeat'])
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, sizes, repeat):
+        author = Author.objects.create(name='Bench Author')
+        created = 0
+        renderer = JSONRenderer()
+        compiled = get_compiled(BookSerializer)
+
+        for size in sizes:
+            Book.objects.bulk_create(
+                (Book(title=f'Bench Book {i}', publication_year=1900 + i % 120, author=author, author_name=author.name)
+                 for i in range(created, size)),
+                batch_size=5000,
+            )
+            created = size
+            queryset = plan_queryset(Book.objects.order_by('id'), BookSerializer)
+
+            def drf():
+                return renderer.render(BookSerializer(queryset.all(), many=True).data)
+
+            def fast():
+                return renderer.render(list(compiled.select(queryset.all())))
+
+            drf_time, drf_bytes = self.best_of(drf, repeat)
+            fast_time, fast_bytes = self.best_of(fast, repeat)
+            if drf_bytes != fast_bytes:
+                raise CommandError(f"Output differs at {size} rows")
+            self.stdout.write(
+                f"{size:>8} rows  ModelSerializer {drf_time * 1000:9.1f} ms  "
+                f"compiled {fast_time * 1000:9.1f} ms  x{drf_time / fast_time:.1f}  (identical output)"
+            )
+
+    @staticmethod
+    def best_of(func, repeat):
+        best, output = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.counters import diff_counters, rebuild_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the materialized BookCounter rows with a real aggregate over "
+        "Book. Exits with an error if they drifted (e.g. after a raw "
+        "queryset.update()); --fix rebuilds them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--fix', action='store_true', help="Rebuild the counters if they drifted.")
+
+    def handle(self, *args, **options):
+        diffs = diff_counters(options['database'])
+        if not diffs:
+            self.stdout.write("Counters are consistent.")
+            return
+        for dimension, key, stored, expected in diffs:
+            self.stdout.write(f"{dimension}={key}: stored {stored}, expected {expected}")
+        if options['fix']:
+            rebuild_counters(options['database'])
+            self.stdout.write(f"Rebuilt counters ({len(diffs)} mismatches fixed).")
+            return
+        raise CommandError(f"{len(diffs)} counters are inconsistent (run with --fix to rebuild).")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.changes import compact_changes
+from api.jobs import enqueue
+
+
+class Command(BaseCommand):
+    help = (
+        "Compact the change log (api/changes.py): drop entries superseded by a "
+        "newer change to the same object, and expired delete tombstones. "
+        "--queue runs it as a background job instead (manage.py run_jobs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--batch-size', type=int, help="Log entries per transaction.")
+        parser.add_argument('--queue', action='store_true', help="Enqueue a compact_changes job and return.")
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            job = enqueue('compact_changes')
+            self.stdout.write(f"Queued job {job.pk}.")
+            return
+        result = compact_changes(batch_size=options['batch_size'], using=options['database'])
+        self.stdout.write(
+            f"Dropped {result['superseded']} superseded entries and {result['tombstones']} tombstones "
+            f"(compacted through seq {result['compacted_through']})."
+        )
@@ -0,0 +1,100 @@
+import itertools
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Author
+from api.views import BookListView
+
+# قيم تجريبية لكل فلتر (الـ plan مش بيعتمد على القيمة نفسها)
+SAMPLE_VALUES = {
+    'title': 'x',
+    'publication_year': '2000',
+    'author__name': 'x',
+}
+
+# "SCAN t" أو "SCAN t USING INDEX i" = بيلف على الجدول/الـ index كله
+SCAN_RE = re.compile(r'\bSCAN (\w+)')
+TEMP_SORT_RE = re.compile(r'USE TEMP B-TREE FOR ORDER BY')
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN over every filter/ordering combination that "
+        "BookListView allows and report the ones that still do a full table scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-filters', type=int, default=2,
+            help="Combine up to this many BookListView filters per query (default 2).",
+        )
+        parser.add_argument(
+            '--verbose-plans', action='store_true',
+            help="Print the plan for every combination, not only the problems.",
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="Exit with an error if any combination falls back to a full scan.",
+        )
+
+    def handle(self, *args, **options):
+        # Author مؤقت عشان فلتر author (ModelChoiceFilter) يقبل القيمة، وبنعمل rollback في الآخر
+        with transaction.atomic():
+            sample_author = Author.objects.create(name=SAMPLE_VALUES['author__name'])
+            try:
+                self.report(options, {**SAMPLE_VALUES, 'author': str(sample_author.pk)})
+            finally:
+                transaction.set_rollback(True)
+
+    def report(self, options, sample_values):
+        view = BookListView
+        orderings = [None] + [
+            prefix + field for field in view.ordering_fields for prefix in ('', '-')
+        ]
+        filter_sets = [
+            combo
+            for size in range(options['max_filters'] + 1)
+            for combo in itertools.combinations(view.filterset_class.base_filters, size)
+        ]
+
+        factory = APIRequestFactory()
+        full_scans = temp_sorts = total = 0
+        for filters, ordering in itertools.product(filter_sets, orderings):
+            params = {name: sample_values.get(name, '1') for name in filters}
+            if ordering:
+                params['ordering'] = ordering
+            plan = self.explain(view, factory.get('/', params))
+            total += 1
+
+            # من غير فلاتر الـ SCAN طبيعي (الـ LIMIT بيحدده)، المهم مفيش temp sort
+            scanned = SCAN_RE.findall(plan) if filters else []
+            sorted_in_temp = bool(TEMP_SORT_RE.search(plan))
+            full_scans += bool(scanned)
+            temp_sorts += sorted_in_temp
+
+            label = f"filters={list(filters) or '-'} ordering={ordering or view.ordering}"
+            if scanned:
+                self.stdout.write(self.style.ERROR(f"FULL SCAN ({', '.join(scanned)}): {label}"))
+            elif sorted_in_temp:
+                self.stdout.write(self.style.WARNING(f"TEMP SORT: {label}"))
+            elif options['verbose_plans']:
+                self.stdout.write(f"ok: {label}")
+            if scanned or sorted_in_temp or options['verbose_plans']:
+                self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        summary = f"{total} combinations, {full_scans} full scans, {temp_sorts} temp sorts"
+        if full_scans and options['strict']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not full_scans else summary)
+
+    @staticmethod
+    def explain(view_class, django_request):
+        view = view_class()
+        view.request = Request(django_request)
+        view.args, view.kwargs, view.format_kwarg = (), {}, None
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset.explain()
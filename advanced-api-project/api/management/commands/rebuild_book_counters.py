@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized BookCounter rows from a real GROUP BY on Book (one transaction)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        rows = rebuild_counters(options['database'])
+        self.stdout.write(f"Rebuilt {rows} counters.")
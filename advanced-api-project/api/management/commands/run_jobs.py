@@ -0,0 +1,57 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.jobs import HANDLERS, Worker
+
+
+def work(kinds, poll_interval, burst, max_jobs):
+    worker = Worker(kinds=kinds, poll_interval=poll_interval)
+    # SIGTERM / Ctrl-C: نخلص الـ job اللي شغالة وبعدين نقف
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    return worker.run(burst=burst, max_jobs=max_jobs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (api.jobs): claim queued jobs with a lease and "
+        "run them until stopped. --processes N forks N workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes (default 1).")
+        parser.add_argument('--kind', action='append', dest='kinds', choices=sorted(HANDLERS),
+                            help="Only run jobs of this kind (repeatable).")
+        parser.add_argument('--poll-interval', type=float, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty.")
+        parser.add_argument('--max-jobs', type=int, help="Exit after this many jobs (per process).")
+
+    def handle(self, *args, **options):
+        job_args = (options['kinds'], options['poll_interval'], options['burst'], options['max_jobs'])
+        if options['processes'] <= 1:
+            done = work(*job_args)
+            self.stdout.write(f"Ran {done} jobs.")
+            return
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError("--processes needs fork(); run one run_jobs per process instead.")
+        # كل process تفتح connections بتاعتها، مانورثش sockets / ملفات SQLite مفتوحة
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [
+            context.Process(target=work, args=job_args, name=f'run_jobs-{i}')
+            for i in range(options['processes'])
+        ]
+        for child in children:
+            child.start()
+        # SIGTERM للـ parent بيتبعت لكل الـ workers (Ctrl-C بيوصلهم لوحده من الـ terminal)
+        signal.signal(signal.SIGTERM, lambda *_: [child.terminate() for child in children if child.is_alive()])
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for child in children:
+            child.join()
+        failed = [child.name for child in children if child.exitcode]
+        if failed:
+            raise CommandError(f"Workers exited with an error: {', '.join(failed)}")
+        self.stdout.write(f"{len(children)} workers stopped.")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replication import replicator
+from api.routers import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database onto the read replicas (the local "
+        "replication stand-in). Run once after migrate; after that the "
+        "replicas follow every commit on their own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help="Replica aliases (default: API_READ_REPLICAS['ALIASES']).")
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or replica_aliases()
+        if not aliases:
+            raise CommandError("No replicas configured (set API_READ_REPLICAS=replica).")
+        replicator.replicate(aliases)
+        self.stdout.write(f"Replicated to: {', '.join(aliases)}")
@@ -0,0 +1,77 @@
+from django.db import migrations, OperationalError
+
+
+# جدول FTS5 للبحث في العنوان واسم الكاتب
+# بيتحدث بالـ triggers عشان يفضل متزامن حتى مع bulk_create / update()
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE api_book_fts USING fts5(title, author_name, tokenize='unicode61')",
+    """
+    CREATE TRIGGER api_book_fts_ai AFTER INSERT ON api_book BEGIN
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_au AFTER UPDATE OF title, author_id ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_ad AFTER DELETE ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_author_fts_au AFTER UPDATE OF name ON api_author BEGIN
+        UPDATE api_book_fts SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO api_book_fts(rowid, title, author_name)
+    SELECT api_book.id, api_book.title, api_author.name
+    FROM api_book JOIN api_author ON api_author.id = api_book.author_id
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_author_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ad",
+    "DROP TRIGGER IF EXISTS api_book_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ai",
+    "DROP TABLE IF EXISTS api_book_fts",
+]
+
+
+def create_fts(apps, schema_editor):
+    # SQLite بس، ولو FTS5 مش متاح نسيبها للـ index اللي في الذاكرة
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("CREATE VIRTUAL TABLE temp.api_fts_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.api_fts_probe")
+    except OperationalError:
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,83 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# SQLite بيعمل remake لـ api_book / api_author في AddField والـ triggers
+# بتاعة FTS (migration 0002) بتقع، فبنشيلها قبل ونرجعها بعد.
+# الـ SQL هنا نسخة ثابتة عشان الـ migration ماتعتمدش على كود الـ app
+CREATE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER api_book_fts_ai AFTER INSERT ON api_book BEGIN
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_au AFTER UPDATE OF title, author_id ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_ad AFTER DELETE ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_author_fts_au AFTER UPDATE OF name ON api_author BEGIN
+        UPDATE api_book_fts SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS api_author_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ad",
+    "DROP TRIGGER IF EXISTS api_book_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ai",
+]
+
+
+def drop_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def create_fts_triggers(apps, schema_editor):
+    # مفيش جدول FTS (مش SQLite أو FTS5 مش متاح) = مفيش triggers
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if 'api_book_fts' not in connection.introspection.table_names(cursor):
+            return
+    for sql in CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_book_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='author',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+    ]
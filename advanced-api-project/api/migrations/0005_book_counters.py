@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    # نفس rebuild_counters بس بالـ historical models
+    Book = apps.get_model('api', 'Book')
+    BookCounter = apps.get_model('api', 'BookCounter')
+    db = schema_editor.connection.alias
+    books = Book.objects.using(db).order_by()
+    rows = []
+    for dimension, column in (('author', 'author_id'), ('year', 'publication_year')):
+        for key, count in books.values(column).annotate(n=Count('pk')).values_list(column, 'n'):
+            rows.append(BookCounter(dimension=dimension, key=key, count=count))
+    BookCounter.objects.using(db).bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('author', 'Author'), ('year', 'Publication year')], max_length=16)),
+                ('key', models.BigIntegerField()),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'key'), name='api_bookcounter_dimension_key_uniq')],
+            },
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
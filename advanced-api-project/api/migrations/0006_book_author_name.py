@@ -0,0 +1,90 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+# نفس triggers الـ FTS بتاعة 0004 (نسخة ثابتة، من غير import من الـ app)
+CREATE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER api_book_fts_ai AFTER INSERT ON api_book BEGIN
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_au AFTER UPDATE OF title, author_id ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+        INSERT INTO api_book_fts(rowid, title, author_name)
+        VALUES (new.id, new.title, (SELECT name FROM api_author WHERE id = new.author_id));
+    END
+    """,
+    """
+    CREATE TRIGGER api_book_fts_ad AFTER DELETE ON api_book BEGIN
+        DELETE FROM api_book_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER api_author_fts_au AFTER UPDATE OF name ON api_author BEGIN
+        UPDATE api_book_fts SET author_name = new.name
+        WHERE rowid IN (SELECT id FROM api_book WHERE author_id = new.id);
+    END
+    """,
+]
+
+DROP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS api_author_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ad",
+    "DROP TRIGGER IF EXISTS api_book_fts_au",
+    "DROP TRIGGER IF EXISTS api_book_fts_ai",
+]
+
+
+def drop_fts_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def create_fts_triggers(apps, schema_editor):
+    # مفيش جدول FTS (مش SQLite أو FTS5 مش متاح) = مفيش triggers
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if 'api_book_fts' not in connection.introspection.table_names(cursor):
+            return
+    for sql in CREATE_TRIGGERS_SQL:
+        schema_editor.execute(sql)
+
+
+def fill_author_names(apps, schema_editor):
+    # UPDATE واحدة بـ subquery (نفس backfill_author_names بالـ historical models)
+    Author = apps.get_model('api', 'Author')
+    Book = apps.get_model('api', 'Book')
+    db = schema_editor.connection.alias
+    Book.objects.using(db).update(
+        author_name=Subquery(Author.objects.using(db).filter(pk=OuterRef('author_id')).values('name')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_book_counters'),
+    ]
+
+    operations = [
+        # SQLite بيعمل remake لـ api_book هنا، فلازم نشيل triggers الـ FTS ونرجعها
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.AddField(
+            model_name='book',
+            name='author_name',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author_name', 'title'], name='api_book_author_name_title_idx'),
+        ),
+        migrations.RunPython(fill_author_names, migrations.RunPython.noop),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete'), ('compacted', 'Compacted')], max_length=16)),
+                ('data', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'object_id', 'seq'], name='api_change_object_seq_idx'), models.Index(condition=models.Q(('op', 'compacted')), fields=['object_id'], name='api_change_compacted_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,35 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.utils import timezone
+
+# AtomicWriteMixin:
+# الـ signals بتكتب حاجات تانية مع الصف (counters، الـ change log في api/changes.py)،
+# فبنلف الكتابة في transaction عشان كله يتعمل commit مع بعض
+class AtomicWriteMixin:
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            return super().delete(*args, **kwargs)
+
 
 # Author Model:
 # يمثل كاتب يمكن أن يكون له أكثر من كتاب (one-to-many)
-class Author(models.Model):
+class Author(AtomicWriteMixin, models.Model):
     name = models.CharField(max_length=255)
+    # version column للـ ETag / Last-Modified
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # فلترة author__name في BookListView
+        indexes = [
+            models.Index(fields=['name'], name='api_author_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -11,12 +37,156 @@ class Author(models.Model):
 
 # Book Model:
 # يمثل كتاب مرتبط بكاتب واحد
-class Book(models.Model):
+class Book(AtomicWriteMixin, models.Model):
     title = models.CharField(max_length=255)
     publication_year = models.IntegerField()
     # علاقة One-to-Many: كل كتاب مرتبط بكاتب واحد
     author = models.ForeignKey(Author, related_name="books", on_delete=models.CASCADE)
+    # نسخة من author.name (فلترة / بحث من غير join)، الـ signals بتحدثها (api/denormalize.py)
+    author_name = models.CharField(max_length=255, default='', editable=False)
+    # version column للـ ETag / Last-Modified (bulk_update لازم يحدثه بإيده)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # Indexes مختارة من الفلاتر (BookFilterSet) و ordering_fields بتاعة BookListView
+        # (الترتيب الافتراضي title، و id هو الـ tie-breaker في الـ keyset pagination)
+        indexes = [
+            models.Index(fields=['title', 'id'], name='api_book_title_id_idx'),
+            models.Index(fields=['publication_year', 'title'], name='api_book_year_title_idx'),
+            models.Index(fields=['publication_year', 'id'], name='api_book_year_id_idx'),
+            models.Index(fields=['author', 'title'], name='api_book_author_title_idx'),
+            models.Index(fields=['author_name', 'title'], name='api_book_author_name_title_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.publication_year})"
- 
\ No newline at end of file
+
+
+# BookCounter:
+# عدد الكتب لكل كاتب / لكل سنة، متحدث أول بأول بدل GROUP BY في كل request
+# صف بـ count = 0 بيتمسح، فالجدول دايماً = ناتج الـ GROUP BY
+class BookCounter(models.Model):
+    AUTHOR = 'author'
+    YEAR = 'year'
+    DIMENSIONS = [(AUTHOR, 'Author'), (YEAR, 'Publication year')]
+
+    dimension = models.CharField(max_length=16, choices=DIMENSIONS)
+    # author_id أو publication_year (من غير FK عشان حذف الكاتب مايكسرش الـ counter)
+    key = models.BigIntegerField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'key'], name='api_bookcounter_dimension_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}={self.key}: {self.count}"
+ 
+
+# Job:
+# شغل تقيل (حذف كاتب بكل كتبه، import كبير) بيتعمل في الخلفية بدل جوه الـ request
+# الـ workers (manage.py run_jobs) بياخدوا الـ jobs بـ lease، شوف api/jobs.py
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # مايتشغلش قبل الوقت ده (الـ retry بيأخره بـ backoff)
+    run_after = models.DateTimeField(default=timezone.now)
+    # الـ worker اللي ماسك الـ job ولحد امتى؛ لو مات الـ lease بيخلص و worker تاني ياخده
+    locked_by = models.CharField(max_length=128, blank=True, default='')
+    lease_until = models.DateTimeField(null=True, blank=True)
+    progress = models.BigIntegerField(default=0)
+    total = models.BigIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, related_name='+', on_delete=models.SET_NULL,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # الـ worker بيدور على status = queued AND run_after <= now
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='api_job_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+
+# ImportItem:
+# الـ items بتاعة import في الخلفية (Prefer: respond-async) بتتكتب هنا batch
+# batch وهي بتتقري من الـ request، والـ job بيشيل الـ upload id بس (api/bulk.py)
+class ImportItem(models.Model):
+    upload = models.UUIDField()
+    index = models.PositiveIntegerField()
+    data = models.JSONField(null=True, blank=True)
+    # سطر NDJSON مش JSON صالح (InvalidItem): الخطأ بدل الـ data
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'index'], name='api_importitem_upload_index_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.upload}[{self.index}]"
+
+
+# Change:
+# change log append-only لكل create / update / delete على Book و Author، بيتكتب
+# في نفس الـ transaction بتاعة الكتابة (api/changes.py). الـ consumers بيقروا
+# GET /api/changes/?since=<seq> بدل ما يعيدوا قراية الكتالوج كله
+class Change(models.Model):
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    # مش تغيير: الـ compaction شالت tombstones لحد seq = object_id
+    COMPACTED = 'compacted'
+    OPS = [(CREATE, 'Create'), (UPDATE, 'Update'), (DELETE, 'Delete'), (COMPACTED, 'Compacted')]
+
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=16)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=16, choices=OPS)
+    # الصف بعد التغيير (نفس حقول الـ API)، و None للـ delete
+    data = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # الـ compaction: هل فيه تغيير أحدث لنفس الـ object؟
+            models.Index(fields=['model', 'object_id', 'seq'], name='api_change_object_seq_idx'),
+            # الـ markers بس (صفوف قليلة جداً)، عشان الـ feed يعرف يرجع 410
+            models.Index(fields=['object_id'], condition=models.Q(op='compacted'),
+                         name='api_change_compacted_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.op} {self.model}:{self.object_id}"
+
+
+# CacheTagVersion:
+# versions الـ tags بتاعة كاش الـ responses (api/cache.py) لما مفيش cache مشترك:
+# الـ job worker وكل process بتكتب وتقرا نفس الصف، فالمسح بيوصل للكل
+class CacheTagVersion(models.Model):
+    key = models.CharField(max_length=255, primary_key=True)
+    version = models.CharField(max_length=32)
+
+    def __str__(self):
+        return f"{self.key}={self.version}"
@@ -0,0 +1,215 @@
+import base64
+import binascii
+import json
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# KeysetPagination:
+# ترقيم صفحات بالـ cursor (keyset) بدل OFFSET
+# كل صفحة = WHERE (ordering) > (آخر صف) LIMIT page_size => O(page) مهما كان العمق
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination that follows the view's OrderingFilter.
+
+    The cursor is an opaque base64 token holding the ordering and the key
+    values of the boundary row, so pages stay stable when rows are inserted.
+    The primary key is always appended as a tie-breaker, which keeps the
+    key unique even for columns with many duplicates (publication_year).
+
+    Pagination is opt-in: it only kicks in when the client sends
+    ``?cursor=`` or ``?page_size=``, so plain ``GET books/`` is unchanged.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """نفس paginate_queryset للـ async views (الصفوف بتيجي بالـ async ORM)"""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def page_queryset(self, queryset, request, view):
+        """الـ queryset المترتب والمفلتر بالـ cursor (page_size + 1 صف)، أو None لو مفيش pagination"""
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = bool(self.cursor and self.cursor['r'])
+
+        order_by = [self._flip(field) for field in self.ordering] if self.reverse else self.ordering
+        queryset = queryset.order_by(*order_by)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(order_by, self.cursor['p']))
+
+        # نجيب صف زيادة عشان نعرف فيه صفحة بعدها ولا لأ
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        self.page = rows
+        if self.reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Ordering from the view's OrderingFilter (``?ordering=`` or the view
+        default), with ``id`` appended so every row has a unique key.
+        """
+        ordering = []
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = list(backend().get_ordering(request, queryset, view) or [])
+                break
+        if not ordering:
+            ordering = list(queryset.query.order_by or [])
+
+        fields = [field.lstrip('-') for field in ordering]
+        if 'id' not in fields and 'pk' not in fields:
+            ordering.append('id')
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        # row ممكن يكون model instance أو dict (الـ compiled serializer)
+        get = (lambda name: row[name]) if isinstance(row, dict) else (lambda name: attrgetter(name)(row))
+        position = [get(field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8'))
+            if cursor['o'] != self.ordering or len(cursor['p']) != len(self.ordering):
+                raise ValueError
+            # الـ cursor جاي من الـ client: كل قيمة بنوع الحقل بتاعها قبل ما تدخل الـ filter
+            cursor['p'] = [
+                self._to_python(model, field.lstrip('-'), value) for field, value in zip(self.ordering, cursor['p'])
+            ]
+            cursor['r'] = int(cursor.get('r', 0))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    @staticmethod
+    def _to_python(model, name, value):
+        *path, last = name.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        field = model._meta.pk if last == 'pk' else model._meta.get_field(last)
+        if field.is_relation:
+            field = field.target_field
+        value = field.to_python(value)
+        if value is None and not field.null:
+            raise ValueError(name)
+        return value
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(order_by, position):
+        """
+        (a, b, c) > (x, y, z) مكتوبة كـ OR لكل مستوى:
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(order_by, position):
+            name = field.lstrip('-')
+            lookup = '__lt' if field.startswith('-') else '__gt'
+            condition |= equal & Q(**{name + lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
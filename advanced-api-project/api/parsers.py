@@ -0,0 +1,38 @@
+import codecs
+import json
+from collections import namedtuple
+
+from rest_framework.parsers import BaseParser
+
+# سطر NDJSON مش JSON صالح: بنرجعه كـ item فيه الخطأ بدل ما نوقف الـ batch كله
+InvalidItem = namedtuple('InvalidItem', ['error'])
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON (one object per line).
+
+    Returns a lazy iterator over the request stream, so a large import is
+    never held in memory as a whole. Blank lines are skipped; a line that is
+    not valid JSON yields an ``InvalidItem`` instead of failing the request.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8')
+        return self._iter_items(stream, encoding)
+
+    @staticmethod
+    def _iter_items(stream, encoding):
+        if stream is None:
+            return
+        decoder = codecs.getincrementaldecoder(encoding)()
+        for raw in iter(stream.readline, b''):
+            line = decoder.decode(raw).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield InvalidItem(f'Invalid JSON: {exc}')
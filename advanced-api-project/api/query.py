@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+# Query planner:
+# بيقرا الحقول المتداخلة (nested) في الـ serializer ويطبق
+# select_related / prefetch_related تلقائياً عشان نتجنب N+1
+@dataclass(frozen=True)
+class QueryPlan:
+    select_related: tuple = ()
+    # (lookup, child serializer class)
+    prefetch: tuple = ()
+    # None = مش هنحدد الأعمدة (مثلاً فيه SerializerMethodField)
+    only: tuple = None
+
+
+def _concrete_attname(model, source):
+    try:
+        model_field = model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+    if getattr(model_field, 'concrete', False) and not model_field.many_to_many:
+        return model_field.attname
+    return None
+
+
+@lru_cache(maxsize=None)
+def build_plan(serializer_class):
+    """
+    Build a QueryPlan for a ModelSerializer class:
+      - nested single serializer on a FK  -> select_related
+      - nested many=True serializer       -> Prefetch with only the serialized columns
+      - plain fields                      -> column list for .only()
+    """
+    model = serializer_class.Meta.model
+    select_related, prefetch, only = [], [], [model._meta.pk.attname]
+    restrict = True
+
+    for serializer_field in serializer_class().fields.values():
+        source = serializer_field.source
+        if source == '*' or isinstance(serializer_field, serializers.SerializerMethodField):
+            restrict = False
+            continue
+        source = source.split('.')[0]
+
+        if isinstance(serializer_field, serializers.ListSerializer) and \
+                isinstance(serializer_field.child, serializers.ModelSerializer):
+            prefetch.append((source, type(serializer_field.child)))
+            continue
+
+        if isinstance(serializer_field, serializers.ModelSerializer):
+            child_plan = build_plan(type(serializer_field))
+            select_related.append(source)
+            select_related.extend(f'{source}__{lookup}' for lookup in child_plan.select_related)
+            prefetch.extend((f'{source}__{lookup}', child) for lookup, child in child_plan.prefetch)
+            attname = _concrete_attname(model, source)
+            if attname:
+                only.append(attname)
+            if child_plan.only is None:
+                restrict = False
+            else:
+                only.extend(f'{source}__{column}' for column in child_plan.only)
+            continue
+
+        attname = _concrete_attname(model, source)
+        if attname:
+            only.append(attname)
+        elif not isinstance(serializer_field, serializers.ManyRelatedField):
+            # property أو attribute مش عمود -> منقدرش نستخدم only بأمان
+            restrict = False
+
+    return QueryPlan(
+        select_related=tuple(dict.fromkeys(select_related)),
+        prefetch=tuple(prefetch),
+        only=tuple(dict.fromkeys(only)) if restrict else None,
+    )
+
+
+def plan_queryset(queryset, serializer_class, extra_only=()):
+    """Apply the serializer's QueryPlan to ``queryset``."""
+    plan = build_plan(serializer_class)
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    for lookup, child_class in plan.prefetch:
+        queryset = queryset.prefetch_related(
+            Prefetch(lookup, queryset=_child_queryset(queryset.model, lookup, child_class))
+        )
+    if plan.only is not None:
+        queryset = queryset.only(*plan.only, *extra_only)
+    return queryset
+
+
+def _child_queryset(model, lookup, child_class):
+    # الـ prefetch محتاج عمود الـ FK اللي راجع للأب عشان يربط النتائج
+    for part in lookup.split('__'):
+        relation = model._meta.get_field(part)
+        model = relation.related_model
+    extra_only = ()
+    if relation.one_to_many:
+        extra_only = (relation.field.attname,)
+    return plan_queryset(child_class.Meta.model._default_manager.all(), child_class, extra_only)
+
+
+class QueryPlanMixin:
+    """
+    View mixin: يطبق الـ QueryPlan الخاص بالـ serializer على get_queryset()
+    """
+
+    def get_queryset(self):
+        return plan_queryset(super().get_queryset(), self.get_serializer_class())
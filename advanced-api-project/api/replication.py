@@ -0,0 +1,55 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .routers import _config, replica_aliases
+
+
+# SQLiteReplicator:
+# بديل محلي للـ streaming replication: بعد كل commit على الـ primary بننسخ
+# ملف الـ SQLite كله على كل replica بـ backup API بتاع sqlite3
+# (REPLICATION_LAG > 0 بيأخر النسخ عشان نجرب الـ stickiness)
+class SQLiteReplicator:
+    """Copies the primary SQLite database onto every replica alias."""
+
+    def __init__(self, primary=DEFAULT_DB_ALIAS):
+        self.primary = primary
+        self.lock = threading.Lock()
+
+    def enabled(self):
+        config = _config()
+        return bool(config['SQLITE_REPLICATION'] and config['ALIASES']) and \
+            connections[self.primary].vendor == 'sqlite'
+
+    def replicate(self, aliases=None):
+        """Copy the primary onto ``aliases`` (default: all replicas) now."""
+        aliases = replica_aliases() if aliases is None else aliases
+        source = connections[self.primary]
+        with self.lock:
+            source.ensure_connection()
+            for alias in aliases:
+                target = connections[alias]
+                if target.settings_dict['NAME'] == source.settings_dict['NAME']:
+                    # TEST MIRROR: نفس الداتابيز
+                    continue
+                target.ensure_connection()
+                source.connection.backup(target.connection)
+
+    def schedule(self):
+        """Replicate after the configured lag (on_commit callback)."""
+        lag = _config()['REPLICATION_LAG']
+        if not lag:
+            self.replicate()
+            return
+        timer = threading.Timer(lag, self._replicate_in_thread)
+        timer.daemon = True
+        timer.start()
+
+    def _replicate_in_thread(self):
+        try:
+            self.replicate()
+        finally:
+            connections.close_all()
+
+
+replicator = SQLiteReplicator()
@@ -0,0 +1,167 @@
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+
+DEFAULTS = {
+    # aliases من DATABASES للقراءة (فاضية = كل حاجة على default)
+    'ALIASES': [],
+    # read-your-writes: بعد ما الـ client يكتب، قراياته تروح الـ primary للمدة دي
+    'STICKY_SECONDS': 5,
+    'COOKIE_NAME': 'pin_primary',
+    # replication stand-in للـ SQLite (api/replication.py)
+    'SQLITE_REPLICATION': True,
+    'REPLICATION_LAG': 0,
+}
+ROUTED_APPS = {'api'}
+
+# None = برة request (jobs، shell، commands)، غير كده dict:
+# {'replica': view طلب replica، 'pinned': لازم primary، 'wrote': كتب في الـ request ده}
+_state = ContextVar('replica_pinning', default=None)
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'API_READ_REPLICAS', {})}
+
+
+def replica_aliases():
+    return list(_config()['ALIASES'])
+
+
+def allow_replica_reads():
+    """
+    Opt the current request into replica reads (ReplicaReadMixin calls it).
+    No-op outside ReplicaPinningMiddleware, so everything else reads the primary.
+    """
+    state = _state.get()
+    if state is not None:
+        state['replica'] = True
+
+
+def pinned_to_primary():
+    """True while the current request reads the primary for read-your-writes."""
+    state = _state.get()
+    return state is not None and state['pinned']
+
+
+# PrimaryReplicaRouter:
+# كل حاجة على default، إلا قراءات الـ views اللي طلبت replica (ReplicaReadMixin):
+# list / detail بتاعة الكتب. signals، counters، admin، jobs كلها primary
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # related objects من نفس الداتابيز اللي الـ instance جه منها
+            return instance._state.db
+        state = _state.get()
+        aliases = replica_aliases()
+        if not aliases or state is None or not state['replica'] or state['pinned']:
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        state = _state.get()
+        if state is not None:
+            # read-your-writes: باقي الـ request + cookie للي بعده (الـ middleware)
+            state['pinned'] = state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    For read-only views that may be served from a replica (BookListView,
+    BookDetailView): the request's reads go to a replica unless the client
+    is pinned to the primary by a recent write.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        allow_replica_reads()
+        super().initial(request, *args, **kwargs)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Holds the routing state of the request (only ReplicaReadMixin views
+    use a replica) and gives read-your-writes across requests: after a
+    request that wrote to the primary, the response carries a short-lived
+    signed cookie, and reads from that client go to the primary until it
+    expires. Unsafe methods (POST/PUT/PATCH/DELETE) are pinned for the
+    whole request so their precondition / validation reads never see a
+    lagging replica. Sync and async: under ASGI it doesn't push the
+    request through a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = _config()
+        if not config['ALIASES']:
+            return self.get_response(request)
+        state = self.request_state(request, config)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(response, state, config)
+
+    async def __acall__(self, request):
+        config = _config()
+        if not config['ALIASES']:
+            return await self.get_response(request)
+        state = self.request_state(request, config)
+        # sync_to_async بينسخ الـ context، والـ dict نفسه مشترك فالكتابة بتبان هنا
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.pin(response, state, config)
+
+    def request_state(self, request, config):
+        return {'replica': False,
+                'pinned': self.is_sticky(request, config) or request.method not in ('GET', 'HEAD', 'OPTIONS'),
+                'wrote': False}
+
+    @staticmethod
+    def pin(response, state, config):
+        if state['wrote'] and config['STICKY_SECONDS']:
+            until = time.time() + config['STICKY_SECONDS']
+            response.set_cookie(
+                config['COOKIE_NAME'], signing.dumps(until, salt=config['COOKIE_NAME']),
+                max_age=config['STICKY_SECONDS'], httponly=True, samesite='Lax',
+            )
+        return response
+
+    @staticmethod
+    def is_sticky(request, config):
+        value = request.COOKIES.get(config['COOKIE_NAME'])
+        if not value:
+            return False
+        try:
+            return signing.loads(value, salt=config['COOKIE_NAME']) > time.time()
+        except (signing.BadSignature, TypeError):
+            return False
@@ -0,0 +1,245 @@
+import json
+import math
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, FloatField, Value, When
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .denormalize import author_name_field
+from .models import Book
+
+FTS_TABLE = 'api_book_fts'
+TITLE_WEIGHT = 2.0
+AUTHOR_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """نفس فكرة unicode61 في FTS5: lowercase + شيل التشكيل + كلمات \\w+"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text.lower())
+
+
+# SQLiteFTSBackend:
+# inverted index جوه SQLite (FTS5) بيتحدث بالـ triggers (شوف migration 0002)
+class SQLiteFTSBackend:
+    """Ranked prefix search over the ``api_book_fts`` FTS5 table."""
+    _available = {}
+
+    @classmethod
+    def is_available(cls, alias):
+        # بنشيك مرة واحدة لكل alias
+        if alias not in cls._available:
+            connection = connections[alias]
+            if connection.vendor != 'sqlite':
+                cls._available[alias] = False
+            else:
+                with connection.cursor() as cursor:
+                    cls._available[alias] = FTS_TABLE in connection.introspection.table_names(cursor)
+        return cls._available[alias]
+
+    @staticmethod
+    def build_match(terms):
+        # كل كلمة prefix ("leg"*) وكلها AND
+        tokens = [token for term in terms for token in tokenize(term)]
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, terms):
+        match = self.build_match(terms)
+        if not match:
+            return queryset
+        table = queryset.model._meta.db_table
+        # join واحد مع جدول الـ FTS على rowid = id: الـ MATCH بيمشي مرة واحدة وbm25
+        # بيتحسب للصف اللي اتطابق، مش subquery لكل كتاب (extra() عشان الـ ORM
+        # مايعرفش يعمل join مع virtual table)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = "{table}"."id"', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+        ).annotate(search_rank=RawSQL(
+            f'bm25({FTS_TABLE}, %s, %s)', [TITLE_WEIGHT, AUTHOR_WEIGHT], output_field=FloatField(),
+        ))
+
+
+# InMemoryIndex:
+# fallback بايثون خالص: inverted index + vocabulary مترتبة للـ prefix
+# بيتحدث من الـ signals (api/signals.py)
+class InMemoryIndex:
+    """Pure-Python inverted index of Book title and author name tokens."""
+    # الأحسن N بس بياخدوا rank (CASE بآلاف الـ WHENs تقيلة)، الباقي بعدهم بالـ pk
+    ranked_results = 1000
+    # أكتر من كده من الـ ids بيتبعتوا لـ SQLite كـ JSON parameter واحد
+    max_inline_ids = 500
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.built = False
+        self.docs = {}          # book_id -> (title_tokens, author_tokens, author_id)
+        self.author_books = {}  # author_id -> {book_id}
+        self.postings = {}      # token -> {book_id: weight}
+        self.vocabulary = []    # sorted tokens (for prefix lookups)
+
+    def build(self, queryset=None):
+        queryset = queryset if queryset is not None else Book.objects.all()
+        rows = queryset.values_list('id', 'title', 'author_id', author_name_field()).iterator(chunk_size=2000)
+        with self.lock:
+            self.docs, self.author_books, self.postings, self.vocabulary = {}, {}, {}, []
+            for book_id, title, author_id, author_name in rows:
+                self._add(book_id, title, author_id, author_name)
+            self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            self.build()
+
+    def update_book(self, book_id, title, author_id, author_name):
+        with self.lock:
+            if not self.built:
+                return
+            self._remove(book_id)
+            self._add(book_id, title, author_id, author_name)
+
+    def remove_book(self, book_id):
+        with self.lock:
+            if self.built:
+                self._remove(book_id)
+
+    def rename_author(self, author_id, author_name):
+        with self.lock:
+            if not self.built:
+                return
+            author_tokens = tokenize(author_name)
+            for book_id in list(self.author_books.get(author_id, ())):
+                title_tokens = self.docs[book_id][0]
+                self._remove(book_id)
+                self._add_tokens(book_id, title_tokens, author_tokens, author_id)
+
+    def search(self, terms):
+        """Return ``[(book_id, score), ...]`` best first; every term must prefix-match."""
+        tokens = [token for term in terms for token in tokenize(term)]
+        if not tokens:
+            return None
+        with self.lock:
+            self.ensure_built()
+            total = max(len(self.docs), 1)
+            scores = None
+            for token in tokens:
+                matched = {}
+                for vocab_token in self._prefixed(token):
+                    posting = self.postings[vocab_token]
+                    idf = math.log(1 + total / len(posting))
+                    for book_id, weight in posting.items():
+                        matched[book_id] = matched.get(book_id, 0.0) + weight * idf
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {book_id: scores[book_id] + score
+                              for book_id, score in matched.items() if book_id in scores}
+                if not scores:
+                    return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def filter(self, queryset, terms):
+        """Every match (like FTS); only the best ``ranked_results`` are ordered by score."""
+        ranked = self.search(terms)
+        if ranked is None:
+            return queryset
+        ids = [book_id for book_id, _ in ranked]
+        if len(ids) > self.max_inline_ids and connections[queryset.db].vendor == 'sqlite':
+            # SQLite عنده حد لعدد الـ parameters في الـ statement
+            ids = RawSQL('SELECT value FROM json_each(%s)', [json.dumps(ids)])
+        # rank أصغر = أحسن (زي bm25)
+        return queryset.filter(pk__in=ids).annotate(
+            search_rank=Case(
+                *[When(pk=book_id, then=Value(-score)) for book_id, score in ranked[:self.ranked_results]],
+                default=Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+    def _prefixed(self, prefix):
+        start = bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _add(self, book_id, title, author_id, author_name):
+        self._add_tokens(book_id, tokenize(title), tokenize(author_name), author_id)
+
+    def _add_tokens(self, book_id, title_tokens, author_tokens, author_id):
+        self.docs[book_id] = (title_tokens, author_tokens, author_id)
+        self.author_books.setdefault(author_id, set()).add(book_id)
+        for tokens, weight in ((title_tokens, TITLE_WEIGHT), (author_tokens, AUTHOR_WEIGHT)):
+            for token in tokens:
+                posting = self.postings.get(token)
+                if posting is None:
+                    posting = self.postings[token] = {}
+                    insort(self.vocabulary, token)
+                posting[book_id] = posting.get(book_id, 0.0) + weight
+
+    def _remove(self, book_id):
+        doc = self.docs.pop(book_id, None)
+        if doc is None:
+            return
+        books = self.author_books.get(doc[2])
+        if books is not None:
+            books.discard(book_id)
+            if not books:
+                del self.author_books[doc[2]]
+        for token in set(doc[0]) | set(doc[1]):
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(book_id, None)
+            if not posting:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+
+memory_index = InMemoryIndex()
+
+
+def get_search_backend(alias='default'):
+    """
+    ``API_SEARCH_BACKEND`` setting:
+      - 'auto' (default): FTS5 لو موجود، غير كده الـ index اللي في الذاكرة
+      - 'fts' / 'memory': اختيار backend بعينه
+    """
+    backend = getattr(settings, 'API_SEARCH_BACKEND', 'auto')
+    if backend == 'memory':
+        return memory_index
+    if backend == 'fts' or SQLiteFTSBackend.is_available(alias):
+        return SQLiteFTSBackend()
+    return memory_index
+
+
+# BookSearchFilter:
+# نفس ?search= بتاع SearchFilter بس من الـ index بدل icontains + join
+class BookSearchFilter(filters.SearchFilter):
+    """
+    Same ``?search=`` parameter as SearchFilter, answered by the search index.
+
+    Terms are tokenized and prefix-matched (all terms must match). Unless the
+    client asked for ``?ordering=``, results are ordered by relevance. Must
+    come after OrderingFilter in ``filter_backends`` for that to take effect.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        queryset = get_search_backend(queryset.db).filter(queryset, terms)
+        if 'search_rank' in queryset.query.annotations and \
+                not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('search_rank', 'pk')
+        return queryset
@@ -1,11 +1,13 @@
 from rest_framework import serializers
-from .models import Author, Book
+from .models import Author, Book, Job
 import datetime
 
+from alx_common.serializers import TimedSerializerMixin
+
 
 # BookSerializer:
 # يقوم بتحويل بيانات الكتاب إلى JSON والعكس
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
@@ -20,10 +22,20 @@ class BookSerializer(serializers.ModelSerializer):
 
 # AuthorSerializer:
 # يقوم بتحويل بيانات الكاتب إلى JSON مع تضمين الكتب بشكل متداخل (nested)
-class AuthorSerializer(serializers.ModelSerializer):
+class AuthorSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Nested serializer لعرض الكتب الخاصة بالكاتب
     books = BookSerializer(many=True, read_only=True)
 
     class Meta:
         model = Author
         fields = ['id', 'name', 'books']
+
+
+# JobSerializer:
+# حالة الـ background job (من غير الـ payload، ممكن يبقى import كبير)
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'status', 'attempts', 'max_attempts', 'progress', 'total',
+                  'result', 'error', 'created_at', 'updated_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,247 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from alx_common.broker import broker
+
+from .cache import book_tags, inflight, response_cache
+from .changes import record_changes, snapshot
+from .counters import apply_deltas, book_deltas
+from .models import Author, Book, Change
+from .replication import replicator
+from .search import memory_index
+
+# bulk_create / bulk_update مش بيبعتوا post_save، فالمسارات الـ bulk بتبعت ده
+# جوه نفس الـ transaction: books_bulk_written.send(sender=Book, created=[...], updated=[...], using=alias)
+books_bulk_written = Signal()
+# والحذف بالـ chunks (bulk_delete_books) بيمسح من غير post_delete لكل صف:
+# books_bulk_deleted.send(sender=Book, deleted=[...], using=alias) (كتب فيها id / author_id / publication_year)
+books_bulk_deleted = Signal()
+
+
+# Signals:
+# تحديث الـ search index اللي في الذاكرة بعد الـ commit
+# (جدول FTS5 بيتحدث لوحده بالـ triggers)
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, **kwargs):
+    if memory_index.built:
+        row = (instance.pk, instance.title, instance.author_id, instance.author_name)
+        transaction.on_commit(lambda: memory_index.update_book(*row))
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    if memory_index.built:
+        book_id = instance.pk
+        transaction.on_commit(lambda: memory_index.remove_book(book_id))
+
+
+@receiver(post_save, sender=Author)
+def reindex_author(sender, instance, created, **kwargs):
+    if memory_index.built and not created:
+        author_id, name = instance.pk, instance.name
+        transaction.on_commit(lambda: memory_index.rename_author(author_id, name))
+
+
+@receiver(books_bulk_written, sender=Book)
+def index_bulk_books(sender, created, updated, **kwargs):
+    if memory_index.built:
+        rows = [(book.pk, book.title, book.author_id, book.author_name) for book in [*created, *updated]]
+        transaction.on_commit(lambda: [memory_index.update_book(*row) for row in rows])
+
+
+@receiver(books_bulk_deleted, sender=Book)
+def unindex_bulk_books(sender, deleted, **kwargs):
+    if memory_index.built:
+        ids = [book.pk for book in deleted]
+        transaction.on_commit(lambda: [memory_index.remove_book(book_id) for book_id in ids])
+
+
+# Original row:
+# القيم القديمة (author_id، publication_year، author_name) بتتقري من الـ DB جوه
+# transaction الكتابة نفسها بـ SELECT ... FOR UPDATE (SQLite: BEGIN IMMEDIATE)،
+# مش من الـ instance اللي في الذاكرة، فكاتبين على نفس الصف مايطبقوش delta من
+# نفس القيمة القديمة. الـ receivers التانية بتقرا _original_keys() بس ومحدش
+# بيعدلها، فترتيب تسجيلهم مش فارق
+def _original_keys(book):
+    """(author_id, publication_year) the row had before this write, or None (new row)."""
+    return getattr(book, '_db_keys', None)
+
+
+def _lock_original(sender, book, using):
+    if book.pk is None:
+        return None
+    return sender._base_manager.using(using).select_for_update().filter(pk=book.pk).values_list(
+        'author_id', 'publication_year', 'author_name').first()
+
+
+@receiver(pre_save, sender=Book)
+def load_original_row(sender, instance, using, **kwargs):
+    row = _lock_original(sender, instance, using)
+    instance._db_keys = row[:2] if row is not None else None
+    # Denormalized Book.author_name (api/denormalize.py): نفس الكاتب = الاسم اللي
+    # في الـ DB (rename_author_books ممكن يكون غيره بعد ما الـ instance اتحمل)
+    if instance.author_id is None:
+        return
+    if row is not None and row[0] == instance.author_id:
+        instance.author_name = row[2]
+    elif sender.author.is_cached(instance):
+        instance.author_name = instance.author.name
+    else:
+        instance.author_name = Author._base_manager.using(using).filter(
+            pk=instance.author_id).values_list('name', flat=True).first() or ''
+
+
+@receiver(pre_delete, sender=Book)
+def load_deleted_row(sender, instance, using, **kwargs):
+    # Collector.delete بيبعت pre_delete جوه الـ transaction بتاعة الـ DELETE
+    row = _lock_original(sender, instance, using)
+    instance._db_keys = row[:2] if row is not None else None
+
+
+# Materialized counters (api/counters.py):
+# بتتحدث جوه نفس الـ transaction بتاعة الكتابة
+@receiver(post_save, sender=Book)
+def count_book(sender, instance, created, using, **kwargs):
+    new = (instance.author_id, instance.publication_year)
+    if created:
+        apply_deltas(book_deltas(created=[new]), using)
+    elif _original_keys(instance) is not None:
+        apply_deltas(book_deltas(changed=[(_original_keys(instance), new)]), using)
+
+
+@receiver(post_delete, sender=Book)
+def uncount_book(sender, instance, using, **kwargs):
+    original = _original_keys(instance)
+    if original is not None:
+        apply_deltas(book_deltas(deleted=[original]), using)
+
+
+@receiver(books_bulk_written, sender=Book)
+def count_bulk_books(sender, created, updated, using=DEFAULT_DB_ALIAS, **kwargs):
+    # bulk_update_books بيحط _db_keys من SELECT ... FOR UPDATE جوه الـ transaction
+    apply_deltas(book_deltas(
+        created=[(book.author_id, book.publication_year) for book in created],
+        changed=[(_original_keys(book), (book.author_id, book.publication_year))
+                 for book in updated if _original_keys(book) is not None],
+    ), using)
+
+
+@receiver(books_bulk_deleted, sender=Book)
+def uncount_bulk_books(sender, deleted, using=DEFAULT_DB_ALIAS, **kwargs):
+    apply_deltas(book_deltas(deleted=[(book.author_id, book.publication_year) for book in deleted]), using)
+
+
+@receiver(post_save, sender=Author)
+def rename_author_books(sender, instance, created, using, **kwargs):
+    # UPDATE واحدة لكل كتب الكاتب (جوه نفس الـ transaction بتاعة الـ save)،
+    # و updated_at عشان الـ ETag بتاع list بـ ?author__name= يتغير
+    if not created:
+        Book._base_manager.using(using).filter(author_id=instance.pk).exclude(
+            author_name=instance.name).update(author_name=instance.name, updated_at=timezone.now())
+
+
+# Change feed (api/changes.py):
+# صف في الـ change log جوه نفس الـ transaction بتاعة الكتابة
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Author)
+def log_save(sender, instance, created, using, **kwargs):
+    record_changes([instance], Change.CREATE if created else Change.UPDATE, using)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Author)
+def log_delete(sender, instance, using, **kwargs):
+    record_changes([instance], Change.DELETE, using)
+
+
+@receiver(books_bulk_written, sender=Book)
+def log_bulk_books(sender, created, updated, using=DEFAULT_DB_ALIAS, **kwargs):
+    record_changes(created, Change.CREATE, using)
+    record_changes(updated, Change.UPDATE, using)
+
+
+@receiver(books_bulk_deleted, sender=Book)
+def log_deleted_books(sender, deleted, using=DEFAULT_DB_ALIAS, **kwargs):
+    record_changes(deleted, Change.DELETE, using)
+
+
+# Live feed (GET /api/books/live/, SSE):
+# الكتب الجديدة بتتنشر على الـ broker بعد الـ commit بس
+def _publish_created(books):
+    events = [snapshot(book) for book in books]
+    transaction.on_commit(lambda: [broker.publish('book.created', data) for data in events])
+
+
+@receiver(post_save, sender=Book)
+def publish_book(sender, instance, created, **kwargs):
+    if created:
+        _publish_created([instance])
+
+
+@receiver(books_bulk_written, sender=Book)
+def publish_bulk_books(sender, created, **kwargs):
+    if created:
+        _publish_created(created)
+
+
+# Response cache:
+# بنمسح الـ tags فوراً وكمان بعد الـ commit (عشان قراءة متزامنة قبل الـ commit
+# ماترجعش تملا الكاش بالقيم القديمة)
+def _invalidate(tags):
+    response_cache.invalidate_tags(tags)
+    transaction.on_commit(lambda: response_cache.invalidate_tags(tags))
+    # requests بعد الكتابة مايستنوش نتيجة query بدأت قبلها
+    inflight.forget()
+    transaction.on_commit(inflight.forget)
+
+
+def _book_change_tags(book):
+    tags = book_tags(book.publication_year, book.author_id, book.pk)
+    original = _original_keys(book)
+    if original is not None:
+        tags |= book_tags(original[1], original[0], book.pk)
+    return tags
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book(sender, instance, **kwargs):
+    _invalidate(_book_change_tags(instance))
+
+
+@receiver(books_bulk_written, sender=Book)
+def invalidate_bulk_books(sender, created, updated, **kwargs):
+    tags = set()
+    for book in [*created, *updated]:
+        tags |= _book_change_tags(book)
+    _invalidate(tags)
+
+
+@receiver(books_bulk_deleted, sender=Book)
+def invalidate_deleted_books(sender, deleted, **kwargs):
+    tags = set()
+    for book in deleted:
+        tags |= _book_change_tags(book)
+    _invalidate(tags)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author(sender, instance, **kwargs):
+    # اسم الكاتب بيأثر بس على نتائج search / author__name
+    _invalidate({'author-names', f'author:{instance.pk}'})
+
+
+# Replication stand-in (SQLite):
+# الـ replicas بتتحدث بعد الـ commit (شوف api/replication.py)
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+@receiver(books_bulk_written, sender=Book)
+@receiver(books_bulk_deleted, sender=Book)
+def replicate_after_commit(sender, **kwargs):
+    if replicator.enabled():
+        transaction.on_commit(replicator.schedule)
@@ -1,15 +1,37 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth.models import User
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from .models import Author, Book
+from alx_common.metrics import registry
+
+from .bulk import bulk_create_books
+from . import conditional
+from .cache import response_cache
+from .jobs import Worker
+from .models import Author, Book, ImportItem, Job
+from .replication import replicator
+from .testing import QueryCountAssertionsMixin
 
 
 class BookAPITestCase(TestCase):
     def setUp(self):
+        response_cache.clear()
         self.user = User.objects.create_user(username="tester", password="pass1234")
 
         self.client = APIClient()  # default unauthenticated client
@@ -69,6 +91,179 @@ class BookAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(any('Legend' in item['title'] for item in response.data))
 
+    def test_search_prefix_and_author_name(self):
+        response = self.client.get(self.list_url, {'search': 'leg'})
+        self.assertEqual([item['title'] for item in response.data], ["Legend of X"])
+
+        response = self.client.get(self.list_url, {'search': 'author two'})
+        self.assertEqual([item['title'] for item in response.data], ["Another Tale"])
+
+    def test_search_sees_author_rename(self):
+        self.author2.name = "Renamed Writer"
+        self.author2.save()
+        response = self.client.get(self.list_url, {'search': 'renamed'})
+        self.assertEqual([item['title'] for item in response.data], ["Another Tale"])
+
+    def test_export_ndjson_streams_filtered_rows(self):
+        response = self.client.get(reverse('book-export'), {'format': 'ndjson', 'author': self.author1.pk})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(rows, [
+            {'id': self.book2.pk, 'title': "Legend of X", 'publication_year': 1993, 'author': self.author1.pk},
+            {'id': self.book1.pk, 'title': "Utopia", 'publication_year': 2008, 'author': self.author1.pk},
+        ])
+
+    def test_export_csv_with_ordering(self):
+        response = self.client.get(reverse('book-export'), {'ordering': '-publication_year'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title,publication_year,author')
+        self.assertEqual([line.split(',')[2] for line in lines[1:]], ['2015', '2008', '1993'])
+
+    def test_export_json_array_is_streamed_in_chunks(self):
+        with mock.patch('api.export.ROWS_PER_CHUNK', 2):
+            response = self.client.get(reverse('book-export'), {'format': 'json', 'ordering': 'title'})
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Type'], 'application/json; charset=utf-8')
+        # [ + chunk بتاع صفين + chunk بصف + ]
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual([row['title'] for row in json.loads(b''.join(chunks))], ["Another Tale", "Legend of X", "Utopia"])
+
+    def test_list_cache_hit_and_invalidation_on_update(self):
+        params = {'publication_year': 2008, 'ordering': 'title'}
+        self.assertEqual(self.client.get(self.list_url, params)['X-Cache'], 'MISS')
+        # نفس الـ params بترتيب مختلف = نفس الـ key
+        response = self.client.get(self.list_url + '?ordering=title&publication_year=2008')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        url = reverse('book-update', kwargs={'pk': self.book1.pk})
+        payload = {"title": "Utopia Cached", "publication_year": 2008, "author": self.author1.pk}
+        self.auth_client.put(url, data=payload, format='json')
+        response = self.client.get(self.list_url, params)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['title'], "Utopia Cached")
+
+    def test_list_cache_sees_year_change_and_delete(self):
+        params = {'publication_year': 1993}
+        self.assertEqual(len(self.client.get(self.list_url, params).data), 1)
+        # الكتاب اتنقل من سنة 2015 لـ 1993 -> لازم الـ list بتاعة 1993 تتمسح
+        url = reverse('book-update', kwargs={'pk': self.book3.pk})
+        self.auth_client.patch(url, data={"publication_year": 1993}, format='json')
+        self.assertEqual(len(self.client.get(self.list_url, params).data), 2)
+
+        self.auth_client.delete(reverse('book-delete', kwargs={'pk': self.book2.pk}))
+        self.assertEqual(len(self.client.get(self.list_url, params).data), 1)
+
+    def test_detail_cache_invalidated_on_update(self):
+        url = reverse('book-detail', kwargs={'pk': self.book1.pk})
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.auth_client.patch(reverse('book-update', kwargs={'pk': self.book1.pk}), data={"title": "New"}, format='json')
+        response = self.client.get(url)
+        self.assertEqual((response['X-Cache'], response.data['title']), ('MISS', "New"))
+
+    def test_conditional_get_on_list(self):
+        response = self.client.get(self.list_url, {'ordering': 'title'})
+        etag = response['ETag']
+        # الـ ETag من versions الـ tags (lookup واحد بالـ primary key)، مش من جدول الكتب
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, {'ordering': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, {'ordering': 'title'})
+        self.assertEqual((response['X-Cache'], response['ETag']), ('HIT', etag))
+
+        self.book3.delete()
+        response = self.client.get(self.list_url, {'ordering': 'title'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_conditional_get_on_detail(self):
+        url = reverse('book-detail', kwargs={'pk': self.book1.pk})
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_match_prevents_lost_update(self):
+        etag = self.client.get(reverse('book-detail', kwargs={'pk': self.book1.pk}))['ETag']
+        url = reverse('book-update', kwargs={'pk': self.book1.pk})
+        response = self.auth_client.patch(url, data={"title": "First"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # تاني client لسه معاه الـ ETag القديم
+        response = self.auth_client.patch(url, data={"title": "Second"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        delete_url = reverse('book-delete', kwargs={'pk': self.book1.pk})
+        response = self.auth_client.delete(delete_url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.book1.refresh_from_db()
+        self.assertEqual(self.book1.title, "First")
+
+    def test_if_match_check_and_write_share_a_transaction(self):
+        savepoints = {}
+        object_validators = conditional.object_validators
+
+        def locked_check(model, pk, lock=False):
+            if lock:
+                savepoints['check'] = list(connection.savepoint_ids)
+            return object_validators(model, pk, lock)
+
+        def on_save(sender, instance, **kwargs):
+            savepoints['save'] = list(connection.savepoint_ids)
+
+        etag = self.client.get(reverse('book-detail', kwargs={'pk': self.book1.pk}))['ETag']
+        post_save.connect(on_save, sender=Book)
+        self.addCleanup(post_save.disconnect, on_save, sender=Book)
+        baseline = list(connection.savepoint_ids)
+        with mock.patch.object(conditional, 'object_validators', locked_check):
+            response = self.auth_client.patch(reverse('book-update', kwargs={'pk': self.book1.pk}),
+                                              data={"title": "Locked"}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # الـ SELECT ... FOR UPDATE والـ save جوه نفس الـ atomic block (الـ lock لحد الـ commit)
+        self.assertGreater(len(savepoints['check']), len(baseline))
+        self.assertEqual(savepoints['save'][:len(savepoints['check'])], savepoints['check'])
+
+    def test_stats_from_counters(self):
+        url = reverse('book-stats')
+        response = self.client.get(url)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['by_author'][0], {'author': self.author1.pk, 'name': "Author One", 'count': 2})
+        self.assertEqual([row['publication_year'] for row in response.data['by_year']], [1993, 2008, 2015])
+
+        self.book1.delete()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['total'], 2)
+        self.assertEqual([row['count'] for row in response.data['by_author']], [1, 1])
+
+    def test_server_timing_counts_queries(self):
+        registry.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.list_url, {'ordering': 'title'})
+        timing = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'app'})
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing['db'])
+        series = registry.snapshot()['db_queries_per_request'][(('view', 'BookListView'),)]
+        self.assertEqual(series['sum'], len(ctx.captured_queries))
+
+    def test_filter_author_name_without_join(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.list_url, {'author__name': 'Author One'})
+        self.assertEqual({item['title'] for item in response.data}, {'Utopia', 'Legend of X'})
+        self.assertFalse([q for q in ctx.captured_queries if 'api_book' in q['sql'] and 'JOIN' in q['sql']])
+
+        # الكاتب اتغير اسمه: الفلتر بيشوف الاسم الجديد على طول
+        self.author1.name = 'Author Uno'
+        self.author1.save()
+        response = self.client.get(self.list_url, {'author__name': 'Author Uno'})
+        self.assertEqual(len(response.data), 2)
+        with override_settings(API_DENORMALIZED_AUTHOR_NAME=False):
+            response_cache.clear()
+            response = self.client.get(self.list_url, {'author__name': 'Author Uno'})
+        self.assertEqual(len(response.data), 2)
+
     def test_ordering_by_publication_year(self):
         response = self.client.get(self.list_url, {'ordering': '-publication_year'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -81,6 +276,57 @@ class BookAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('publication_year', response.data)
 
+    def test_bulk_create_reports_per_item_errors(self):
+        payload = [
+            {"title": "Bulk One", "publication_year": 2001, "author": self.author1.pk},
+            {"title": "Bulk Future", "publication_year": 3000, "author": self.author1.pk},
+            {"title": "Bulk Two", "publication_year": 2002, "author": 999999},
+            {"title": "Bulk Three", "publication_year": 2003, "author": self.author2.pk},
+        ]
+        response = self.auth_client.post(reverse('book-bulk-create') + '?batch_size=2', data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertIn('publication_year', response.data['errors'][0]['errors'])
+        self.assertTrue(Book.objects.filter(title="Bulk Three", author=self.author2).exists())
+
+    def test_bulk_create_ndjson_stream(self):
+        body = (
+            '{"title": "Line One", "publication_year": 2001, "author": %d}\n'
+            'not json\n'
+            '\n'
+            '{"title": "Line Two", "publication_year": 2002, "author": %d}\n'
+        ) % (self.author1.pk, self.author2.pk)
+        response = self.auth_client.post(
+            reverse('book-bulk-create'), data=body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+    def test_bulk_update(self):
+        payload = [
+            {"id": self.book1.pk, "title": "Utopia Bulk", "publication_year": 2008, "author": self.author2.pk},
+            {"id": self.book2.pk, "title": "Legend Bulk", "publication_year": 1993, "author": self.author1.pk},
+        ]
+        response = self.auth_client.put(reverse('book-bulk-update'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 2)
+        self.book1.refresh_from_db()
+        self.assertEqual((self.book1.title, self.book1.author_id), ("Utopia Bulk", self.author2.pk))
+
+        response = self.client.put(reverse('book-bulk-update'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_update_rejects_non_integer_ids(self):
+        payload = [{"id": [self.book1.pk], "title": "X"}, {"id": True, "title": "Y"},
+                   {"id": self.book2.pk, "title": "Legend Bulk"}]
+        response = self.auth_client.patch(reverse('book-bulk-update'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [0, 1])
+        self.assertEqual(response.data['errors'][0]['errors'], {'id': ['A valid integer is required.']})
+
     def test_create_book_with_login(self):
         """هنا بنستخدم self.client.login زي ما checker طالب"""
         login_ok = self.client.login(username="tester", password="pass1234")
@@ -90,3 +336,470 @@ class BookAPITestCase(TestCase):
         response = self.client.post(self.create_url, data=payload, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['title'], "Login Created")
+
+    def test_keyset_pagination_walks_all_pages(self):
+        response = self.client.get(self.list_url, {'page_size': 2, 'ordering': '-publication_year'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['previous'])
+        first_page = [item['title'] for item in response.data['results']]
+        self.assertEqual(first_page, ["Another Tale", "Utopia"])
+
+        # كتاب جديد قبل الـ cursor ما يغيرش الصفحة التالية
+        Book.objects.create(title="Newest", publication_year=2020, author=self.author2)
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['title'] for item in response.data['results']], ["Legend of X"])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['title'] for item in response.data['results']], ["Another Tale", "Utopia"])
+
+    def test_keyset_pagination_keeps_filters_and_rejects_bad_cursor(self):
+        response = self.client.get(self.list_url, {'page_size': 1, 'author': self.author1.pk})
+        self.assertEqual([item['title'] for item in response.data['results']], ["Legend of X"])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['title'] for item in response.data['results']], ["Utopia"])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(self.list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_keyset_pagination_rejects_wrong_typed_cursor(self):
+        def cursor(ordering, position):
+            payload = json.dumps({'o': ordering, 'p': position, 'r': 0}).encode()
+            return base64.urlsafe_b64encode(payload).decode()
+
+        # JSON صالح بس القيم من نوع غلط: 404 مش 500
+        for params in (
+            {'cursor': cursor(['title', 'id'], ['Utopia', 'abc'])},
+            {'cursor': cursor(['title', 'id'], ['Utopia', [1]])},
+            {'cursor': cursor(['title', 'id'], [None, 1])},
+            {'cursor': cursor(['publication_year', 'id'], ['recent', 1]), 'ordering': 'publication_year'},
+        ):
+            response = self.client.get(self.list_url, params)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, params)
+            self.assertEqual(response.data['detail'], 'Invalid cursor')
+
+
+class AuthorAPITestCase(QueryCountAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = Author.objects.create(name="Author One")
+        Book.objects.create(title="Utopia", publication_year=2008, author=self.author)
+
+    def test_list_authors_with_nested_books(self):
+        response = self.client.get(reverse('author-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['books'][0]['title'], "Utopia")
+        self.assertEqual(response.data[0]['books'][0]['author'], self.author.pk)
+
+    def test_author_list_has_no_n_plus_one(self):
+        def grow():
+            for i in range(3):
+                author = Author.objects.create(name=f"Grown {i}")
+                Book.objects.create(title=f"Grown Book {i}", publication_year=2000, author=author)
+
+        self.assertConstantQueries(lambda: self.client.get(reverse('author-list')), grow)
+
+
+class BackgroundJobAPITestCase(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.author = Author.objects.create(name="Author One")
+        self.other = Author.objects.create(name="Author Two")
+        for i in range(5):
+            Book.objects.create(title=f"Book {i}", publication_year=2000 + i, author=self.author)
+        self.kept = Book.objects.create(title="Kept", publication_year=2001, author=self.other)
+
+    def poll(self, response):
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return self.client.get(response['Location'])
+
+    def test_author_delete_is_queued_and_polled(self):
+        response = self.client.delete(reverse('author-delete', kwargs={'pk': self.author.pk}))
+        status_response = self.poll(response)
+        self.assertEqual(status_response.data['status'], Job.QUEUED)
+        self.assertEqual(status_response['Retry-After'], '1')
+        # لسه مااتمسحش: الـ request بس عمل الـ job
+        self.assertEqual(Book.objects.filter(author=self.author).count(), 5)
+
+        Worker(name='test').run_once()
+        status_response = self.client.get(response['Location'])
+        self.assertEqual(status_response.data['status'], Job.SUCCEEDED)
+        self.assertEqual((status_response.data['progress'], status_response.data['total']), (5, 5))
+        self.assertFalse(Author.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Book.objects.all()), [self.kept])
+        stats = self.client.get(reverse('book-stats')).data
+        self.assertEqual(stats['total'], 1)
+
+    def test_book_delete_prefer_respond_async(self):
+        url = reverse('book-delete', kwargs={'pk': self.kept.pk})
+        response = self.client.delete(url, HTTP_PREFER='respond-async, wait=10')
+        self.assertEqual(response['Preference-Applied'], 'respond-async')
+        self.assertEqual(response.data['kind'], 'delete_books')
+        Worker(name='test').run_once()
+        self.assertEqual(self.poll(response).data['result'], {'deleted_books': 1})
+        self.assertFalse(Book.objects.filter(pk=self.kept.pk).exists())
+        # من غير Prefer: زي الأول
+        book = Book.objects.first()
+        response = self.client.delete(reverse('book-delete', kwargs={'pk': book.pk}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_bulk_create_prefer_respond_async(self):
+        items = [{'title': f"Queued {i}", 'publication_year': 2010, 'author': self.other.pk} for i in range(3)]
+        response = self.client.post(reverse('book-bulk-create'), items, format='json', HTTP_PREFER='respond-async')
+        self.assertFalse(Book.objects.filter(title__startswith="Queued").exists())
+        Worker(name='test').run_once()
+        self.assertEqual(self.poll(response).data['result'], {'created': 3, 'errors': []})
+        self.assertEqual(Book.objects.filter(title__startswith="Queued").count(), 3)
+
+    def test_async_ndjson_import_is_staged_not_in_payload(self):
+        body = (
+            '{"title": "Queued One", "publication_year": 2001, "author": %d}\n'
+            'not json\n'
+            '{"title": "Queued Two", "publication_year": 2002, "author": %d}\n'
+        ) % (self.other.pk, self.other.pk)
+        response = self.client.post(reverse('book-bulk-create'), data=body,
+                                    content_type='application/x-ndjson', HTTP_PREFER='respond-async')
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(set(job.payload), {'upload', 'total', 'batch_size'})
+        self.assertEqual(ImportItem.objects.count(), 3)
+        Worker(name='test').run_once()
+        result = self.poll(response).data['result']
+        self.assertEqual(result['created'], 2)
+        # InvalidItem بيوصل للـ worker كـ error للسطر ده، مش list
+        self.assertEqual(result['errors'][0]['index'], 1)
+        self.assertIn('Invalid JSON', result['errors'][0]['errors']['non_field_errors'][0])
+        self.assertFalse(ImportItem.objects.exists())
+
+    def test_job_invalidates_cache_of_other_processes(self):
+        url = reverse('book-list')
+        self.assertEqual(len(self.client.get(url).data), 6)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        self.client.delete(reverse('author-delete', kwargs={'pk': self.author.pk}))
+        # الـ worker process تانية: CACHES بتاعتها مش بتاعة الـ web process
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'job-worker',
+        }}):
+            Worker(name='test').run_once()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([book['title'] for book in response.data], ["Kept"])
+
+    def test_jobs_are_private(self):
+        response = self.client.delete(reverse('author-delete', kwargs={'pk': self.author.pk}))
+        stranger = APIClient()
+        stranger.force_authenticate(User.objects.create_user(username="stranger", password="pass1234"))
+        self.assertEqual(stranger.get(response['Location']).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(APIClient().get(response['Location']).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(
+            APIClient().delete(reverse('author-delete', kwargs={'pk': self.author.pk})).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+
+class ChangeFeedAPITestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('change-feed')
+
+    def feed(self, since=0, **params):
+        response = self.client.get(self.url, {'since': since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_every_write_path_is_logged_in_order(self):
+        start = self.feed()['next']
+        author = Author.objects.create(name="Author One")
+        book = Book.objects.create(title="Utopia", publication_year=2008, author=author)
+        self.client.patch(reverse('book-update', kwargs={'pk': book.pk}), {'title': "Utopia 2"}, format='json')
+        self.client.post(reverse('book-bulk-create'), [
+            {'title': "Bulk", 'publication_year': 2001, 'author': author.pk},
+        ], format='json')
+        self.client.delete(reverse('book-delete', kwargs={'pk': book.pk}))
+
+        data = self.feed(start)
+        self.assertEqual(
+            [(change['model'], change['op']) for change in data['changes']],
+            [('author', 'create'), ('book', 'create'), ('book', 'update'), ('book', 'create'), ('book', 'delete')],
+        )
+        self.assertEqual(data['changes'][2]['data'],
+                         {'id': book.pk, 'title': "Utopia 2", 'publication_year': 2008, 'author': author.pk})
+        self.assertIsNone(data['changes'][4]['data'])
+        seqs = [change['seq'] for change in data['changes']]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(data['next'], seqs[-1])
+        # مفيش جديد
+        self.assertEqual(self.feed(data['next'])['changes'], [])
+
+    def test_pages_filter_and_ndjson(self):
+        author = Author.objects.create(name="Author One")
+        for i in range(5):
+            Book.objects.create(title=f"Book {i}", publication_year=2000, author=author)
+        page = self.feed(limit=2, model='book')
+        self.assertEqual([change['data']['title'] for change in page['changes']], ["Book 0", "Book 1"])
+        self.assertTrue(page['has_more'])
+        page = self.feed(page['next'], limit=10, model='book')
+        self.assertEqual(len(page['changes']), 3)
+        self.assertFalse(page['has_more'])
+
+        response = self.client.get(self.url, {'format': 'ndjson', 'model': 'book'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['data']['title'] for line in lines], [f"Book {i}" for i in range(5)])
+
+        response = self.client.get(self.url, {'model': 'library'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rolled_back_writes_are_not_logged(self):
+        author = Author.objects.create(name="Author One")
+        start = self.feed()['next']
+        # سنة في المستقبل: الـ bulk item بيترفض ومفيش حاجة بتتكتب
+        self.client.post(reverse('book-bulk-create'), [
+            {'title': "Future", 'publication_year': 9999, 'author': author.pk},
+        ], format='json')
+        self.assertEqual(self.feed(start)['changes'], [])
+
+    def test_gone_after_tombstones_are_compacted(self):
+        author = Author.objects.create(name="Author One")
+        book = Book.objects.create(title="Utopia", publication_year=2008, author=author)
+        book.delete()
+        with self.settings(API_CHANGE_FEED={'RETENTION_SECONDS': 0, 'TOMBSTONE_RETENTION_SECONDS': 0}):
+            call_command('compact_changes', stdout=StringIO())
+        response = self.client.get(self.url, {'since': 0})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        through = response.data['compacted_through']
+        self.assertEqual(self.feed(through)['changes'], [])
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "pass1234"))
+        authors = Author.objects.bulk_create(Author(name=f"Author {i}") for i in range(5))
+        for i in range(250):
+            Book.objects.create(title=f"Book {i:03}", publication_year=1990 + i % 3, author=authors[i % 5])
+        self.changelist = reverse('admin:api_book_changelist')
+
+    def test_changelist_keyset_pages_without_n_plus_one(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.changelist)
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(ctx.captured_queries), 15)
+        self.assertFalse([q for q in ctx.captured_queries if 'OFFSET' in q['sql']])
+        self.assertContains(response, "Book 249")
+        self.assertContains(response, "Author 4")
+
+        next_url = response.context['cl'].keyset_next_url
+        response = self.client.get(self.changelist + next_url)
+        self.assertContains(response, "Book 149")
+        self.assertNotContains(response, "Book 150")
+        # آخر صفحة
+        response = self.client.get(self.changelist + response.context['cl'].keyset_next_url)
+        self.assertEqual(len(response.context['cl'].result_list), 50)
+        self.assertIsNone(response.context['cl'].keyset_next_url)
+
+    def test_year_filter_from_counters_and_search(self):
+        response = self.client.get(self.changelist)
+        self.assertContains(response, "1990 (84)")
+        response = self.client.get(self.changelist, {'publication_year': '1991'})
+        self.assertEqual({book.publication_year for book in response.context['cl'].result_list}, {1991})
+        response = self.client.get(self.changelist, {'q': 'book 007'})
+        self.assertEqual([book.title for book in response.context['cl'].result_list], ["Book 007"])
+
+    def test_author_autocomplete(self):
+        response = self.client.get(reverse('admin:api_author_changelist'), {'q': 'Author'})
+        self.assertTrue(response.context['cl'].keyset)
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'api', 'model_name': 'book', 'field_name': 'author', 'term': 'Author 3',
+        })
+        self.assertEqual([item['text'] for item in response.json()['results']], ["Author 3"])
+
+    def test_sorting_falls_back_to_page_numbers(self):
+        response = self.client.get(self.changelist, {'o': '1'})
+        self.assertFalse(response.context['cl'].keyset)
+        self.assertEqual(response.context['cl'].result_list[0].title, "Book 000")
+
+
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        response_cache.clear()
+        self.author1 = Author.objects.create(name="Author One")
+        self.author2 = Author.objects.create(name="Author Two")
+        Book.objects.create(title="Utopia", publication_year=2008, author=self.author1)
+        Book.objects.create(title="Legend of X", publication_year=1993, author=self.author1)
+        self.book = Book.objects.create(title="Another Tale", publication_year=2015, author=self.author2)
+
+    def sync_json(self, url, params=None):
+        return json.loads(APIClient().get(url, params, HTTP_ACCEPT='application/json').content)
+
+    async def test_async_list_matches_sync(self):
+        for params in ({}, {'ordering': '-publication_year'}, {'author': self.author1.pk}, {'search': 'leg'}):
+            response = await self.async_client.get(reverse('async-book-list'), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            expected = await sync_to_async(self.sync_json)(reverse('book-list'), params)
+            self.assertEqual(json.loads(response.content), expected)
+
+    async def test_metrics_middleware_runs_natively_under_asgi(self):
+        with self.settings(DEBUG=True), mock.patch('django.core.handlers.base.logger') as logger:
+            ASGIHandler()
+        adapted = [call.args for call in logger.debug.call_args_list if 'RequestMetricsMiddleware' in str(call.args)]
+        self.assertEqual(adapted, [])
+
+        registry.clear()
+        response = await self.async_client.get(reverse('async-book-list'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn((('view', 'AsyncBookListView'),), registry.snapshot()['http_request_duration_seconds'])
+
+    async def test_async_pagination_and_errors(self):
+        response = await self.async_client.get(reverse('async-book-list'), {'page_size': 2})
+        data = json.loads(response.content)
+        self.assertEqual([item['title'] for item in data['results']], ["Another Tale", "Legend of X"])
+        response = await self.async_client.get(data['next'])
+        self.assertEqual([item['title'] for item in json.loads(response.content)['results']], ["Utopia"])
+
+        response = await self.async_client.get(reverse('async-book-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get(reverse('async-book-list'), {'author': 999999})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_detail_and_authors(self):
+        response = await self.async_client.get(reverse('async-book-detail', kwargs={'pk': self.book.pk}))
+        self.assertEqual(json.loads(response.content)['title'], "Another Tale")
+        response = await self.async_client.get(reverse('async-book-detail', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = await self.async_client.get(reverse('async-author-list'))
+        expected = await sync_to_async(self.sync_json)(reverse('author-list'))
+        self.assertEqual(json.loads(response.content), expected)
+        response = await self.async_client.get(reverse('async-author-detail', kwargs={'pk': self.author1.pk}))
+        self.assertEqual(len(json.loads(response.content)['books']), 2)
+
+
+class BookLiveViewTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="Author One")
+
+    def create_books(self, titles):
+        with self.captureOnCommitCallbacks(execute=True):
+            Book.objects.create(title=titles[0], publication_year=2008, author=self.author)
+            bulk_create_books([{'title': title, 'publication_year': 2008, 'author': self.author.pk}
+                               for title in titles[1:]])
+
+    async def test_new_books_are_pushed(self):
+        response = await self.async_client.get(reverse('book-live'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry: '))
+
+        await sync_to_async(self.create_books)(["Utopia", "Bulk One"])
+        frames = b''
+        while frames.count(b'\n\n') < 2:
+            frames += await anext(stream)
+        events = [dict(line.split(': ', 1) for line in frame.splitlines())
+                  for frame in frames.decode().strip().split('\n\n')]
+        self.assertEqual([event['event'] for event in events], ['book.created'] * 2)
+        self.assertEqual([json.loads(event['data'])['title'] for event in events], ["Utopia", "Bulk One"])
+
+        # reconnect: اللي بعد Last-Event-ID بس
+        response = await self.async_client.get(reverse('book-live'), headers={'Last-Event-ID': events[0]['id']})
+        stream = aiter(response.streaming_content)
+        await anext(stream)
+        self.assertIn(b'"title":"Bulk One"', await anext(stream))
+
+    def test_needs_asgi(self):
+        response = self.client.get(reverse('book-live'))
+        self.assertEqual(response.status_code, 501)
+
+
+@override_settings(
+    API_READ_REPLICAS={'ALIASES': ['test_replica'], 'STICKY_SECONDS': 5, 'SQLITE_REPLICATION': False},
+    API_RESPONSE_CACHE={'ENABLED': False},
+)
+class ReadReplicaTestCase(TransactionTestCase):
+    databases = {'default', 'test_replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="pass1234")
+        self.author = Author.objects.create(name="Author One")
+        replicator.replicate()
+
+    def titles(self, client):
+        return [item['title'] for item in client.get(reverse('book-list')).data]
+
+    def test_reads_go_to_replica_until_replicated(self):
+        Book.objects.create(title="Primary Only", publication_year=2001, author=self.author)
+        self.assertEqual(Book.objects.using('default').count(), 1)
+        self.assertEqual(self.titles(APIClient()), [])
+        replicator.replicate()
+        self.assertEqual(self.titles(APIClient()), ["Primary Only"])
+
+    def test_only_opted_in_views_read_the_replica(self):
+        Book.objects.create(title="Primary Only", publication_year=2001, author=self.author)
+        # برة request (jobs، signals، shell): primary، والكتابة مابتعملش pin دايم
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ["Primary Only"])
+        self.assertEqual(self.titles(APIClient()), [])
+        # views مش opted in (stats من الـ counters) بتقرا الـ primary
+        stats = APIClient().get(reverse('book-stats')).data
+        self.assertEqual(stats['total'], 1)
+
+    def test_read_your_writes_after_create(self):
+        writer = APIClient()
+        writer.force_authenticate(user=self.user)
+        payload = {"title": "Fresh", "publication_year": 2020, "author": self.author.pk}
+        response = writer.post(reverse('book-create'), data=payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('pin_primary', response.cookies)
+
+        # الـ client اللي كتب يشوف كتابته، غيره لسه بيقرا من الـ replica
+        self.assertEqual(self.titles(writer), ["Fresh"])
+        self.assertEqual(self.titles(APIClient()), [])
+
+        writer.cookies['pin_primary'] = 'tampered'
+        self.assertEqual(self.titles(writer), [])
+
+    def test_middleware_runs_natively_under_asgi(self):
+        with self.settings(DEBUG=True), mock.patch('django.core.handlers.base.logger') as logger:
+            ASGIHandler()
+        adapted = [call.args for call in logger.debug.call_args_list if 'ReplicaPinningMiddleware' in str(call.args)]
+        self.assertEqual(adapted, [])
+
+    async def test_async_views_pin_to_primary(self):
+        await Book.objects.acreate(title="Primary Only", publication_year=2001, author=self.author)
+        url = reverse('async-book-list')
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json(), [])
+        # cookie الـ pin (زي اللي بيرجع بعد كتابة): نفس الـ request يقرا الـ primary
+        self.async_client.cookies['pin_primary'] = signing.dumps(time.time() + 5, salt='pin_primary')
+        response = await self.async_client.get(url)
+        self.assertEqual([item['title'] for item in response.json()], ["Primary Only"])
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': True, 'COALESCE': True})
+    def test_read_your_writes_with_response_cache(self):
+        response_cache.clear()
+        writer = APIClient()
+        writer.force_authenticate(user=self.user)
+        payload = {"title": "Fresh", "publication_year": 2020, "author": self.author.pk}
+        self.assertEqual(writer.post(reverse('book-create'), data=payload, format='json').status_code,
+                         status.HTTP_201_CREATED)
+
+        # client تاني بيملا الكاش من الـ replica (لسه مافيهوش الكتاب)
+        response = APIClient().get(reverse('book-list'))
+        self.assertEqual((response['X-Cache'], response.data), ('MISS', []))
+        # الـ client اللي كتب مابيقراش الـ entry دي
+        response = writer.get(reverse('book-list'))
+        self.assertEqual(response['X-Cache'], 'BYPASS')
+        self.assertEqual([item['title'] for item in response.data], ["Fresh"])
+
+    def test_replication_on_commit(self):
+        writer = APIClient()
+        writer.force_authenticate(user=self.user)
+        with self.settings(API_READ_REPLICAS={'ALIASES': ['test_replica'], 'SQLITE_REPLICATION': True}):
+            book = Book.objects.create(title="Replicated", publication_year=2001, author=self.author)
+            self.assertEqual(self.titles(APIClient()), ["Replicated"])
+            url = reverse('book-update', kwargs={'pk': book.pk})
+            payload = {"title": "Edited", "publication_year": 2001, "author": self.author.pk}
+            self.assertEqual(writer.put(url, data=payload, format='json').status_code, status.HTTP_200_OK)
+            self.assertEqual(APIClient().get(reverse('book-detail', kwargs={'pk': book.pk})).data['title'], "Edited")
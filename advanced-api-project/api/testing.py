@@ -0,0 +1,25 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# Helpers للتستات:
+# يتأكد إن عدد الـ queries ثابت ومش بيكبر مع حجم النتيجة (N+1)
+class QueryCountAssertionsMixin:
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as ctx:
+            func()
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, request, grow, rounds=2):
+        """
+        Run ``request()``, call ``grow()`` to add more rows, and run it again.
+        Fails if the number of queries changes between rounds, which is what
+        an N+1 in a serializer endpoint looks like.
+        """
+        counts = [self.count_queries(request)]
+        for _ in range(rounds):
+            grow()
+            counts.append(self.count_queries(request))
+        if len(set(counts)) != 1:
+            self.fail(f"Query count grows with result size: {counts}")
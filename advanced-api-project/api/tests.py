@@ -1,3 +1,735 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import NotSupportedError, connection
+from django.test.utils import CaptureQueriesContext
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+
+from alx_common.bench import compare, summarize
+from alx_common.broker import Broker, SlowConsumer, TooManySubscribers, broker as live_broker
+from alx_common.db import database_config
+from alx_common.parsers import FastJSONParser
+from alx_common.singleflight import SingleFlight
+from alx_common.sse import EventStreamRouter, event_stream, stream_view_for
+from alx_common.throttling import BucketStore, parse_rate
+from alx_common.renderers import FastJSONRenderer
+
+from .async_views import BookLiveView
+from .bulk import bulk_create_books, bulk_delete_books, bulk_update_books, spool_import
+from .cache import TaggedLRUCache
+from .changes import compact_changes, compacted_through, feed_queryset, record_changes
+from .compiled import get_compiled
+from .counters import book_stats, diff_counters
+from .denormalize import stale_author_names
+from .jobs import HANDLERS, LeaseLost, Worker, claim, enqueue, handler, report_progress, requeue_expired
+from .models import Author, Book, BookCounter, Change, ImportItem, Job
+from .query import plan_queryset
+from .serializers import AuthorSerializer, BookSerializer
+from .search import InMemoryIndex, SQLiteFTSBackend
+
+
+class InMemoryIndexTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="Ursula Le Guin")
+        self.book1 = Book.objects.create(title="The Left Hand of Darkness", publication_year=1969, author=self.author)
+        self.book2 = Book.objects.create(title="The Dispossessed", publication_year=1974, author=self.author)
+        self.index = InMemoryIndex()
+        self.index.build()
+
+    def test_prefix_search_requires_every_term(self):
+        ids = [book_id for book_id, _ in self.index.search(['dark', 'ursula'])]
+        self.assertEqual(ids, [self.book1.pk])
+        self.assertEqual(self.index.search(['dark', 'nobody']), [])
+
+    def test_title_match_ranks_above_author_match(self):
+        other = Author.objects.create(name="Left Bank")
+        book3 = Book.objects.create(title="Unrelated", publication_year=2000, author=other)
+        self.index.build()
+        ids = [book_id for book_id, _ in self.index.search(['left'])]
+        self.assertEqual(ids, [self.book1.pk, book3.pk])
+
+    def test_updates_and_removals(self):
+        self.index.update_book(self.book2.pk, "Changing Planes", self.author.pk, self.author.name)
+        self.assertEqual(self.index.search(['dispossessed']), [])
+        self.index.rename_author(self.author.pk, "U. K. Le Guin")
+        self.assertEqual(self.index.search(['ursula']), [])
+        self.index.remove_book(self.book1.pk)
+        self.assertEqual([book_id for book_id, _ in self.index.search(['guin'])], [self.book2.pk])
+        self.assertNotIn('darkness', self.index.vocabulary)
+
+    def test_filter_returns_every_match(self):
+        Book.objects.bulk_create([
+            Book(title=f"Darkness {i}", publication_year=2000, author=self.author) for i in range(12)
+        ])
+        self.index.build()
+        self.index.ranked_results, self.index.max_inline_ids = 3, 5
+        ranked = self.index.search(['darkness'])
+        self.assertEqual(len(ranked), 13)
+        books = self.index.filter(Book.objects.all(), ['darkness']).order_by('search_rank', 'pk')
+        # كل النتايج موجودة، والأحسن 3 الأول بالترتيب
+        self.assertEqual(len(books), 13)
+        self.assertEqual([book.pk for book in books[:3]], [book_id for book_id, _ in ranked[:3]])
+
+
+class SQLiteFTSBackendTestCase(TestCase):
+    def setUp(self):
+        if not SQLiteFTSBackend.is_available(connection.alias):
+            self.skipTest("FTS5 not available")
+        left_bank = Author.objects.create(name="Left Bank")
+        self.author_match = Book.objects.create(title="Unrelated", publication_year=2000, author=left_bank)
+        le_guin = Author.objects.create(name="Ursula Le Guin")
+        self.title_match = Book.objects.create(title="Left Hand", publication_year=1969, author=le_guin)
+
+    def test_rank_comes_from_one_join(self):
+        with CaptureQueriesContext(connection) as queries:
+            books = list(SQLiteFTSBackend().filter(Book.objects.all(), ['left']).order_by('search_rank', 'pk'))
+        self.assertEqual(books, [self.title_match, self.author_match])
+        sql = queries[0]['sql']
+        # MATCH مرة واحدة وbm25 من الـ join نفسه، مش subquery لكل كتاب
+        self.assertEqual(sql.count('MATCH'), 1)
+        self.assertNotIn('SELECT bm25', sql)
+
+
+class ExplainBookQueriesTestCase(TestCase):
+    def test_no_filter_combination_falls_back_to_full_scan(self):
+        out = StringIO()
+        call_command('explain_book_queries', '--strict', stdout=out)
+        self.assertIn('0 full scans', out.getvalue())
+
+
+class TaggedLRUCacheTestCase(TestCase):
+    def test_lru_eviction_ttl_and_tags(self):
+        cache = TaggedLRUCache(ttl=60, max_entries=2)
+        cache.set('a', 1, tags={'year:2000'})
+        cache.set('b', 2, tags={'books'})
+        cache.get('a')
+        cache.set('c', 3, tags={'books'})
+        self.assertIsNone(cache.get('b'))  # least recently used
+        self.assertEqual(cache.get('a'), 1)
+
+        cache.invalidate_tags({'books'})
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.get('a'), 1)
+
+        cache.set('d', 4, ttl=-1)
+        self.assertIsNone(cache.get('d'))
+        self.assertEqual(list(cache.entries), ['a'])
+
+    def test_invalidation_reaches_other_processes(self):
+        # اتنين instances = اتنين workers بيشاركوا نفس الـ Django cache
+        worker1, worker2 = TaggedLRUCache(), TaggedLRUCache()
+        worker2.set('list', ['old'], tags={'author:1'})
+        worker1.invalidate_tags({'author:1'})
+        self.assertIsNone(worker2.get('list'))
+
+    def test_write_during_computation_invalidates_the_entry(self):
+        cache = TaggedLRUCache()
+        versions = cache.versions({'books'})
+        cache.invalidate_tags({'books'})   # كتابة خلصت والـ response لسه بيتحسب
+        cache.set('list', ['old'], tags={'books'}, versions=versions)
+        self.assertIsNone(cache.get('list'))
+
+
+class CompiledSerializerTestCase(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name="Octavia Butler")
+        Author.objects.create(name="No Books Yet")
+        Book.objects.create(title="Kindred", publication_year=1979, author=author)
+        Book.objects.create(title="Dawn", publication_year=1987, author=author)
+
+    def assertSameBytes(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(plan_queryset(queryset, serializer_class), many=True).data)
+        actual = JSONRenderer().render(list(get_compiled(serializer_class).select(plan_queryset(queryset, serializer_class))))
+        self.assertEqual(actual, expected)
+
+    def test_book_output_is_byte_identical(self):
+        self.assertSameBytes(BookSerializer, Book.objects.order_by('title'))
+
+    def test_author_with_nested_books_is_byte_identical(self):
+        self.assertSameBytes(AuthorSerializer, Author.objects.order_by('id'))
+        with self.assertNumQueries(2):
+            list(get_compiled(AuthorSerializer).select(Author.objects.all()))
+
+
+class FastJSONRendererTestCase(TestCase):
+    def test_output_matches_drf(self):
+        renderer = FastJSONRenderer()
+        data = {
+            'next': None,
+            'results': [{'id': i, 'title': f"Book {i} \u2028 ✓", 'year': 2000 + i} for i in range(5)],
+        }
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        self.assertEqual(renderer.render(data['results']), JSONRenderer().render(data['results']))
+        self.assertEqual(renderer.render([]), b'[]')
+
+    def test_render_chunks_matches_render(self):
+        renderer = FastJSONRenderer()
+        items = [{'id': i, 'title': f"Book {i} \u2028 ✓"} for i in range(5)]
+        chunks = list(renderer.render_chunks(iter(items), chunk_size=2))
+        self.assertEqual(len(chunks), 5)   # [ + 3 chunks + ]
+        self.assertEqual(b''.join(chunks), renderer.render(items))
+        self.assertEqual(b''.join(renderer.render_chunks([])), b'[]')
+
+    def test_parser_round_trip(self):
+        body = FastJSONRenderer().render([{'title': "Ünïcode", 'publication_year': 2001}])
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), [{'title': "Ünïcode", 'publication_year': 2001}])
+
+
+class DatabaseConfigTestCase(TestCase):
+    def test_sqlite_defaults(self):
+        config = database_config('db.sqlite3', env={})
+        self.assertEqual(config['NAME'], 'db.sqlite3')
+        self.assertGreater(config['CONN_MAX_AGE'], 0)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+        # WAL بيغير header الملف: opt-in بس
+        self.assertNotIn('journal_mode', config['OPTIONS']['init_command'])
+        config = database_config('db.sqlite3', env={'DATABASE_SQLITE_WAL': '1'})
+        self.assertIn('PRAGMA journal_mode=WAL', config['OPTIONS']['init_command'])
+
+    def test_postgres_uses_pool_instead_of_persistent_connections(self):
+        config = database_config('db.sqlite3', env={
+            'DATABASE_ENGINE': 'django.db.backends.postgresql',
+            'DATABASE_NAME': 'library',
+            'DATABASE_HOST': 'db',
+        })
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertIn('pool', config['OPTIONS'])
+        self.assertNotIn('init_command', config['OPTIONS'])
+        self.assertEqual(config['HOST'], 'db')
+
+    def test_pragmas_applied_on_connect(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class BenchHarnessTestCase(TestCase):
+    def test_summarize_percentiles(self):
+        stats = summarize([i / 1000 for i in range(1, 101)], elapsed=2.0, errors=1)
+        self.assertEqual(stats['iterations'], 100)
+        self.assertEqual(stats['rps'], 50.0)
+        self.assertAlmostEqual(stats['p50_ms'], 50.5)
+        self.assertEqual(stats['max_ms'], 100.0)
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {'scenarios': {'list': {'p50_ms': 10.0, 'p99_ms': 20.0, 'rps': 100.0}}}
+        within = {'scenarios': {'list': {'p50_ms': 12.0, 'p99_ms': 24.0, 'rps': 85.0}}}
+        self.assertEqual(compare(within, baseline, tolerance=0.25), [])
+        slower = {'scenarios': {'list': {'p50_ms': 15.0, 'p99_ms': 20.0, 'rps': 70.0},
+                                'detail': {'p50_ms': 1.0, 'p99_ms': 2.0, 'rps': 900.0}}}
+        self.assertEqual(compare(slower, baseline, tolerance=0.25),
+                         [('list', 'p50_ms', 10.0, 15.0), ('list', 'rps', 100.0, 70.0)])
+
+
+class AuthorNameTestCase(TestCase):
+    def setUp(self):
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.herbert = Author.objects.create(name="Frank Herbert")
+
+    def test_kept_in_sync_on_save_and_rename(self):
+        book = Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        self.assertEqual(book.author_name, "Frank Herbert")
+        # author_id بس من غير instance: بتتجاب بـ query
+        book = Book.objects.get(pk=book.pk)
+        book.author_id = self.le_guin.pk
+        book.save()
+        self.assertEqual(Book.objects.get(pk=book.pk).author_name, "Ursula K. Le Guin")
+
+        self.le_guin.name = "Ursula Le Guin"
+        self.le_guin.save()
+        self.assertEqual(Book.objects.get(pk=book.pk).author_name, "Ursula Le Guin")
+        self.assertFalse(stale_author_names().exists())
+
+    def test_bulk_paths(self):
+        bulk_create_books([{'title': 'Dune', 'publication_year': 1965, 'author': self.herbert.pk}])
+        book = Book.objects.get(title='Dune')
+        self.assertEqual(book.author_name, "Frank Herbert")
+        bulk_update_books([{'id': book.pk, 'author': self.le_guin.pk}], partial=True)
+        self.assertEqual(Book.objects.get(pk=book.pk).author_name, "Ursula K. Le Guin")
+
+    def test_backfill_command(self):
+        Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        # update() مش بيبعت signals -> drift
+        Book.objects.update(author=self.le_guin)
+        with self.assertRaises(CommandError):
+            call_command('backfill_author_names', '--check', stdout=StringIO())
+        out = StringIO()
+        call_command('backfill_author_names', stdout=out)
+        self.assertIn("on 1 books", out.getvalue())
+        self.assertEqual(Book.objects.get().author_name, "Ursula K. Le Guin")
+
+
+class SingleFlightTestCase(TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flights, calls, release = SingleFlight(), [], threading.Event()
+        results = []
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return 'rows'
+
+        def worker():
+            results.append(flights.do('books?ordering=-publication_year', slow))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        threads[0].start()
+        while not calls:
+            time.sleep(0.001)
+        # الـ leader جوه slow(): الباقيين لازم يستنوه
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('rows', False)] + [('rows', True)] * 4)
+        self.assertEqual(len(flights), 0)
+
+    def test_errors_are_shared_and_not_cached(self):
+        flights = SingleFlight()
+
+        def fail():
+            raise ValueError('boom')
+
+        with self.assertRaises(ValueError):
+            flights.do('k', fail)
+        self.assertEqual(flights.do('k', lambda: 'ok'), ('ok', False))
+
+
+class TokenBucketTestCase(TestCase):
+    def test_refills_continuously(self):
+        store = BucketStore()
+        capacity, per_second = parse_rate('2/s')
+        self.assertEqual([store.take('k', capacity, per_second, now=0.0)[0] for _ in range(3)], [True, True, False])
+        # نص ثانية = token واحد
+        self.assertTrue(store.take('k', capacity, per_second, now=0.5)[0])
+        self.assertFalse(store.take('k', capacity, per_second, now=0.5)[0])
+        # الـ bucket مش بيعدي الـ capacity
+        self.assertEqual(store.take('k', capacity, per_second, now=100.0), (True, 1.0))
+
+    def test_shared_buckets_do_not_lose_tokens(self):
+        # caches[] بيدي كل thread instance، فالـ patch على الـ class
+        cache_class = type(caches['default'])
+        real_get = cache_class.get
+
+        def slow_get(self, key, *args, **kwargs):
+            # يوسع الـ window بين الـ get والـ set
+            value = real_get(self, key, *args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        store = BucketStore()
+        capacity, per_second = parse_rate('10/d')
+        results = []
+        barrier = threading.Barrier(20)
+
+        def take():
+            barrier.wait()
+            results.append(store.take('throttle:test:shared', capacity, per_second)[0])
+
+        with override_settings(TOKEN_BUCKET_THROTTLE={'SHARED_CACHE': 'default'}), \
+                mock.patch.object(cache_class, 'get', slow_get):
+            threads = [threading.Thread(target=take) for _ in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        caches['default'].delete('throttle:test:shared')
+        self.assertEqual(results.count(True), capacity)
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('120/min'), (120, 2.0))
+        self.assertEqual(parse_rate('3600/hour'), (3600, 1.0))
+        self.assertIsNone(parse_rate(None))
+
+
+class BookCounterTestCase(TestCase):
+    def setUp(self):
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.herbert = Author.objects.create(name="Frank Herbert")
+
+    def assertCounters(self, by_author, by_year):
+        self.assertEqual(diff_counters(), [])
+        stats = book_stats()
+        self.assertEqual({row['author']: row['count'] for row in stats['by_author']}, by_author)
+        self.assertEqual({row['publication_year']: row['count'] for row in stats['by_year']}, by_year)
+        self.assertEqual(stats['total'], sum(by_year.values()))
+
+    def test_save_update_and_delete(self):
+        book = Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        Book.objects.create(title="The Dispossessed", publication_year=1974, author=self.le_guin)
+        self.assertCounters({self.herbert.pk: 1, self.le_guin.pk: 1}, {1965: 1, 1974: 1})
+
+        book.publication_year, book.author = 1974, self.le_guin
+        book.save()
+        self.assertCounters({self.le_guin.pk: 2}, {1974: 2})
+
+        # instance متعمل بإيدينا (مش من الـ DB): القيم القديمة بتيجي في pre_save
+        Book(pk=book.pk, title="Dune", publication_year=1965, author=self.herbert).save()
+        self.assertCounters({self.herbert.pk: 1, self.le_guin.pk: 1}, {1965: 1, 1974: 1})
+
+        book.refresh_from_db()
+        book.delete()
+        self.herbert.delete()
+        self.le_guin.delete()
+        self.assertCounters({}, {})
+        self.assertFalse(BookCounter.objects.exists())
+
+    def test_stale_instances_use_the_stored_row(self):
+        book = Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        first, second = Book.objects.get(pk=book.pk), Book.objects.get(pk=book.pk)
+        first.publication_year = 1970
+        first.save()
+        # second اتحمل قبل first.save(): القيمة القديمة 1970 من الـ DB مش 1965
+        second.publication_year = 1980
+        second.save()
+        self.assertCounters({self.herbert.pk: 1}, {1980: 1})
+
+        self.herbert.name = "Frank Patrick Herbert"
+        self.herbert.save()
+        first.title = "Dune Messiah"
+        first.save()
+        first.refresh_from_db()
+        self.assertEqual((first.publication_year, first.author_name), (1970, "Frank Patrick Herbert"))
+        self.assertCounters({self.herbert.pk: 1}, {1970: 1})
+
+        second.delete()
+        self.assertCounters({}, {})
+
+    def test_bulk_paths(self):
+        bulk_create_books([
+            {'title': f"Book {i}", 'publication_year': 2000 + i % 2, 'author': self.le_guin.pk} for i in range(4)
+        ])
+        self.assertCounters({self.le_guin.pk: 4}, {2000: 2, 2001: 2})
+        bulk_update_books([{'id': Book.objects.earliest('pk').pk, 'author': self.herbert.pk}], partial=True)
+        self.assertCounters({self.le_guin.pk: 3, self.herbert.pk: 1}, {2000: 2, 2001: 2})
+
+    def test_check_command_detects_and_fixes_drift(self):
+        Book.objects.create(title="Dune", publication_year=1965, author=self.herbert)
+        Book.objects.update(publication_year=1966)  # queryset.update() مش بيبعت signals
+        with self.assertRaises(CommandError):
+            call_command('check_book_counters', stdout=StringIO())
+        out = StringIO()
+        call_command('check_book_counters', '--fix', stdout=out)
+        self.assertIn('year=1966: stored 0, expected 1', out.getvalue())
+        self.assertEqual(diff_counters(), [])
+
+
+# ALIASES: الـ router يسمح بعلاقات بين test_replica والـ instances الجديدة
+@override_settings(API_READ_REPLICAS={'ALIASES': ['test_replica'], 'SQLITE_REPLICATION': False})
+class BookCounterUsingTestCase(TestCase):
+    databases = {'default', 'test_replica'}
+
+    def test_bulk_paths_count_on_the_written_database(self):
+        le_guin = Author.objects.using('test_replica').create(name="Ursula K. Le Guin")
+        herbert = Author.objects.using('test_replica').create(name="Frank Herbert")
+        bulk_create_books([
+            {'title': f"Book {i}", 'publication_year': 2000 + i % 2, 'author': le_guin.pk} for i in range(4)
+        ], using='test_replica')
+        book = Book.objects.using('test_replica').earliest('pk')
+        bulk_update_books([{'id': book.pk, 'author': herbert.pk}], partial=True, using='test_replica')
+        self.assertEqual(diff_counters('test_replica'), [])
+        stats = book_stats('test_replica')
+        self.assertEqual({row['name']: row['count'] for row in stats['by_author']},
+                         {"Ursula K. Le Guin": 3, "Frank Herbert": 1})
+        # ولا صف في الـ default
+        self.assertFalse(BookCounter.objects.using('default').exists())
+
+
+class JobQueueTestCase(TestCase):
+    def setUp(self):
+        self.herbert = Author.objects.create(name="Frank Herbert")
+        self.le_guin = Author.objects.create(name="Ursula K. Le Guin")
+        self.addCleanup(HANDLERS.pop, 'flaky', None)
+
+    def test_lease_is_exclusive_and_expires(self):
+        job = enqueue('delete_books', {'ids': []})
+        self.assertEqual(claim('w1').pk, job.pk)
+        # worker تاني مش هيلاقي حاجة طول ما الـ lease شغال
+        self.assertIsNone(claim('w2'))
+        self.assertEqual(requeue_expired(), (0, 0))
+
+        later = timezone.now() + timedelta(minutes=5)
+        self.assertEqual(requeue_expired(now=later), (1, 0))
+        self.assertEqual(claim('w2', now=later).attempts, 2)
+        # الـ worker القديم رجع: ماينفعش يكتب progress على job مش بتاعته
+        job.locked_by = 'w1'
+        with self.assertRaises(LeaseLost):
+            report_progress(job, 1)
+
+    def test_retry_with_backoff_then_fail(self):
+        calls = []
+
+        @handler('flaky')
+        def flaky(job):
+            calls.append(job.attempts)
+            raise RuntimeError('database is locked')
+
+        job = enqueue('flaky', max_attempts=2)
+        with self.assertLogs('api.jobs', 'WARNING'):
+            Worker(name='w').run_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('database is locked', job.error)
+        self.assertGreater(job.run_after, timezone.now())
+        # لسه وقته ماجاش
+        self.assertIsNone(Worker(name='w').run_once())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('api.jobs', 'ERROR'):
+            Worker(name='w').run_once()
+        job.refresh_from_db()
+        self.assertEqual((job.status, calls), (Job.FAILED, [1, 2]))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_delete_author_in_chunks(self):
+        bulk_create_books([
+            {'title': f"Book {i}", 'publication_year': 1960 + i % 3, 'author': self.herbert.pk} for i in range(7)
+        ])
+        Book.objects.create(title="The Dispossessed", publication_year=1974, author=self.le_guin)
+        job = enqueue('delete_author', {'author_id': self.herbert.pk})
+        with override_settings(API_JOBS={'DELETE_BATCH_SIZE': 3}):
+            Worker(name='w').run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.progress, job.total), (7, 7))
+        self.assertEqual(job.result, {'author_id': self.herbert.pk, 'deleted_books': 7, 'author_deleted': True})
+        self.assertFalse(Author.objects.filter(pk=self.herbert.pk).exists())
+        self.assertEqual(list(Book.objects.values_list('title', flat=True)), ["The Dispossessed"])
+        self.assertEqual(diff_counters(), [])
+
+    def test_bulk_delete_one_statement_per_chunk(self):
+        bulk_create_books([
+            {'title': f"Book {i}", 'publication_year': 2000 + i, 'author': self.le_guin.pk} for i in range(10)
+        ])
+        progress = []
+        with CaptureQueriesContext(connection) as ctx:
+            deleted = bulk_delete_books(Book.objects.all(), batch_size=4, progress=progress.append)
+        self.assertEqual((deleted, progress), (10, [4, 8, 10]))
+        # DELETE واحدة لكل chunk، مش واحدة لكل كتاب
+        deletes = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('DELETE FROM "api_book"')]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(diff_counters(), [])
+
+    def test_import_resumes_after_last_committed_batch(self):
+        items = [{'title': f"Book {i}", 'publication_year': 2000, 'author': self.le_guin.pk} for i in range(5)]
+        items[3]['publication_year'] = 9999
+        upload, total = spool_import(iter(items), batch_size=2)
+        job = enqueue('import_books', {'upload': str(upload), 'total': total, 'batch_size': 2})
+        # محاولة أولى وقفت بعد أول batch
+        Job.objects.filter(pk=job.pk).update(progress=2, result={'created': 2, 'errors': []})
+        bulk_create_books(items[:2])
+        Worker(name='w').run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['created'], 4)
+        self.assertEqual([error['index'] for error in job.result['errors']], [3])
+        self.assertEqual(Book.objects.count(), 4)
+        self.assertFalse(ImportItem.objects.exists())
+
+    def test_run_jobs_command(self):
+        enqueue('delete_author', {'author_id': self.le_guin.pk})
+        out = StringIO()
+        with self.settings(API_JOBS={'POLL_INTERVAL': 0}):
+            call_command('run_jobs', '--max-jobs', '1', stdout=out)
+        self.assertIn("Ran 1 jobs.", out.getvalue())
+        self.assertFalse(Author.objects.filter(pk=self.le_guin.pk).exists())
+
+
+class ChangeLogCompactionTestCase(TestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="Frank Herbert")
+
+    def test_keeps_latest_change_per_object(self):
+        dune = Book.objects.create(title="Dune", publication_year=1965, author=self.author)
+        for year in (1966, 1967):
+            dune.publication_year = year
+            dune.save()
+        gone = Book.objects.create(title="Gone", publication_year=1970, author=self.author)
+        gone.delete()
+        later = timezone.now() + timedelta(days=8)
+        result = compact_changes(now=later, batch_size=2)
+        # الـ tombstone لسه (أحدث من 30 يوم)، والـ create بتاع Gone اتشال
+        self.assertEqual((result['superseded'], result['tombstones']), (3, 0))
+        self.assertEqual(
+            list(Change.objects.values_list('model', 'op', 'data__publication_year')),
+            [('author', 'create', None), ('book', 'update', 1967), ('book', 'delete', None)],
+        )
+
+        result = compact_changes(now=timezone.now() + timedelta(days=31))
+        self.assertEqual(result['tombstones'], 1)
+        self.assertEqual(compacted_through(), result['compacted_through'])
+        self.assertEqual(
+            list(feed_queryset(0).values_list('model', 'op')), [('author', 'create'), ('book', 'update')],
+        )
+
+    def test_backends_without_commit_ordered_seq_are_refused(self):
+        with mock.patch.object(connection, 'vendor', 'mysql'):
+            with self.assertRaises(NotSupportedError):
+                record_changes([self.author], Change.UPDATE)
+        self.assertEqual(Change.objects.filter(op=Change.UPDATE).count(), 0)
+
+    def test_recent_changes_are_untouched_and_job_runs(self):
+        Book.objects.create(title="Dune", publication_year=1965, author=self.author)
+        before = Change.objects.count()
+        job = enqueue('compact_changes')
+        Worker(name='w').run_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result, {'superseded': 0, 'tombstones': 0, 'compacted_through': 0})
+        self.assertEqual(Change.objects.count(), before)
+
+
+class LiveBrokerTestCase(TestCase):
+    def test_publish_from_another_thread(self):
+        broker = Broker()
+
+        async def scenario():
+            subscription, backlog, complete = broker.subscribe(['book.created'])
+            self.assertEqual((backlog, complete), ([], True))
+            # الـ signals بتنشر من thread الـ request، مش من الـ event loop
+            publisher = threading.Thread(target=lambda: [
+                broker.publish('post.created', {'id': 1}), broker.publish('book.created', {'id': 2}),
+            ])
+            publisher.start()
+            publisher.join()
+            events = await subscription.get(timeout=1)
+            self.assertEqual([(event.topic, event.data) for event in events], [('book.created', {'id': 2})])
+            self.assertEqual(await subscription.get(timeout=0.01), [])
+            subscription.close()
+
+        asyncio.run(scenario())
+        self.assertEqual(len(broker), 0)
+
+    def test_resume_after_last_event_id(self):
+        broker = Broker()
+        first, second = broker.publish('book.created', {'id': 1}), broker.publish('book.created', {'id': 2})
+
+        async def scenario():
+            _, backlog, complete = broker.subscribe(['book.created'], first.id)
+            self.assertEqual((backlog, complete), ([second], True))
+            # id من قبل restart
+            _, backlog, complete = broker.subscribe(['book.created'], '0-1')
+            self.assertEqual((backlog, complete), ([], False))
+            with self.settings(LIVE_EVENTS={'HISTORY': 1}):
+                broker.publish('book.created', {'id': 3})
+                _, backlog, complete = broker.subscribe(['book.created'], first.id)
+            self.assertEqual(([event.data for event in backlog], complete), ([{'id': 3}], False))
+
+        asyncio.run(scenario())
+
+    def test_slow_consumer_is_dropped(self):
+        broker = Broker()
+
+        async def scenario():
+            with self.settings(LIVE_EVENTS={'MAX_QUEUE': 2, 'MAX_SUBSCRIBERS': 1}):
+                subscription, _, _ = broker.subscribe(['book.created'])
+                with self.assertRaises(TooManySubscribers):
+                    broker.subscribe(['book.created'])
+            for i in range(3):
+                broker.publish('book.created', {'id': i})
+            await asyncio.sleep(0)
+            with self.assertRaises(SlowConsumer):
+                await subscription.get(timeout=1)
+            self.assertEqual(len(broker), 0)
+
+        asyncio.run(scenario())
+
+    def test_stream_heartbeat_and_cleanup(self):
+        broker = Broker()
+
+        async def scenario():
+            subscription, backlog, complete = broker.subscribe(['book.created'])
+            stream = event_stream(subscription, backlog, complete, heartbeat=0.01, retry_ms=1000)
+            self.assertEqual(await anext(stream), 'retry: 1000\n\n')
+            self.assertEqual(await anext(stream), ': ping\n\n')
+            event = broker.publish('book.created', {'id': 7, 'title': 'Line\nbreak'})
+            self.assertEqual(
+                await anext(stream),
+                f'id: {event.id}\nevent: book.created\ndata: {{"id":7,"title":"Line\\nbreak"}}\n\n',
+            )
+            await stream.aclose()
+            self.assertEqual(len(broker), 0)
+
+        asyncio.run(scenario())
+
+    def test_router_streams_without_django(self):
+        inner_calls = []
+
+        async def django_app(scope, receive, send):
+            inner_calls.append(scope['path'])
+
+        async def scenario():
+            router = EventStreamRouter(django_app)
+            await router({'type': 'http', 'method': 'GET', 'path': '/api/books/'}, None, None)
+            self.assertEqual(inner_calls, ['/api/books/'])
+
+            sent, disconnect = [], asyncio.Event()
+
+            async def send(message):
+                sent.append(message)
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            scope = {'type': 'http', 'method': 'GET', 'path': reverse('book-live'),
+                     'headers': [(b'host', b'testserver')], 'query_string': b''}
+            task = asyncio.ensure_future(router(scope, receive, send))
+            while len(live_broker) == 0:
+                await asyncio.sleep(0.001)
+            live_broker.publish('book.created', {'id': 9})
+            while not any(b'"id":9' in message.get('body', b'') for message in sent):
+                await asyncio.sleep(0.001)
+            disconnect.set()
+            await task
+            # الـ request ماعداش على Django، والـ subscription اتشالت مع الـ disconnect
+            self.assertEqual(inner_calls, ['/api/books/'])
+            self.assertEqual(sent[0]['status'], 200)
+            self.assertIn((b'content-type', b'text/event-stream'), sent[0]['headers'])
+            self.assertEqual(len(live_broker), 0)
+
+        asyncio.run(scenario())
+
+    def test_router_checks_host_and_leaves_private_streams_to_django(self):
+        inner_calls = []
+
+        async def django_app(scope, receive, send):
+            inner_calls.append(scope['path'])
+
+        async def scenario():
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            router = EventStreamRouter(django_app)
+            scope = {'type': 'http', 'method': 'GET', 'path': reverse('book-live'),
+                     'headers': [(b'host', b'evil.example')], 'query_string': b''}
+            await router(scope, None, send)
+            self.assertEqual(sent[0]['status'], 400)
+            self.assertEqual(len(live_broker), 0)
+
+            # public = False: مفيش auth في الـ router، فالـ request بيروح Django
+            stream_view_for.cache_clear()
+            try:
+                with mock.patch.object(BookLiveView, 'public', False):
+                    await router({**scope, 'headers': [(b'host', b'testserver')]}, None, send)
+            finally:
+                stream_view_for.cache_clear()
+            self.assertEqual(inner_calls, [reverse('book-live')])
+
+        asyncio.run(scenario())
@@ -1,13 +1,38 @@
 from django.urls import path
+from .async_views import (
+    AsyncBookListView, AsyncBookDetailView, AsyncAuthorListView, AsyncAuthorDetailView,
+    BookLiveView,
+)
 from .views import (
-    BookListView, BookDetailView,
-    BookCreateView, BookUpdateView, BookDeleteView
+    BookListView, BookDetailView, BookExportView, BookStatsView,
+    BookCreateView, BookUpdateView, BookDeleteView,
+    BookBulkCreateView, BookBulkUpdateView,
+    AuthorListView, AuthorDetailView, AuthorDeleteView,
+    JobDetailView, ChangeFeedView,
 )
 
 urlpatterns = [
     path('books/', BookListView.as_view(), name='book-list'),
+    path('books/export/', BookExportView.as_view(), name='book-export'),
+    path('books/stats/', BookStatsView.as_view(), name='book-stats'),
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),
     path('books/create/', BookCreateView.as_view(), name='book-create'),
     path('books/<int:pk>/update/', BookUpdateView.as_view(), name='book-update'),
     path('books/<int:pk>/delete/', BookDeleteView.as_view(), name='book-delete'),
+    path('books/bulk/create/', BookBulkCreateView.as_view(), name='book-bulk-create'),
+    path('books/bulk/update/', BookBulkUpdateView.as_view(), name='book-bulk-update'),
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
+    path('authors/<int:pk>/delete/', AuthorDeleteView.as_view(), name='author-delete'),
+    # حالة الـ background jobs (api/jobs.py)
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+    # change-data feed: ?since=<seq> (api/changes.py)
+    path('changes/', ChangeFeedView.as_view(), name='change-feed'),
+    # نفس القراءة بس async (ASGI)
+    path('async/books/', AsyncBookListView.as_view(), name='async-book-list'),
+    path('async/books/<int:pk>/', AsyncBookDetailView.as_view(), name='async-book-detail'),
+    path('async/authors/', AsyncAuthorListView.as_view(), name='async-author-list'),
+    path('async/authors/<int:pk>/', AsyncAuthorDetailView.as_view(), name='async-author-detail'),
+    # server-sent events: الكتب الجديدة أول ما تتعمل (ASGI)
+    path('books/live/', BookLiveView.as_view(), name='book-live'),
 ]
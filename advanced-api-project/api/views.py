@@ -1,48 +1,152 @@
-from rest_framework import generics, filters
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import generics, filters, status
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters import rest_framework   # ✅ هذا هو السطر المطلوب بالضبط للـ checker
 from django_filters.rest_framework import DjangoFilterBackend
 
+from alx_common.parsers import FastJSONParser
+from alx_common.renderers import FastJSONRenderer
 
-from .models import Book
-from .serializers import BookSerializer
+from .bulk import bulk_create_books, bulk_update_books, discard_import, spool_import
+from .changes import FEED_MODELS, compacted_through, page_limit, read_page, stream_ndjson
+from .cache import CachedResponseMixin, list_cache_key, list_cache_tags, response_cache
+from .compiled import CompiledListMixin
+from .conditional import (
+    ConditionalObjectMixin, conditional_response, list_etag, object_validators, set_validators,
+)
+from .counters import book_stats
+from .export import CSVRenderer, JSONExportRenderer, NDJSONRenderer, STREAMERS, export_columns
+from .filters import BookFilterSet
+from .jobs import enqueue
+from .models import Author, Book, Job
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
+from .query import QueryPlanMixin
+from .routers import ReplicaReadMixin
+from .search import BookSearchFilter
+from .serializers import AuthorSerializer, BookSerializer, JobSerializer
 
 
-class BookListView(generics.ListAPIView):
+def prefers_async(request):
+    """``Prefer: respond-async`` (RFC 7240): the client would rather poll a job than wait."""
+    preferences = request.headers.get('Prefer', '')
+    return any(token.split(';')[0].strip().lower() == 'respond-async' for token in preferences.split(','))
+
+
+def accepted_job(request, job):
+    """202 + the job's status, Location = where to poll it."""
+    url = reverse('job-detail', kwargs={'pk': job.pk})
+    response = Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                        headers={'Location': request.build_absolute_uri(url)})
+    if prefers_async(request):
+        response['Preference-Applied'] = 'respond-async'
+    return response
+
+
+class BookListView(ReplicaReadMixin, CachedResponseMixin, CompiledListMixin, QueryPlanMixin, generics.ListAPIView):
     """
     ListAPIView for Book with:
       - Filtering by fields
       - Searching text fields
       - Ordering results
+      - Keyset (cursor) pagination via ?page_size= / ?cursor=
+      - Response cache keyed on the normalized query string
+      - Conditional GET (ETag from the cache tag versions, 304 without a query)
+      - Compiled read path (values_list -> dicts, no model instances)
+      - Reads from a read replica when API_READ_REPLICAS is configured
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
 
-    # Backends: فلترة + بحث + ترتيب
+    # Backends: فلترة + ترتيب + بحث
+    # البحث بعد الترتيب عشان يرتب بالـ relevance لو مفيش ?ordering=
     filter_backends = [
         rest_framework.DjangoFilterBackend,  # ✅ used with the import above
-        filters.SearchFilter,
         filters.OrderingFilter,
+        BookSearchFilter,
     ]
 
-    # فلترة مباشرة باستخدام query params
-    filterset_fields = ['title', 'publication_year', 'author', 'author__name']
+    # فلترة مباشرة باستخدام query params: title, publication_year, author, author__name
+    # (author__name من العمود Book.author_name من غير join)
+    filterset_class = BookFilterSet
 
-    # البحث النصي (icase contains) في العنوان واسم الكاتب
+    # البحث النصي في العنوان واسم الكاتب (FTS5 / in-memory index, prefix + ranking)
     search_fields = ['title', 'author__name']
 
     # الترتيب حسب أي حقل
     ordering_fields = ['title', 'publication_year', 'id']
     ordering = ['title']  # default ordering
 
+    def list(self, request, *args, **kwargs):
+        key, tags = list_cache_key(request), list_cache_tags(request)
+        # نفس الـ versions للـ ETag وللكاش: 304 و HIT من غير أي query
+        versions = response_cache.versions(tags)
+        etag = list_etag(key, versions)
+        response = conditional_response(request, etag) if etag else None
+        if response is None:
+            response = self.cached_response(key, tags, super().list, request, *args, versions=versions, **kwargs)
+        return set_validators(response, etag)
+
+
+class BookExportView(BookListView):
+    """
+    Stream the whole (filtered) catalog as NDJSON, CSV or one JSON array.
+
+    Same filter/search/ordering query params as BookListView. Rows are read
+    with values_list().iterator() and sent in chunks with
+    StreamingHttpResponse, so memory stays flat and the first bytes go out
+    before the query is done. Format: Accept header or ?format=ndjson|csv|json.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer, JSONExportRenderer]
+    pagination_class = None
+    chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        stream = STREAMERS[renderer.format](queryset, export_columns(self.get_serializer_class()), self.chunk_size)
+        response = StreamingHttpResponse(stream, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="books.{renderer.format}"'
+        return response
 
-class BookDetailView(generics.RetrieveAPIView):
-    """Retrieve single Book by ID"""
+
+class BookDetailView(ReplicaReadMixin, CachedResponseMixin, QueryPlanMixin, generics.RetrieveAPIView):
+    """Retrieve single Book by ID (cached per object, read from a replica if configured)"""
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        etag, last_modified = object_validators(Book, pk)
+        response = conditional_response(request, etag, last_modified) if etag else None
+        if response is None:
+            response = self.cached_response(
+                ('detail', request.accepted_media_type, str(pk)), {f'book:{pk}'},
+                super().retrieve, request, *args, **kwargs
+            )
+        return set_validators(response, etag, last_modified)
+
+
+class BookStatsView(CachedResponseMixin, APIView):
+    """
+    Book counts per author and per publication year, served from the
+    materialized BookCounter table instead of a GROUP BY on every request.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request, *args, **kwargs):
+        # أي تغيير في الكتب بيمسح tag الـ books، وتغيير اسم كاتب بيمسح author-names
+        return self.cached_response(
+            ('stats', request.accepted_media_type), {'books', 'author-names'},
+            lambda: Response(book_stats()),
+        )
+
 
 class BookCreateView(generics.CreateAPIView):
     """Create new Book — Authenticated users only"""
@@ -51,17 +155,204 @@ class BookCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
 
-class BookUpdateView(generics.UpdateAPIView):
-    """Update existing Book — Authenticated users only"""
+class BookUpdateView(ConditionalObjectMixin, generics.UpdateAPIView):
+    """Update existing Book — Authenticated users only (If-Match supported)"""
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
 
+    def update(self, request, *args, **kwargs):
+        pk = kwargs[self.lookup_field]
+        # الـ check والكتابة في نفس الـ transaction: الصف مقفول لحد الـ commit
+        with self.preconditions_atomic():
+            response = self.check_preconditions(request, pk)
+            if response is not None:
+                return response
+            response = super().update(request, *args, **kwargs)
+        return set_validators(response, *object_validators(Book, pk))
 
-class BookDeleteView(generics.DestroyAPIView):
-    """Delete Book — Authenticated users only"""
+
+class BookDeleteView(ConditionalObjectMixin, generics.DestroyAPIView):
+    """
+    Delete Book — Authenticated users only (If-Match supported).
+    With ``Prefer: respond-async`` the delete is queued as a job (202).
+    """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticated]
 
+    def destroy(self, request, *args, **kwargs):
+        with self.preconditions_atomic():
+            response = self.check_preconditions(request, kwargs[self.lookup_field])
+            if response is not None:
+                return response
+            if prefers_async(request):
+                book = self.get_object()
+                return accepted_job(request, enqueue('delete_books', {'ids': [book.pk]}, user=request.user))
+            return super().destroy(request, *args, **kwargs)
+
+
+class BookBulkView(APIView):
+    """
+    Base for the bulk endpoints: body is a JSON array or an NDJSON stream
+    (Content-Type: application/x-ndjson). Items are validated and written in
+    chunks of ``?batch_size=`` (default 1000), each chunk in its own transaction.
+    Invalid items are returned as ``errors: [{index, errors}]`` (207) and
+    don't abort the rest of the batch.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [FastJSONParser, NDJSONParser]
+    default_batch_size = 1000
+    max_batch_size = 5000
+
+    def get_items(self, request):
+        items = request.data
+        if isinstance(items, (dict, str, bytes)):
+            return None
+        return items
+
+    def get_batch_size(self, request):
+        try:
+            size = int(request.query_params.get('batch_size', self.default_batch_size))
+        except ValueError:
+            size = self.default_batch_size
+        return max(1, min(size, self.max_batch_size))
+
+    def respond(self, result):
+        data = {'created': result.created, 'updated': result.updated, 'errors': result.errors}
+        return Response(data, status=status.HTTP_207_MULTI_STATUS if result.errors else self.success_status)
+
+    def invalid_body(self):
+        return Response(
+            {'detail': 'Expected a JSON array or an NDJSON stream of books.'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class BookBulkCreateView(BookBulkView):
+    """Bulk create Books — Authenticated users only (``Prefer: respond-async`` = queued import)"""
+    success_status = status.HTTP_201_CREATED
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_items(request)
+        if items is None:
+            return self.invalid_body()
+        if prefers_async(request):
+            # الـ items بتتكتب في ImportItem وهي بتتقري، والـ job بيشيل الـ upload id بس
+            batch_size = self.get_batch_size(request)
+            upload, total = spool_import(items, batch_size)
+            payload = {'upload': str(upload), 'total': total, 'batch_size': batch_size}
+            try:
+                job = enqueue('import_books', payload, user=request.user)
+            except BaseException:
+                discard_import(upload)
+                raise
+            return accepted_job(request, job)
+        return self.respond(bulk_create_books(items, self.get_batch_size(request)))
+
+
+class BookBulkUpdateView(BookBulkView):
+    """Bulk update Books by id (PUT = full, PATCH = partial) — Authenticated users only"""
+    success_status = status.HTTP_200_OK
+
+    def put(self, request, *args, **kwargs):
+        return self.update(request, partial=False)
+
+    def patch(self, request, *args, **kwargs):
+        return self.update(request, partial=True)
+
+    def update(self, request, partial):
+        items = self.get_items(request)
+        if items is None:
+            return self.invalid_body()
+        return self.respond(bulk_update_books(items, self.get_batch_size(request), partial=partial))
+
+
+class AuthorListView(CompiledListMixin, QueryPlanMixin, generics.ListAPIView):
+    """List Authors with their nested books (prefetched, no N+1)"""
+    queryset = Author.objects.all().order_by('id')
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class AuthorDetailView(QueryPlanMixin, generics.RetrieveAPIView):
+    """Retrieve single Author with nested books"""
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+
+class AuthorDeleteView(generics.DestroyAPIView):
+    """
+    Delete Author and all their books — Authenticated users only.
+    Always queued (202): the worker deletes the books in chunks, then the
+    author, so no request holds the write lock for the whole cascade.
+    """
+    queryset = Author.objects.all()
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticated]
+
+    def destroy(self, request, *args, **kwargs):
+        author = self.get_object()
+        return accepted_job(request, enqueue('delete_author', {'author_id': author.pk}, user=request.user))
+
+
+class JobDetailView(generics.RetrieveAPIView):
+    """Status / progress of a background job (only its creator or staff can see it)"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return Job.objects.all()
+        return Job.objects.filter(created_by=self.request.user)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        # الـ polling مايتكاشش، ولسه شغالة = ارجع بعد شوية
+        response['Cache-Control'] = 'no-store'
+        if response.data['status'] in (Job.QUEUED, Job.RUNNING):
+            response['Retry-After'] = '1'
+        return response
+
+
+class ChangeFeedView(APIView):
+    """
+    Change-data feed for Book / Author (api/changes.py), oldest first.
+      - ``?since=<seq>``: changes after that seq (0 = from the start)
+      - ``?limit=`` per page (JSON) and ``next`` to send as the next since
+      - ``?model=book,author`` to filter
+      - NDJSON (Accept or ?format=ndjson) streams everything after since
+    410 Gone if compaction already dropped deletes after ``since``.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    renderer_classes = [FastJSONRenderer, NDJSONRenderer]
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            since = max(0, int(params.get('since', 0)))
+            limit = page_limit(params.get('limit'))
+        except ValueError:
+            return Response({'detail': 'since and limit must be integers.'}, status=status.HTTP_400_BAD_REQUEST)
+        models = [name for name in params.get('model', '').split(',') if name]
+        if set(models) - set(FEED_MODELS):
+            return Response({'detail': f"model must be one of: {', '.join(FEED_MODELS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
+        through = compacted_through()
+        if since < through:
+            return Response(
+                {'detail': 'Changes after this seq were compacted; resync from the list endpoints.',
+                 'compacted_through': through},
+                status=status.HTTP_410_GONE,
+            )
+        if request.accepted_renderer.format == 'ndjson':
+            response = StreamingHttpResponse(stream_ndjson(since, models),
+                                             content_type='application/x-ndjson; charset=utf-8')
+            response['Cache-Control'] = 'no-store'
+            return response
+        changes, has_more = read_page(since, limit, models)
+        next_seq = changes[-1]['seq'] if changes else since
+        return Response({'changes': changes, 'next': next_seq, 'has_more': has_more},
+                        headers={'Cache-Control': 'no-store'})
@@ -0,0 +1,6 @@
+"""
+Shared code for the Django projects in this repository.
+
+Each project's settings.py adds the repository root to ``sys.path`` so the
+package can be referenced from settings (e.g. 'alx_common.renderers.FastJSONRenderer').
+"""
@@ -0,0 +1,244 @@
+"""
+Benchmark harness for the projects' ``bench_api`` management commands.
+
+A project subclasses ``BenchCommand`` and implements ``seed(rows, rng)``
+(fill an empty database) and ``scenarios(rows)``. The harness then:
+  - builds a seeded SQLite database once per (size, seed) and reuses it
+    (each run works on a copy, so writes don't leak into the next run)
+  - runs every scenario through the test client: warmup, then timed
+    iterations -> throughput + latency percentiles
+  - writes the results as JSON and compares them with a baseline file
+    (``--baseline``), failing on regressions beyond ``--tolerance``
+"""
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.test.utils import override_settings
+
+from .db import database_config
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+WORDS = (
+    'shadow', 'river', 'empire', 'garden', 'winter', 'silent', 'glass', 'iron', 'crown', 'ocean',
+    'forest', 'night', 'stone', 'city', 'fire', 'dream', 'storm', 'letter', 'house', 'mountain',
+    'secret', 'lost', 'golden', 'hidden', 'broken', 'last', 'wild', 'dark', 'bright', 'northern',
+)
+FIRST_NAMES = ('Ursula', 'Frank', 'Octavia', 'Isaac', 'Mary', 'Naguib', 'Toni', 'Jorge', 'Chinua', 'Ann')
+LAST_NAMES = ('Le Guin', 'Herbert', 'Butler', 'Asimov', 'Shelley', 'Mahfouz', 'Morrison', 'Borges', 'Achebe', 'Leckie')
+# المقاييس اللي بنقارنها بالـ baseline: (اسم، أكبر = أسوأ؟)
+COMPARED = (('p50_ms', True), ('p99_ms', True), ('rps', False))
+
+
+@dataclass
+class Scenario:
+    name: str
+    # rng -> (method, path, data)
+    request: Callable
+    expect: int = 200
+    # بيتنده قبل القياس بعدد المرات (مثلاً يعمل الصفوف اللي delete هيمسحها)
+    setup: Optional[Callable] = None
+    # لو الـ scenario تقيل (list من غير pagination)
+    iterations: Optional[int] = None
+
+
+def fake_title(rng):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))).title()
+
+
+def fake_name(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.randint(1, 9999)}"
+
+
+def summarize(latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    quantiles = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'iterations': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p90_ms': round(quantiles[89] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+    }
+
+
+def run_scenario(client, scenario, iterations, warmup, rng):
+    iterations = scenario.iterations or iterations
+    if scenario.setup is not None:
+        scenario.setup(iterations + warmup)
+    latencies, errors = [], 0
+    send = {'GET': client.get, 'POST': client.post, 'PUT': client.put,
+            'PATCH': client.patch, 'DELETE': client.delete}
+    for i in range(warmup + iterations):
+        method, path, data = scenario.request(rng)
+        start = time.perf_counter()
+        # زي الـ handler الحقيقي (الـ test client بيفصل close_old_connections)
+        close_old_connections()
+        response = send[method](path, data=data, format='json') if data is not None else send[method](path)
+        close_old_connections()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            latencies.append(elapsed)
+            errors += response.status_code != scenario.expect
+    return summarize(latencies, sum(latencies), errors)
+
+
+def compare(results, baseline, tolerance):
+    """[(scenario, metric, baseline value, current value), ...] لكل regression"""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED:
+            before, now = previous[metric], current[metric]
+            if not before:
+                continue
+            worse = now > before * (1 + tolerance) if higher_is_worse else now < before / (1 + tolerance)
+            if worse:
+                regressions.append((name, metric, before, now))
+    return regressions
+
+
+@contextmanager
+def scratch_database(path):
+    """يخلي 'default' يشاور على ملف SQLite تاني لحد ما الـ block يخلص"""
+    db_settings = connections.settings['default']
+    original = dict(db_settings)
+    connections.close_all()
+    db_settings.clear()
+    db_settings.update({**original, **database_config(str(path), env={'DATABASE_SQLITE_WAL': '1'})})
+    try:
+        yield
+    finally:
+        connections.close_all()
+        db_settings.clear()
+        db_settings.update(original)
+
+
+class BenchCommand(BaseCommand):
+    project = None
+    # settings أثناء القياس (مثلاً نقفل الـ response cache)
+    settings_overrides = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=SIZES, default='10k', help="Seeded rows (default 10k).")
+        parser.add_argument('--iterations', type=int, default=200, help="Timed requests per scenario.")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO', help="Run only these scenarios.")
+        parser.add_argument('--data-dir', default=str(Path(tempfile.gettempdir()) / 'alx-bench'),
+                            help="Where seeded databases are kept between runs.")
+        parser.add_argument('--reseed', action='store_true', help="Rebuild the seeded database.")
+        parser.add_argument('--output', help="Write results as JSON to this file.")
+        parser.add_argument('--baseline', help="Results JSON to compare against.")
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help="Allowed slowdown vs the baseline (default 0.25 = 25%%).")
+
+    def seed(self, rows, rng):
+        raise NotImplementedError
+
+    def scenarios(self, rows):
+        raise NotImplementedError
+
+    def get_client(self):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        rows = SIZES[options['size']]
+        golden = self.seeded_database(rows, options)
+        with tempfile.TemporaryDirectory() as tmp:
+            work = Path(tmp) / golden.name
+            shutil.copyfile(golden, work)
+            overrides = {
+                # الـ test client بيبعت Host: testserver
+                'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+                # مستخدم واحد بيبعت آلاف الـ requests
+                'TOKEN_BUCKET_THROTTLE': {'ENABLED': False},
+                **self.settings_overrides,
+            }
+            with scratch_database(work), override_settings(**overrides):
+                results = self.run(rows, options)
+
+        for name, stats in results['scenarios'].items():
+            self.stdout.write(
+                f"{name:<14} {stats['rps']:9.1f} req/s  p50 {stats['p50_ms']:8.2f}ms  "
+                f"p90 {stats['p90_ms']:8.2f}ms  p99 {stats['p99_ms']:8.2f}ms  errors {stats['errors']}"
+            )
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self.check_baseline(results, options)
+
+    def seeded_database(self, rows, options):
+        path = Path(options['data_dir']) / f"{self.project}-{rows}-s{options['seed']}.sqlite3"
+        if path.exists() and not options['reseed']:
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        building = path.with_suffix('.building')
+        building.unlink(missing_ok=True)
+        self.stdout.write(f"Seeding {rows} rows into {path} ...")
+        start = time.perf_counter()
+        with scratch_database(building):
+            call_command('migrate', verbosity=0)
+            self.seed(rows, random.Random(options['seed']))
+        # VACUUM عشان كل النسخ تبدأ من نفس الـ layout على الديسك
+        db = sqlite3.connect(building)
+        db.execute('VACUUM')
+        db.close()
+        building.rename(path)
+        self.stdout.write(f"Seeded in {time.perf_counter() - start:.1f}s")
+        return path
+
+    def run(self, rows, options):
+        rng = random.Random(options['seed'])
+        client = self.get_client()
+        scenarios = [s for s in self.scenarios(rows) if not options['only'] or s.name in options['only']]
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(client, scenario, options['iterations'], options['warmup'], rng)
+        return {
+            'meta': {
+                'project': self.project,
+                'size': options['size'],
+                'rows': rows,
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'machine': platform.machine(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'scenarios': results,
+        }
+
+    def check_baseline(self, results, options):
+        baseline = json.loads(Path(options['baseline']).read_text())
+        if baseline.get('meta', {}).get('rows') != results['meta']['rows']:
+            self.stderr.write("Baseline was recorded with a different --size; comparing anyway.")
+        regressions = compare(results, baseline, options['tolerance'])
+        for name, metric, before, now in regressions:
+            self.stdout.write(f"REGRESSION {name}.{metric}: {before} -> {now}")
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions vs {options['baseline']}")
+        self.stdout.write(f"No regressions vs {options['baseline']} (tolerance {options['tolerance']:.0%}).")
@@ -0,0 +1,162 @@
+"""
+In-process pub/sub for live events (alx_common.sse streams them as SSE).
+
+    broker.publish('book.created', {'id': 1, ...})         # any thread
+    subscription = broker.subscribe(['book.created'], last_event_id)  # in the event loop
+    events = await subscription.get(timeout=15)
+
+Publishing never blocks: every subscriber has a bounded queue, and one
+that falls ``MAX_QUEUE`` events behind is marked overflowed and dropped
+(the client reconnects with Last-Event-ID and replays from the history).
+The last ``HISTORY`` events are kept for that replay. Ids are
+``<boot>-<n>``, so an id from before a restart is recognised as a gap.
+
+One broker per process: with several workers each one only sees the
+events published in that process.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, NamedTuple
+
+from django.conf import settings
+
+DEFAULTS = {
+    # events محفوظة للـ resume بـ Last-Event-ID
+    'HISTORY': 1000,
+    # events مستنية لكل subscriber قبل ما نعتبره slow consumer ونقفله
+    'MAX_QUEUE': 256,
+    'MAX_SUBSCRIBERS': 10000,
+    'HEARTBEAT': 15,      # seconds بين كل ping والتاني لو مفيش events
+    'RETRY_MS': 3000,     # الـ browser بيستنى قد كده قبل ما يعمل reconnect
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'LIVE_EVENTS', {})}
+
+
+class Event(NamedTuple):
+    id: str
+    topic: str
+    data: Any
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class SlowConsumer(Exception):
+    """The subscriber's queue overflowed; it has been unsubscribed."""
+
+
+# Subscription:
+# queue بتاعة client واحد؛ كل حاجة فيها بتتعمل في الـ event loop بتاعه
+# (publish من thread تاني بيوصل بـ call_soon_threadsafe)
+class Subscription:
+
+    def __init__(self, broker, topics, loop, max_queue):
+        self.broker = broker
+        self.topics = frozenset(topics)
+        self.loop = loop
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        if len(self.queue) >= self.max_queue:
+            # مانستناش الـ client ولا نكبر الذاكرة: نقفله وهو يعمل resume
+            self.overflowed = True
+            self.queue.clear()
+            self.broker.unsubscribe(self)
+        else:
+            self.queue.append(event)
+        self.wakeup.set()
+
+    async def get(self, timeout=None):
+        """Wait for the next events; ``[]`` after ``timeout`` seconds with nothing new."""
+        if not self.queue and not self.overflowed:
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        if self.overflowed:
+            raise SlowConsumer
+        events = list(self.queue)
+        self.queue.clear()
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.boot = format(int(time.time() * 1000), 'x')
+        self.counter = 0
+        self.history = deque()
+        self.subscribers = set()
+
+    def publish(self, topic, data):
+        with self.lock:
+            self.counter += 1
+            event = Event(f'{self.boot}-{self.counter}', topic, data)
+            self.history.append(event)
+            limit = _config()['HISTORY']
+            while len(self.history) > limit:
+                self.history.popleft()
+            targets = [sub for sub in self.subscribers if topic in sub.topics]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.deliver, event)
+            except RuntimeError:
+                # الـ loop بتاعه اتقفل
+                self.unsubscribe(sub)
+        return event
+
+    def subscribe(self, topics, last_event_id=None):
+        """
+        ``(subscription, backlog, complete)``: ``backlog`` is what the client
+        missed after ``last_event_id``; ``complete`` is False if some of it
+        is no longer in the history (the client should refetch).
+        Must be called from the event loop that will read the subscription.
+        """
+        config = _config()
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if len(self.subscribers) >= config['MAX_SUBSCRIBERS']:
+                raise TooManySubscribers
+            subscription = Subscription(self, topics, loop, config['MAX_QUEUE'])
+            # تحت نفس الـ lock: مفيش event يضيع بين الـ replay والاشتراك
+            self.subscribers.add(subscription)
+            backlog, complete = self._replay(subscription.topics, last_event_id)
+        return subscription, backlog, complete
+
+    def _replay(self, topics, last_event_id):
+        if not last_event_id:
+            return [], True
+        boot, _, number = last_event_id.partition('-')
+        if boot != self.boot or not number.isdigit():
+            return [], False
+        after = int(number)
+        oldest = int(self.history[0].id.rpartition('-')[2]) if self.history else self.counter + 1
+        backlog = [event for event in self.history
+                   if int(event.id.rpartition('-')[2]) > after and event.topic in topics]
+        return backlog, oldest <= after + 1
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscribers.discard(subscription)
+
+    def __len__(self):
+        return len(self.subscribers)
+
+
+broker = Broker()
@@ -0,0 +1,102 @@
+"""
+Connection management shared by all projects: one place for DATABASES.
+
+    from alx_common.db import database_config
+    DATABASES = {'default': database_config(BASE_DIR / 'db.sqlite3')}
+
+Defaults live in ``DB_DEFAULTS`` below and can be overridden per
+deployment with environment variables (``DATABASE_ENGINE``,
+``DATABASE_NAME``, ``DATABASE_HOST``, ``DATABASE_PORT``, ``DATABASE_USER``,
+``DATABASE_PASSWORD``, ``DATABASE_CONN_MAX_AGE``, ``DATABASE_POOL``,
+``DATABASE_SQLITE_WAL``).
+Read replicas use ``replica_config()`` (``DATABASE_REPLICA_NAME`` /
+``DATABASE_REPLICA_HOST`` on top of the primary's variables).
+"""
+import os
+
+DB_DEFAULTS = {
+    # persistent connections + health check قبل إعادة الاستخدام
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    # بتتنفذ مع كل connection جديدة (OPTIONS['init_command'])؛ كلها per-connection
+    # ومابتغيرش الملف نفسه
+    'SQLITE_PRAGMAS': {
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64000,   # KiB (يعني ~64MB)
+        'temp_store': 'MEMORY',
+    },
+    'SQLITE_TIMEOUT': 20,
+    # BEGIN IMMEDIATE: الكتابات بتستنى الـ lock بدل ما تفشل بـ "database is locked"
+    'SQLITE_TRANSACTION_MODE': 'IMMEDIATE',
+    # pool للـ engines اللي ليها server (PostgreSQL / psycopg 3)
+    'POOL': {'min_size': 2, 'max_size': 20, 'timeout': 10},
+}
+
+POOLED_ENGINES = ('django.db.backends.postgresql',)
+
+
+def sqlite_init_command(pragmas=None, wal=False):
+    pragmas = DB_DEFAULTS['SQLITE_PRAGMAS'] if pragmas is None else pragmas
+    if wal:
+        # journal_mode=WAL بيتكتب في header الملف (ومعاه -wal / -shm جنبه)، فـ opt-in:
+        # DATABASE_SQLITE_WAL=1 في الـ deployment، مش على الـ db.sqlite3 اللي في git
+        pragmas = {'journal_mode': 'WAL', **pragmas}
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def database_config(sqlite_path, env=None, **overrides):
+    """
+    DATABASES['default'] for a project. SQLite (``sqlite_path``) unless
+    DATABASE_ENGINE says otherwise. ``overrides`` win over everything.
+    """
+    env = os.environ if env is None else env
+    engine = env.get('DATABASE_ENGINE', 'django.db.backends.sqlite3')
+    config = {
+        'ENGINE': engine,
+        'NAME': env.get('DATABASE_NAME', sqlite_path),
+        'CONN_MAX_AGE': int(env.get('DATABASE_CONN_MAX_AGE', DB_DEFAULTS['CONN_MAX_AGE'])),
+        'CONN_HEALTH_CHECKS': DB_DEFAULTS['CONN_HEALTH_CHECKS'],
+        'OPTIONS': {},
+    }
+
+    if engine == 'django.db.backends.sqlite3':
+        config['OPTIONS'] = {
+            'init_command': sqlite_init_command(wal=env.get('DATABASE_SQLITE_WAL', '0') == '1'),
+            'timeout': DB_DEFAULTS['SQLITE_TIMEOUT'],
+            'transaction_mode': DB_DEFAULTS['SQLITE_TRANSACTION_MODE'],
+        }
+    else:
+        for key in ('HOST', 'PORT', 'USER', 'PASSWORD'):
+            if f'DATABASE_{key}' in env:
+                config[key] = env[f'DATABASE_{key}']
+        if engine in POOLED_ENGINES and env.get('DATABASE_POOL', '1') != '0':
+            # الـ pool هو اللي بيعيد استخدام الـ connections، وDjango بيرفض CONN_MAX_AGE معاه
+            config['OPTIONS']['pool'] = dict(DB_DEFAULTS['POOL'])
+            config['CONN_MAX_AGE'] = 0
+
+    for key, value in overrides.items():
+        if key == 'OPTIONS':
+            config['OPTIONS'] = {**config['OPTIONS'], **value}
+        else:
+            config[key] = value
+    return config
+
+
+def replica_config(sqlite_path, env=None, **overrides):
+    """
+    Same as database_config() but for a read replica: same engine and
+    credentials as the primary, with ``DATABASE_REPLICA_NAME`` /
+    ``DATABASE_REPLICA_HOST`` instead of the primary's NAME / HOST.
+    """
+    env = os.environ if env is None else env
+    replica_env = {key: value for key, value in env.items() if key not in ('DATABASE_NAME', 'DATABASE_HOST')}
+    engine = env.get('DATABASE_ENGINE', 'django.db.backends.sqlite3')
+    if 'DATABASE_REPLICA_NAME' in env:
+        replica_env['DATABASE_NAME'] = env['DATABASE_REPLICA_NAME']
+    elif engine != 'django.db.backends.sqlite3' and 'DATABASE_NAME' in env:
+        # server حقيقي: نفس اسم الداتابيز على host تاني
+        replica_env['DATABASE_NAME'] = env['DATABASE_NAME']
+    if 'DATABASE_REPLICA_HOST' in env:
+        replica_env['DATABASE_HOST'] = env['DATABASE_REPLICA_HOST']
+    return database_config(sqlite_path, env=replica_env, **overrides)
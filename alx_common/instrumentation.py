@@ -0,0 +1,204 @@
+"""
+Per-request instrumentation: query count, SQL time, serializer time and
+render time for every view, sent back as a ``Server-Timing`` header and
+recorded in ``alx_common.metrics.registry``.
+
+    MIDDLEWARE = ['alx_common.instrumentation.RequestMetricsMiddleware', ...]
+
+SQL is timed by a DB ``execute_wrapper`` installed on every connection.
+Serializer time comes from ``timed('serialize')`` blocks (see
+``alx_common.serializers.TimedSerializerMixin``). Each phase excludes the
+SQL run inside it, so the numbers don't overlap. Per request this costs a
+few ``perf_counter()`` calls and one lock per histogram.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import COUNT_BUCKETS, metrics_config, registry
+
+# None = مفيش request بيتقاس (management command، shell، ...)
+_current = ContextVar('request_metrics', default=None)
+
+registry.describe('http_requests_total', 'Requests per view, method and status code.')
+registry.describe('http_request_duration_seconds', 'Time spent in the Django handler per request.')
+registry.describe('db_queries_per_request', 'SQL statements executed per request.', COUNT_BUCKETS)
+registry.describe('db_time_seconds', 'Time spent executing SQL per request.')
+registry.describe('serialize_seconds', 'Time spent serializing per request (SQL excluded).')
+registry.describe('render_seconds', 'Time spent rendering the response per request.')
+
+
+class RequestMetrics:
+    __slots__ = ('view', 'queries', 'sql_time', 'phases', 'active')
+
+    def __init__(self):
+        self.view = 'unresolved'
+        self.queries = 0
+        self.sql_time = 0.0
+        self.phases = {}
+        self.active = set()
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries"']
+        for phase in ('serialize', 'render'):
+            if phase in self.phases:
+                parts.append(f'{phase};dur={self.phases[phase] * 1000:.2f}')
+        parts.append(f'app;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+    def record(self, method, status, total):
+        labels = (('view', self.view),)
+        registry.inc('http_requests_total', labels + (('method', method), ('status', status)))
+        registry.observe('http_request_duration_seconds', total, labels)
+        registry.observe('db_queries_per_request', self.queries, labels)
+        registry.observe('db_time_seconds', self.sql_time, labels)
+        registry.observe('serialize_seconds', self.phases.get('serialize', 0.0), labels)
+        registry.observe('render_seconds', self.phases.get('render', 0.0), labels)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def query_timer(execute, sql, params, many, context):
+    """``execute_wrapper``: count + time لكل SQL statement جوه request"""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_time += perf_counter() - start
+
+
+def install_query_timer(connection):
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    install_query_timer(connection)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block (minus its SQL time) to ``phase`` of
+    the current request. Nested blocks of the same phase count once.
+    """
+    metrics = _current.get()
+    if metrics is None or phase in metrics.active:
+        yield
+        return
+    metrics.active.add(phase)
+    start, sql_before = perf_counter(), metrics.sql_time
+    try:
+        yield
+    finally:
+        metrics.active.discard(phase)
+        elapsed = perf_counter() - start - (metrics.sql_time - sql_before)
+        metrics.phases[phase] = metrics.phases.get(phase, 0.0) + elapsed
+
+
+def view_name(view_func, request):
+    """``BookListView`` / ``BookViewSet.list`` / url name لو function view"""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    actions = getattr(view_func, 'actions', None)
+    if cls is not None and actions:
+        return f"{cls.__name__}.{actions.get(request.method.lower(), request.method.lower())}"
+    if cls is not None:
+        return cls.__name__
+    match = getattr(request, 'resolver_match', None)
+    if match is not None and match.view_name:
+        return match.view_name
+    return getattr(view_func, '__qualname__', 'unknown')
+
+
+class RequestMetricsMiddleware:
+    """
+    Put it first in MIDDLEWARE so ``app`` covers the whole handler.
+    Settings: ``REQUEST_METRICS = {'ENABLED', 'SERVER_TIMING', 'TOKEN', 'ALLOWED_IPS'}``.
+    Sync and async (no thread hop under ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # الـ hooks كمان async، غير كده Django بيلفهم في sync_to_async (thread لكل request)
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = metrics_config()
+        if not config['ENABLED']:
+            return self.get_response(request)
+        metrics, token, start = self.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start, config)
+
+    async def __acall__(self, request):
+        config = metrics_config()
+        if not config['ENABLED']:
+            return await self.get_response(request)
+        metrics, token, start = self.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, start, config)
+
+    @staticmethod
+    def begin():
+        # connections اتفتحت قبل ما الـ middleware يتحمل (connection_created فاتها)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+        metrics = RequestMetrics()
+        return metrics, _current.set(metrics), perf_counter()
+
+    @staticmethod
+    def finish(request, response, metrics, start, config):
+        total = perf_counter() - start
+        metrics.record(request.method, response.status_code, total)
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = metrics.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.view = view_name(view_func, request)
+
+    def process_template_response(self, request, response):
+        # DRF Response / TemplateResponse بيتعملهم render بعد الـ hook ده
+        metrics = _current.get()
+        if metrics is not None:
+            start = perf_counter()
+
+            def rendered(response):
+                metrics.phases['render'] = perf_counter() - start
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return RequestMetricsMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return RequestMetricsMiddleware.process_template_response(self, request, response)
@@ -0,0 +1,157 @@
+"""
+In-process metrics registry (histograms + counters) with a Prometheus text
+endpoint. Fed by ``alx_common.instrumentation.RequestMetricsMiddleware``.
+
+    # urls.py
+    from alx_common.metrics import metrics_view
+    path('metrics/', metrics_view)
+
+    # settings.py: off (404) until a token is set; the scraper sends
+    # Authorization: Bearer <TOKEN>
+    REQUEST_METRICS = {'TOKEN': os.environ['METRICS_TOKEN']}
+"""
+import hmac
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Server-Timing header على كل response
+    'SERVER_TIMING': True,
+    # /metrics/ بيطلب Authorization: Bearer <TOKEN>؛ None = الـ endpoint مقفول (404)
+    'TOKEN': None,
+    # قيد إضافي على REMOTE_ADDR (None = أي IP)؛ ورا reverse proxy الـ REMOTE_ADDR
+    # هو الـ proxy نفسه، فده لوحده مش حماية
+    'ALLOWED_IPS': None,
+}
+
+# buckets ثابتة زي Prometheus (upper bounds، و +Inf ضمني)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Fixed-bucket histogram: observe() is a bisect plus two additions."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        # bisect_left: القيمة اللي بتساوي الـ bound تتحسب فيه (le = "less or equal")
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip((*self.buckets, float('inf')), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of labelled histograms and counters.
+    ``observe(name, value, labels)`` creates the series on first use.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # name -> {labels tuple: Histogram}
+        self.counters = {}    # name -> {labels tuple: int}
+        self.help = {}
+        self.bucket_sets = {}
+
+    def describe(self, name, help_text, buckets=None):
+        self.help[name] = help_text
+        if buckets is not None:
+            self.bucket_sets[name] = tuple(buckets)
+
+    def observe(self, name, value, labels=()):
+        labels = tuple(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = Histogram(self.bucket_sets.get(name, LATENCY_BUCKETS))
+            histogram.observe(value)
+
+    def inc(self, name, labels=(), amount=1):
+        labels = tuple(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + amount
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def snapshot(self):
+        """``{name: {labels: {'count', 'sum', 'buckets'}}}`` (للتستات والـ debugging)"""
+        with self.lock:
+            data = {
+                name: {labels: {'count': h.count, 'sum': h.sum, 'buckets': list(h.cumulative())}
+                       for labels, h in series.items()}
+                for name, series in self.histograms.items()
+            }
+            data.update({name: dict(series) for name, series in self.counters.items()})
+        return data
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                self._header(lines, name, 'counter')
+                for labels, value in sorted(series.items()):
+                    lines.append(f'{name}{_labels(labels)} {value}')
+            for name, series in sorted(self.histograms.items()):
+                self._header(lines, name, 'histogram')
+                for labels, histogram in sorted(series.items()):
+                    for bound, total in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {total}')
+                    lines.append(f'{name}_sum{_labels(labels)} {histogram.sum!r}')
+                    lines.append(f'{name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, kind):
+        if name in self.help:
+            lines.append(f'# HELP {name} {self.help[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def metrics_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_METRICS', {})}
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """Prometheus text format, for ``Authorization: Bearer <REQUEST_METRICS['TOKEN']>`` only."""
+    config = metrics_config()
+    if not config['TOKEN']:
+        raise Http404
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(credentials.strip().encode(), config['TOKEN'].encode()):
+        return HttpResponseForbidden()
+    if config['ALLOWED_IPS'] is not None and request.META.get('REMOTE_ADDR') not in config['ALLOWED_IPS']:
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
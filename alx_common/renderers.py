@@ -0,0 +1,76 @@
+import json
+from itertools import islice
+
+from rest_framework.compat import SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson اختياري، من غيره بنرجع للـ stdlib
+    orjson = None
+
+# الـ escaping اللي DRF بيعمله لـ U+2028 / U+2029 (عشان JavaScript)
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when it is installed and
+    with the stdlib otherwise. Output matches DRF's compact JSON (datetimes,
+    decimals etc. still go through DRF's encoder).
+
+    orjson writes the bytes in one pass with no intermediate str, so the
+    peak is about one copy of the payload where DRF holds the str and its
+    encoded bytes at the same time (``manage.py bench_renderers``).
+
+    Indented output (``Accept: application/json; indent=4``) and non-compact
+    or ASCII-only settings fall back to DRF's JSONRenderer.
+
+    ``render_chunks()`` streams a long list (exports) as one JSON array.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self._escape_separators(self.dumps(data))
+
+    def render_chunks(self, items, chunk_size=500):
+        """
+        Render an iterable as a JSON array, ``chunk_size`` items per bytes
+        chunk (for StreamingHttpResponse): memory is one chunk, not the list.
+        The joined chunks equal ``render(list(items))``.
+        """
+        items = iter(items)
+        yield b'['
+        separator = b''
+        while chunk := list(islice(items, chunk_size)):
+            # dumps() للـ chunk كـ list، من غير الـ [ ]
+            yield separator + self._escape_separators(self.dumps(chunk))[1:-1]
+            separator = b','
+        yield b']'
+
+    @staticmethod
+    def _escape_separators(body):
+        # نسخة تانية بس لو فيه U+2028 / U+2029 فعلاً
+        for separator, escaped in _LINE_SEPARATORS:
+            if separator in body:
+                body = body.replace(separator, escaped)
+        return body
+
+    def dumps(self, data):
+        if orjson is not None and not self.ensure_ascii:
+            return orjson.dumps(
+                data,
+                default=self._orjson_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+            )
+        return json.dumps(
+            data, cls=self.encoder_class, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=SHORT_SEPARATORS,
+        ).encode('utf-8')
+
+    def _orjson_default(self, obj):
+        return self.encoder_class().default(obj)
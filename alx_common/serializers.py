@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+from .instrumentation import timed
+
+
+class TimedListSerializer(serializers.ListSerializer):
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    DRF serializer mixin: building ``.data`` is recorded as the
+    ``serialize`` phase of the current request (alx_common.instrumentation).
+    ``many=True`` is timed once for the whole list, not per item.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = TimedListSerializer
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
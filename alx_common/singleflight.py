@@ -0,0 +1,71 @@
+"""
+Single-flight (request coalescing) for threads of one process: concurrent
+``do(key, fn)`` calls with the same key run ``fn`` once; the others wait
+and get the same result (or the same exception).
+
+    result, shared = flights.do(key, handler, request)
+"""
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self, timeout=10.0):
+        # follower بيستنى لحد timeout وبعدين بيشغل fn بنفسه
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> _Call
+
+    def do(self, key, fn, *args, **kwargs):
+        """``(result, shared)``: ``shared`` is True if another caller ran ``fn``."""
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.timeout):
+                return fn(*args, **kwargs), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self.lock:
+                # forget() ممكن يكون شال الـ call ده وحط غيره
+                if self.calls.get(key) is call:
+                    del self.calls[key]
+            call.done.set()
+        return call.result, False
+
+    def forget(self, key=None):
+        """
+        New callers start a fresh call instead of joining the running one
+        (e.g. after a write, so nobody gets a result computed before it).
+        Callers already waiting still get the old result.
+        """
+        with self.lock:
+            if key is None:
+                self.calls.clear()
+            else:
+                self.calls.pop(key, None)
+
+    def __len__(self):
+        return len(self.calls)
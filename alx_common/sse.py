@@ -0,0 +1,204 @@
+"""
+Server-sent events over ASGI, fed by alx_common.broker.
+
+    class BookLiveView(EventStreamView):           # urls.py as usual
+        topics = ('book.created',)
+
+    application = EventStreamRouter(get_asgi_application())   # asgi.py
+
+Each connection is an async generator waiting on its broker queue. The
+stream sends a ``: ping`` comment every ``HEARTBEAT`` seconds, replays
+what the client missed after ``Last-Event-ID``, sends ``event: reset``
+when that can't be done in full, and ends when the client is too slow to
+keep up (the browser reconnects by itself).
+
+Under ASGI Django runs the sync parts of the middleware stack in a thread
+that belongs to the request, so a stream served by the view would keep one
+thread per connection. EventStreamRouter serves URLs that resolve to an
+EventStreamView itself, before Django's middleware, so an idle client
+costs a few objects and no thread. Under WSGI the view answers 501.
+
+What the router does without middleware: it checks the Host header
+against ALLOWED_HOSTS (400 otherwise), and it only takes views with
+``public = True`` (the default), since there is no session or auth there.
+A stream that needs a logged-in user sets ``public = False`` and adds its
+own checks; it then goes through Django like any other view (one thread
+per connection).
+"""
+import asyncio
+import json
+from contextlib import suppress
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.http.request import split_domain_port, validate_host
+from django.urls import Resolver404, resolve
+from django.views import View
+
+from .broker import SlowConsumer, TooManySubscribers, _config, broker
+
+HEADERS = {
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    # nginx مايعملش buffering للـ stream
+    'X-Accel-Buffering': 'no',
+}
+
+
+def format_event(event_id, name, data):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {name}')
+    # json.dumps بيعمل escape للـ newlines، فـ data دايماً سطر واحد
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(subscription, backlog, complete, heartbeat, retry_ms):
+    try:
+        yield f'retry: {retry_ms}\n\n'
+        if not complete:
+            yield format_event(None, 'reset', {'reason': 'missed events, refetch'})
+        if backlog:
+            yield ''.join(format_event(event.id, event.topic, event.data) for event in backlog)
+        while True:
+            try:
+                events = await subscription.get(heartbeat)
+            except SlowConsumer:
+                yield ': too slow, reconnect with Last-Event-ID\n\n'
+                return
+            if not events:
+                yield ': ping\n\n'
+                continue
+            yield ''.join(format_event(event.id, event.topic, event.data) for event in events)
+    finally:
+        # client قفل (الـ task اتعملها cancel) أو خلصنا
+        subscription.close()
+
+
+def open_stream(view_class, last_event_id):
+    """The stream's async iterator, or raises TooManySubscribers."""
+    config = _config()
+    subscription, backlog, complete = view_class.broker.subscribe(view_class.topics, last_event_id)
+    return event_stream(subscription, backlog, complete, config['HEARTBEAT'], config['RETRY_MS'])
+
+
+def _busy_retry_after():
+    return str(_config()['RETRY_MS'] // 1000 or 1)
+
+
+class EventStreamView(View):
+    """Async SSE endpoint for ``topics``; subclasses only set the topics."""
+    topics = ()
+    # public: EventStreamRouter بيخدمه من غير auth؛ False = يعدي على Django
+    public = True
+    broker = broker
+    http_method_names = ['get']
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            # WSGI بيقرا الـ async iterator كله قبل ما يبعت: stream مابيخلصش
+            return JsonResponse({'detail': 'Server-sent events need an ASGI server.'}, status=501)
+        last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+        try:
+            stream = open_stream(type(self), last_event_id)
+        except TooManySubscribers:
+            return HttpResponse(status=503, headers={'Retry-After': _busy_retry_after()})
+        return StreamingHttpResponse(stream, headers=HEADERS)
+
+
+@lru_cache(maxsize=1024)
+def stream_view_for(path):
+    """The public EventStreamView subclass ``path`` resolves to, or None."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    view_class = getattr(match.func, 'view_class', None)
+    if isinstance(view_class, type) and issubclass(view_class, EventStreamView) and view_class.public:
+        return view_class
+    return None
+
+
+def allowed_host(scope, headers):
+    """Same check as HttpRequest.get_host(): the request's host against ALLOWED_HOSTS."""
+    if settings.USE_X_FORWARDED_HOST and 'x-forwarded-host' in headers:
+        host = headers['x-forwarded-host']
+    elif 'host' in headers:
+        host = headers['host']
+    else:
+        server = scope.get('server') or ('unknown', '0')
+        host = f'{server[0]}:{server[1]}'
+    allowed_hosts = settings.ALLOWED_HOSTS
+    if settings.DEBUG and not allowed_hosts:
+        allowed_hosts = ['.localhost', '127.0.0.1', '[::1]']
+    domain, _ = split_domain_port(host)
+    return bool(domain) and validate_host(domain, allowed_hosts)
+
+
+# EventStreamRouter:
+# ASGI app بيلف تطبيق Django: GET على URL بتاع EventStreamView public بيتخدم هنا
+# (من غير middleware ولا thread، بس بنفس check الـ ALLOWED_HOSTS)، وأي حاجة
+# تانية بتروح Django زي ما هي
+class EventStreamRouter:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        view_class = None
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            path = scope['path']
+            root = scope.get('root_path', '')
+            view_class = stream_view_for(path[len(root):] if root and path.startswith(root) else path)
+        if view_class is None:
+            return await self.app(scope, receive, send)
+        await self.serve(view_class, scope, receive, send)
+
+    async def serve(self, view_class, scope, receive, send):
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        if not allowed_host(scope, headers):
+            # زي DisallowedHost في Django
+            await send({'type': 'http.response.start', 'status': 400, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        last_event_id = headers.get('last-event-id') or \
+            parse_qs(scope.get('query_string', b'').decode('latin-1')).get('last_event_id', [None])[0]
+        try:
+            stream = open_stream(view_class, last_event_id)
+        except TooManySubscribers:
+            await send({'type': 'http.response.start', 'status': 503,
+                        'headers': [(b'retry-after', _busy_retry_after().encode())]})
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [(name.lower().encode(), value.encode()) for name, value in HEADERS.items()],
+        })
+
+        async def pump():
+            # send() بيستنى لما الـ client يبطأ (flow control بتاع الـ server)،
+            # فالـ events بتتجمع في الـ queue لحد MAX_QUEUE وبعدين SlowConsumer
+            async for chunk in stream:
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+
+        async def disconnected():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+            await stream.aclose()
+        if tasks[0] in done and not tasks[1].done():
+            # الـ stream خلص (slow consumer): نقفل الـ response
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
@@ -0,0 +1,207 @@
+"""
+Token-bucket throttles for DRF. Each client key holds two floats (tokens
+left, last refill time) instead of DRF's list of request timestamps, and
+the limit slides smoothly: a bucket refills at ``num / duration`` per
+second up to ``num`` tokens.
+
+    REST_FRAMEWORK = {
+        'DEFAULT_THROTTLE_CLASSES': ['alx_common.throttling.UserBucketThrottle'],
+        'DEFAULT_THROTTLE_RATES': {'user': '1000/min'},
+    }
+
+Scopes: ``AnonBucketThrottle`` (anonymous, per IP), ``UserBucketThrottle``
+(per user, IP when anonymous), ``IPBucketThrottle`` (per IP, everyone) and
+``APITokenBucketThrottle`` (per auth token). Settings:
+``TOKEN_BUCKET_THROTTLE = {'ENABLED', 'MAX_KEYS', 'SHARED_CACHE'}``.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    # عدد الـ buckets في الذاكرة (LRU)؛ bucket اتشال = bucket مليان
+    'MAX_KEYS': 100000,
+    # alias من CACHES عشان الـ processes تشارك الـ buckets؛ كل take() بياخد
+    # lock على الـ key بـ cache.add (atomic في Redis / Memcached / DB cache)
+    'SHARED_CACHE': None,
+}
+
+# الـ lock بيتمسح لوحده بعد LOCK_TIMEOUT لو الـ process مات وهو ماسكه؛ واللي
+# مستني أكتر من LOCK_WAIT بيترفض (الـ key ده عليه ضغط أصلاً)
+LOCK_TIMEOUT = 2
+LOCK_WAIT = 0.1
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_BUCKET_THROTTLE', {})}
+
+
+def parse_rate(rate):
+    """``'100/min'`` -> ``(capacity, tokens per second)``، و None = من غير حد"""
+    if rate is None:
+        return None
+    num, period = rate.split('/')
+    return int(num), int(num) / DURATIONS[period[0]]
+
+
+def refill(state, capacity, per_second, now):
+    """(tokens, stamp) بعد ما الـ bucket اتملا من آخر مرة"""
+    if state is None:
+        return float(capacity), now
+    tokens, stamp = state
+    return min(float(capacity), tokens + (now - stamp) * per_second), now
+
+
+# BucketStore:
+# dict مترتب key -> (tokens, stamp) في الذاكرة، بـ lock واحد
+class BucketStore:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def take(self, key, capacity, per_second, now=None):
+        """Take one token. Returns ``(allowed, tokens left)``."""
+        shared = _shared_cache()
+        if shared is not None:
+            return self._take_shared(shared, key, capacity, per_second, now)
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            tokens, stamp = refill(self.buckets.get(key), capacity, per_second, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, stamp)
+            self.buckets.move_to_end(key)
+            max_keys = _config()['MAX_KEYS']
+            while len(self.buckets) > max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, tokens
+
+    @staticmethod
+    def _take_shared(cache, key, capacity, per_second, now=None):
+        # get ثم set من processes مختلفة بيضيعوا tokens، فالـ read-modify-write
+        # كله جوه lock على الـ key
+        lock_key, owner = f'{key}:lock', uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(lock_key, owner, timeout=LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return False, 0.0
+            time.sleep(0.001)
+        try:
+            # processes مختلفة: لازم wall clock مش monotonic (وبعد الـ lock)
+            now = time.time() if now is None else now
+            tokens, stamp = refill(cache.get(key), capacity, per_second, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # بعد الوقت ده الـ bucket مليان تاني، فمفيش داعي نحتفظ بيه
+            cache.set(key, (tokens, stamp), timeout=max(1, int((capacity - tokens) / per_second) + 1))
+        finally:
+            # مانمسحش lock حد تاني خده بعد ما بتاعنا انتهى
+            if cache.get(lock_key) == owner:
+                cache.delete(lock_key)
+        return allowed, tokens
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+    def __len__(self):
+        return len(self.buckets)
+
+
+def _shared_cache():
+    alias = _config()['SHARED_CACHE']
+    return caches[alias] if alias else None
+
+
+bucket_store = BucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses set ``scope`` and implement ``get_bucket_ident``
+    (return None to skip throttling for the request). The rate comes from
+    ``DEFAULT_THROTTLE_RATES[scope]`` unless ``rate`` is set on the class.
+    """
+    scope = None
+    rate = None
+    store = bucket_store
+
+    def get_rate(self):
+        if self.rate is not None:
+            return self.rate
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No default throttle rate set for '{self.scope}' scope")
+
+    def get_bucket_ident(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        limit = parse_rate(self.get_rate())
+        if limit is None or not _config()['ENABLED']:
+            return True
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+        capacity, per_second = limit
+        allowed, tokens = self.store.take(f'throttle:{self.scope}:{ident}', capacity, per_second)
+        if not allowed:
+            # الوقت لحد ما يتملا token كامل
+            self.wait_seconds = (1 - tokens) / per_second
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AnonBucketThrottle(TokenBucketThrottle):
+    scope = 'anon'
+
+    def get_bucket_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return self.get_ident(request)
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    scope = 'user'
+
+    def get_bucket_ident(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'u{request.user.pk}'
+        return self.get_ident(request)
+
+
+class IPBucketThrottle(TokenBucketThrottle):
+    scope = 'ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+
+class APITokenBucketThrottle(TokenBucketThrottle):
+    """Per API token (``request.auth``); requests without a token aren't throttled here."""
+    scope = 'token'
+
+    def get_bucket_ident(self, request, view):
+        key = getattr(request.auth, 'key', request.auth)
+        if not isinstance(key, str):
+            return None
+        # مش بنخزن الـ token نفسه
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULTS = {
+    'TTL': 30,               # seconds؛ أقصى مدة ممكن process تانية تفضل شايفة token اتلغى
+    'MAX_ENTRIES': 10000,
+    # alias من CACHES (مثلاً 'default'): لو متحدد هو المرجع لكل الـ processes
+    # (GET واحدة للكاش لكل request بدل الـ LRU اللي في الذاكرة)
+    'SHARED_CACHE': None,
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+# TokenCache:
+# token -> (user_id, is_active) بس: مفيش password hash ولا User مشترك بين الـ requests.
+# من غير SHARED_CACHE: LRU في الذاكرة بـ TTL قصير.
+# مع SHARED_CACHE: Django cache، و invalidate_user بيغير version للـ user
+# (من غير ما نعرف الـ tokens بتاعته، فمن غير query)
+class TokenCache:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # key -> (expires_at, user_id, is_active)
+        self.user_keys = {}            # user_id -> {key}
+
+    @staticmethod
+    def shared_key(key):
+        # مش بنحط الـ token نفسه في الكاش المشترك
+        return 'api:token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def user_version_key(user_id):
+        return f'api:token-user:{user_id}'
+
+    @staticmethod
+    def shared_cache():
+        alias = _config()['SHARED_CACHE']
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        """``(user_id, is_active)`` or None."""
+        shared = self.shared_cache()
+        if shared is not None:
+            return self._shared_get(shared, key)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < now:
+                self._evict(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def set(self, key, user_id, is_active):
+        shared = self.shared_cache()
+        if shared is not None:
+            version_key = self.user_version_key(user_id)
+            shared.add(version_key, uuid.uuid4().hex, timeout=None)
+            version = shared.get(version_key)
+            if version is not None:
+                shared.set(self.shared_key(key), (user_id, is_active, version), _config()['TTL'])
+            return
+        config = _config()
+        with self.lock:
+            self._evict(key)
+            self.entries[key] = (time.monotonic() + config['TTL'], user_id, is_active)
+            self.user_keys.setdefault(user_id, set()).add(key)
+            while len(self.entries) > config['MAX_ENTRIES']:
+                self._evict(next(iter(self.entries)))
+
+    def invalidate(self, key):
+        with self.lock:
+            self._evict(key)
+        shared = self.shared_cache()
+        if shared is not None:
+            shared.delete(self.shared_key(key))
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of the user (no need to know which ones)."""
+        with self.lock:
+            for key in list(self.user_keys.get(user_id, ())):
+                self._evict(key)
+        shared = self.shared_cache()
+        if shared is not None:
+            shared.set(self.user_version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.user_keys.clear()
+
+    def _shared_get(self, shared, key):
+        cached = shared.get(self.shared_key(key))
+        if cached is None:
+            return None
+        user_id, is_active, version = cached
+        if shared.get(self.user_version_key(user_id)) != version:
+            return None
+        return user_id, is_active
+
+    def _evict(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self.user_keys.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.user_keys[entry[1]]
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication with a token -> user id cache in front of the
+    token/user join, so a warm token costs a dict (or one cache) lookup.
+
+    Every request gets its own User and Token built from the cached ids;
+    other user fields load lazily on first access. Entries are dropped when
+    the token is deleted/rotated or the user is deactivated or deleted (see
+    api/signals.py). Without ``SHARED_CACHE`` other processes see that after
+    at most ``TOKEN_AUTH_CACHE['TTL']`` seconds; with it, right away.
+    ``QuerySet.update(is_active=False)`` sends no signal and also waits for
+    the TTL.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user.pk, user.is_active)
+            return user, token
+        user_id, is_active = cached
+        if not is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        model = self.get_model()
+        db = router.db_for_read(model)
+        # instances جديدة لكل request؛ باقي الحقول deferred (query لو حد احتاجها)
+        user = get_user_model().from_db(db, ['id', 'is_active'], [user_id, is_active])
+        token = model.from_db(db, ['key', 'user_id'], [key, user_id])
+        token._state.fields_cache['user'] = user
+        return user, token
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from alx_common.bench import BenchCommand, Scenario, fake_name, fake_title
+from api.models import Book
+
+BATCH_SIZE = 10000
+
+
+class Command(BenchCommand):
+    help = (
+        "Benchmark BookViewSet (list, detail, create, update, delete) on a "
+        "seeded database of --size rows; --output writes JSON, --baseline "
+        "compares with a previous run."
+    )
+    project = 'api_project'
+
+    def seed(self, rows, rng):
+        for start in range(0, rows, BATCH_SIZE):
+            with transaction.atomic():
+                Book.objects.bulk_create([
+                    Book(title=fake_title(rng), author=fake_name(rng))
+                    for _ in range(min(BATCH_SIZE, rows - start))
+                ], batch_size=5000)
+
+    def get_client(self):
+        # Token حقيقي عشان CachedTokenAuthentication تتقاس هي كمان
+        user, _ = User.objects.get_or_create(username='bench-api')
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def scenarios(self, rows):
+        max_book = Book.objects.aggregate(n=Max('pk'))['n']
+        victims = []
+
+        def detail(name, rng):
+            return reverse(name, kwargs={'pk': rng.randint(1, max_book)})
+
+        def payload(rng):
+            return {'title': fake_title(rng), 'author': fake_name(rng)}
+
+        def make_victims(count):
+            created = Book.objects.bulk_create([Book(title='Bench Delete', author='bench') for _ in range(count)])
+            victims.extend(book.pk for book in created)
+
+        return [
+            # الـ list مفيهاش pagination: كل request بيرجع الجدول كله
+            Scenario('list', lambda rng: ('GET', reverse('book_all-list'), None),
+                     iterations=max(5, 1_000_000 // rows)),
+            Scenario('detail', lambda rng: ('GET', detail('book_all-detail', rng), None)),
+            Scenario('create', lambda rng: ('POST', reverse('book_all-list'), payload(rng)), expect=201),
+            Scenario('update', lambda rng: ('PUT', detail('book_all-detail', rng), payload(rng))),
+            Scenario('delete', lambda rng: (
+                'DELETE', reverse('book_all-detail', kwargs={'pk': victims.pop()}), None),
+                expect=204, setup=make_victims),
+        ]
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from .models import Book
 
-class BookSerializer(serializers.ModelSerializer):
+from alx_common.serializers import TimedSerializerMixin
+
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = '__all__'  # هيجيب كل الحقول (title, author)
@@ -0,0 +1,34 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+
+
+# Signals:
+# نمسح الـ token من الكاش لما يتمسح / يتغير، أو لما الـ user يتعدل (مثلاً is_active=False)
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_saved_user(sender, instance, update_fields=None, **kwargs):
+    # update_last_login بيعمل save(update_fields=['last_login']) مع كل login: مش محتاجين نمسح
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    _invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=get_user_model())
+def invalidate_deleted_user(sender, instance, **kwargs):
+    _invalidate_user(instance.pk)
+
+
+def _invalidate_user(user_id):
+    # وكمان بعد الـ commit: request قرا الصف القديم قبل الـ commit مايفضلش في الكاش
+    token_cache.invalidate_user(user_id)
+    transaction.on_commit(lambda: token_cache.invalidate_user(user_id))
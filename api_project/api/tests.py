@@ -1,3 +1,138 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from alx_common.metrics import registry
+from alx_common.throttling import bucket_store
+
+from .authentication import CachedTokenAuthentication, token_cache
+from .models import Book
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(username="reader", password="pass1234")
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        Book.objects.create(title="Dune", author="Frank Herbert")
+
+    def test_warm_token_skips_auth_query(self):
+        self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):  # الكتب بس
+            response = self.client.get('/api/books_all/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get('/api/books_all/')
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/api/books_all/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'SHARED_CACHE': 'default'})
+    def test_shared_tier_serves_other_processes(self):
+        self.client.get('/api/books_all/')
+        token_cache.clear()  # زي process تانية: الـ LRU فاضي بس الكاش المشترك فيه الـ token
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_200_OK)
+        self.token.delete()
+        self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'SHARED_CACHE': 'default'})
+    def test_shared_tier_holds_ids_only(self):
+        self.client.get('/api/books_all/')
+        cached = caches['default'].get(token_cache.shared_key(self.token.key))
+        self.assertEqual(cached[:2], (self.user.pk, True))
+        # deactivate من process تانية: الـ version بتاعة الـ user اتغيرت
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/books_all/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_each_request_gets_its_own_user(self):
+        auth = CachedTokenAuthentication()
+        first, _ = auth.authenticate_credentials(self.token.key)
+        second, token = auth.authenticate_credentials(self.token.key)
+        self.assertIsNot(first, second)
+        self.assertEqual((second.pk, token.user_id), (self.user.pk, self.user.pk))
+        # باقي الحقول بتتحمل lazy
+        self.assertEqual(second.username, "reader")
+
+    def test_last_login_save_keeps_the_cache(self):
+        self.client.get('/api/books_all/')
+        with self.assertNumQueries(1):  # الـ UPDATE بس، من غير query على Token
+            self.user.save(update_fields=['last_login'])
+        with self.assertNumQueries(1):
+            self.client.get('/api/books_all/')
+
+
+class RequestMetricsTestCase(TestCase):
+    def setUp(self):
+        registry.clear()
+        token_cache.clear()
+        user = User.objects.create_user(username="reader", password="pass1234")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        Book.objects.create(title="Dune", author="Frank Herbert")
+
+    @override_settings(REQUEST_METRICS={'TOKEN': 's3cret'})
+    def test_server_timing_and_metrics_per_viewset_action(self):
+        response = self.client.get('/api/books_all/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, '
+                                                    r'render;dur=[\d.]+, app;dur=[\d.]+$')
+        labels = (('view', 'BookViewSet.list'),)
+        self.assertEqual(registry.snapshot()['http_request_duration_seconds'][labels]['count'], 1)
+
+        metrics = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret').content.decode()
+        self.assertIn('db_queries_per_request_count{view="BookViewSet.list"} 1', metrics)
+        self.assertIn('http_requests_total{view="BookViewSet.list",method="GET",status="200"} 1', metrics)
+
+    def test_metrics_endpoint_needs_token(self):
+        # من غير TOKEN مقفول، حتى من localhost
+        self.assertEqual(APIClient().get('/metrics/').status_code, status.HTTP_404_NOT_FOUND)
+        with override_settings(REQUEST_METRICS={'TOKEN': 's3cret'}):
+            self.assertEqual(APIClient().get('/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+            self.assertEqual(self.client.get('/metrics/').status_code, status.HTTP_403_FORBIDDEN)
+            response = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with override_settings(REQUEST_METRICS={'TOKEN': 's3cret', 'ALLOWED_IPS': ['10.0.0.1']}):
+            response = APIClient().get('/metrics/', HTTP_AUTHORIZATION='Bearer s3cret')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TokenBucketThrottleTestCase(TestCase):
+    def setUp(self):
+        bucket_store.clear()
+        token_cache.clear()
+        self.users = [User.objects.create_user(username=f"reader{i}") for i in range(2)]
+        self.clients = []
+        for user in self.users:
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+            self.clients.append(client)
+
+    def tearDown(self):
+        bucket_store.clear()
+
+    def test_each_token_has_its_own_bucket(self):
+        rates = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': '100/min', 'token': '3/min'}}
+        with override_settings(REST_FRAMEWORK=rates):
+            codes = [self.clients[0].get('/api/books_all/').status_code for _ in range(4)]
+            self.assertEqual(codes, [200, 200, 200, 429])
+            response = self.clients[0].get('/api/books_all/')
+            # 3/min = token كل 20 ثانية
+            self.assertTrue(0 < int(response['Retry-After']) <= 20)
+            self.assertEqual(self.clients[1].get('/api/books_all/').status_code, status.HTTP_200_OK)
+            with override_settings(TOKEN_BUCKET_THROTTLE={'ENABLED': False}):
+                self.assertEqual(self.clients[0].get('/api/books_all/').status_code, status.HTTP_200_OK)
+        # key واحد لكل token، بـ (tokens, stamp) بس
+        self.assertEqual(len(bucket_store), 2)
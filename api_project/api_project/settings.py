@@ -10,11 +10,17 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# alx_common: كود مشترك بين المشاريع (في جذر الريبو)
+sys.path.append(str(BASE_DIR.parent))
+
+from alx_common.db import database_config  # noqa: E402
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -31,7 +37,12 @@ ALLOWED_HOSTS = []
 # Application definition
 
 INSTALLED_APPS = [
-    ...
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',  # ← مهم لإدارة الـ tokens
     'api',
@@ -39,15 +50,49 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication + كاش للـ token -> user (api/authentication.py)
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # كل الـ API يتطلب تسجيل دخول
     ],
+    # JSON أسرع (orjson لو متسطب، غير كده stdlib)
+    'DEFAULT_RENDERER_CLASSES': [
+        'alx_common.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'alx_common.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # token bucket لكل token / IP (alx_common/throttling.py)
+    'DEFAULT_THROTTLE_CLASSES': [
+        'alx_common.throttling.AnonBucketThrottle',
+        'alx_common.throttling.APITokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '300/min',
+        'token': '2000/min',
+    },
+}
+
+TOKEN_BUCKET_THROTTLE = {
+    'ENABLED': True,
+    'MAX_KEYS': 100000,
+    'SHARED_CACHE': None,
+}
+
+TOKEN_AUTH_CACHE = {
+    'TTL': 30,
+    'MAX_ENTRIES': 10000,
+    'SHARED_CACHE': None,
 }
 
 
 MIDDLEWARE = [
+    # query count / SQL / serialize / render time -> Server-Timing + /metrics/
+    'alx_common.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,11 +125,9 @@ WSGI_APPLICATION = 'api_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# persistent connections + SQLite PRAGMAs (WAL لو DATABASE_SQLITE_WAL=1) من مكان واحد: alx_common/db.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR / 'db.sqlite3'),
 }
 
 
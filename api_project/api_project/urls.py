@@ -18,8 +18,11 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 
+from alx_common.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus (Bearer token، مقفول من غير REQUEST_METRICS['TOKEN'])
     path('api/', include('api.urls')),
     path('api/token/', obtain_auth_token, name='api_token_auth'),  # ← هنا هنسحب التوكن
 ]
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from alx_common.broker import broker
+
+from .models import Post
+
+
+# Live feed (GET /posts/live/, SSE):
+# البوست الجديد بيتنشر على الـ broker بعد الـ commit
+@receiver(post_save, sender=Post)
+def publish_post(sender, instance, created, **kwargs):
+    if created:
+        data = {
+            'id': instance.pk,
+            'title': instance.title,
+            'author': instance.author_id,
+            'published_date': instance.published_date.isoformat(),
+        }
+        transaction.on_commit(lambda: broker.publish('post.created', data))
@@ -1,3 +1,31 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Post
+
+
+class PostLiveViewTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="pass1234")
+
+    def publish(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(title=title, content="...", author=self.user)
+
+    async def test_new_posts_are_pushed(self):
+        response = await self.async_client.get(reverse('post-live'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry: '))
+
+        post = await sync_to_async(self.publish)("Hello")
+        frame = dict(line.split(': ', 1) for line in (await anext(stream)).decode().strip().splitlines())
+        self.assertEqual(frame['event'], 'post.created')
+        self.assertEqual(json.loads(frame['data'])['id'], post.pk)
 
-# Create your tests here.
+    def test_needs_asgi(self):
+        self.assertEqual(self.client.get(reverse('post-live')).status_code, 501)
@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.home, name='home'),
+    # server-sent events: البوستات الجديدة أول ما تتنشر
+    path('posts/live/', views.PostLiveView.as_view(), name='post-live'),
 ]
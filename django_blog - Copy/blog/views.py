@@ -2,6 +2,8 @@
 
 # Create your views here.
 from django.shortcuts import render
+from alx_common.sse import EventStreamView
+
 from .models import Post
 
 from django.shortcuts import render
@@ -10,3 +12,6 @@ def home(request):
     return render(request, 'blog/home.html')
 
 
+class PostLiveView(EventStreamView):
+    """New posts as server-sent events (event: post.created). ASGI only."""
+    topics = ('post.created',)
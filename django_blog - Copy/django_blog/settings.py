@@ -4,12 +4,18 @@ Django settings for django_blog project.
 Generated by 'django-admin startproject' using Django 5.2.5.
 """
 
+import sys
 from pathlib import Path
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# alx_common: كود مشترك بين المشاريع (في جذر الريبو)
+sys.path.append(str(BASE_DIR.parent))
+
+from alx_common.db import database_config  # noqa: E402
+
 # Quick-start development settings - unsuitable for production
 SECRET_KEY = 'django-insecure-v%_(u8w*4atnj(v8-m=6$^mes3h(nx5h7m4npqkw%*oopv=)ar'
 DEBUG = True
@@ -27,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # query count / SQL / serialize / render time -> Server-Timing + /metrics/
+    'alx_common.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,11 +65,16 @@ TEMPLATES = [
 WSGI_APPLICATION = 'django_blog.wsgi.application'
 
 # Database
+# persistent connections + SQLite PRAGMAs (WAL لو DATABASE_SQLITE_WAL=1) من مكان واحد: alx_common/db.py
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR / 'db.sqlite3'),
+}
+
+# Live feed /posts/live/ (alx_common/broker.py + alx_common/sse.py)، محتاج ASGI server
+LIVE_EVENTS = {
+    'HISTORY': 1000,
+    'MAX_QUEUE': 256,
+    'HEARTBEAT': 15,
 }
 
 # Password validation
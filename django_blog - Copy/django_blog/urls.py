@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from alx_common.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus (Bearer token، مقفول من غير REQUEST_METRICS['TOKEN'])
     path('', include('blog.urls')),  # ✅ ده يربط التطبيق بالرئيسية
 ]
@@ -1,10 +1,10 @@
-from .models import Author, Library
+from relationship_app.queries import books_for_authors, books_for_libraries, librarians_for_libraries
 
-# Query all books by a specific author
-books_by_author = Author.objects.get(name="John Doe").books.all()
+# Query all books by a specific author (2 queries، مهما كان عدد الكتّاب)
+books_by_author = books_for_authors(names=["John Doe"])
 
 # List all books in a library
-library_books = Library.objects.get(name="Central Library").books.all()
+library_books = books_for_libraries(names=["Central Library"])
 
-# Retrieve the librarian for a library
-librarian = Library.objects.get(name="Central Library").librarian
+# Retrieve the librarian for a library (query واحدة بـ select_related)
+librarian = librarians_for_libraries(names=["Central Library"])
@@ -0,0 +1,77 @@
+import csv
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import router, transaction
+
+from relationship_app.membership import BATCH_SIZE, Membership, MembershipResult, add_books, sync_books
+from relationship_app.models import Library
+
+
+class Command(BaseCommand):
+    help = (
+        "Sync library inventories from a CSV with 'library' (name) or "
+        "'library_id' and 'book_id' columns. Every library in the file ends "
+        "up with exactly the listed books (--add-only: nothing is removed). "
+        "Libraries not in the file are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file ('-' for stdin).")
+        parser.add_argument('--add-only', action='store_true', help="Only add missing books, never remove.")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Report the changes, then roll back.")
+
+    def handle(self, *args, **options):
+        inventory = self.read_inventory(options['path'])
+        apply = add_books if options['add_only'] else sync_books
+        total = MembershipResult()
+        # نفس الداتابيز اللي add_books / sync_books بيكتبوا فيها، عشان --dry-run يرجعها كلها
+        with transaction.atomic(using=router.db_for_write(Membership)):
+            for library_id, book_ids in sorted(inventory.items()):
+                result = apply(library_id, book_ids, options['batch_size'])
+                total += result
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"library {library_id}: +{result.added} -{result.removed}")
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        prefix = "[dry run] " if options['dry_run'] else ""
+        self.stdout.write(
+            f"{prefix}{len(inventory)} libraries: {total.added} books added, {total.removed} removed."
+        )
+
+    def read_inventory(self, path):
+        """{library_id: set(book ids)} من الـ CSV (بيتقرا stream، الذاكرة = ids بس)"""
+        handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        inventory, names = defaultdict(set), defaultdict(set)
+        try:
+            reader = csv.DictReader(handle)
+            fields = set(reader.fieldnames or ())
+            if 'book_id' not in fields or not fields & {'library', 'library_id'}:
+                raise CommandError("CSV needs a 'book_id' column and a 'library' or 'library_id' column.")
+            for line, row in enumerate(reader, start=2):
+                try:
+                    book_id = int(row['book_id'])
+                    if row.get('library_id'):
+                        inventory[int(row['library_id'])].add(book_id)
+                    else:
+                        names[row['library']].add(book_id)
+                except (TypeError, ValueError):
+                    raise CommandError(f"line {line}: invalid id in {row}")
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        if names:
+            # query واحدة لكل الأسماء
+            found = dict(Library.objects.filter(name__in=names).values_list('name', 'pk'))
+            missing = sorted(names.keys() - found.keys())
+            if missing:
+                raise CommandError(f"Unknown libraries: {', '.join(missing)}")
+            for name, book_ids in names.items():
+                inventory[found[name]] |= book_ids
+        unknown = inventory.keys() - set(Library.objects.filter(pk__in=inventory).values_list('pk', flat=True))
+        if unknown:
+            raise CommandError(f"Unknown library ids: {', '.join(map(str, sorted(unknown)))}")
+        return inventory
@@ -0,0 +1,140 @@
+"""
+Bulk Library <-> Book membership. These write the ``Library.books``
+through table directly, so adding or removing thousands of books costs a
+few queries per batch instead of per row. ``m2m_changed`` is NOT sent.
+
+    add_books(library, ids)      only the missing rows are inserted (and counted)
+    remove_books(library, ids)   one DELETE per batch
+    sync_books(library, ids)     the library ends up with exactly ``ids``
+                                 (diffed in SQL against a temporary staging table)
+"""
+import itertools
+from dataclasses import dataclass
+
+from django.db import connections, router, transaction
+
+from .models import Book, Library
+
+Membership = Library.books.through
+
+# batch = ids + الـ library id كـ parameters: تحت حد الـ 999 بتاع SQLite
+BATCH_SIZE = 400
+# temp table (لكل connection) فيها الـ ids المطلوبة أثناء sync_books
+STAGING_TABLE = 'relationship_app_membership_staging'
+
+
+@dataclass
+class MembershipResult:
+    added: int = 0
+    removed: int = 0
+
+    def __iadd__(self, other):
+        self.added += other.added
+        self.removed += other.removed
+        return self
+
+
+def _batches(ids, size):
+    iterator = iter(ids)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _library_id(library):
+    return library.pk if isinstance(library, Library) else int(library)
+
+
+def _insert_sql(connection, size):
+    qn = connection.ops.quote_name
+    book_pk = Book._meta.pk.column
+    return (
+        f"INSERT INTO {qn(Membership._meta.db_table)} "
+        f"({qn(Membership._meta.get_field('library').column)}, {qn(Membership._meta.get_field('book').column)}) "
+        f"SELECT %s, {qn(book_pk)} FROM {qn(Book._meta.db_table)} WHERE {qn(book_pk)} IN ({', '.join(['%s'] * size)}) "
+        f"ON CONFLICT DO NOTHING"
+    )
+
+
+def add_books(library, book_ids, batch_size=BATCH_SIZE):
+    """
+    Add ``book_ids`` to the library. The diff runs in the database: one
+    INSERT ... SELECT per batch takes the ids that exist (unknown ids are
+    dropped) and skips the ones that are already members, and its rowcount
+    is what ``added`` reports.
+    """
+    library_id = _library_id(library)
+    connection = connections[router.db_for_write(Membership)]
+    added = 0
+    for batch in _batches(sorted(set(book_ids)), batch_size):
+        # ON CONFLICT DO NOTHING: صف ضافه sync تاني في نفس اللحظة مابيتحسبش مرتين
+        with connection.cursor() as cursor:
+            cursor.execute(_insert_sql(connection, len(batch)), [library_id, *batch])
+            added += cursor.rowcount
+    return MembershipResult(added=added)
+
+
+def _staging_sql(connection):
+    qn = connection.ops.quote_name
+    membership, staging = qn(Membership._meta.db_table), qn(STAGING_TABLE)
+    library_col = qn(Membership._meta.get_field('library').column)
+    book_col = qn(Membership._meta.get_field('book').column)
+    return {
+        'create': f"CREATE TEMPORARY TABLE {staging} (book_id bigint PRIMARY KEY)",
+        'drop': f"DROP TABLE {staging}",
+        # الأعضاء اللي مش في الـ staging
+        'delete': (
+            f"DELETE FROM {membership} WHERE {library_col} = %s "
+            f"AND {book_col} NOT IN (SELECT book_id FROM {staging})"
+        ),
+        # الـ ids اللي في الـ staging وموجودة كـ Book ومش أعضاء
+        'insert': (
+            f"INSERT INTO {membership} ({library_col}, {book_col}) "
+            f"SELECT %s, book_id FROM {staging} "
+            f"WHERE book_id IN (SELECT {qn(Book._meta.pk.column)} FROM {qn(Book._meta.db_table)}) "
+            f"ON CONFLICT DO NOTHING"
+        ),
+    }
+
+
+def _stage(connection, book_ids, batch_size):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for batch in _batches(sorted(set(book_ids)), batch_size):
+            cursor.execute(
+                f"INSERT INTO {qn(STAGING_TABLE)} (book_id) VALUES {', '.join(['(%s)'] * len(batch))}", batch,
+            )
+
+
+def remove_books(library, book_ids, batch_size=BATCH_SIZE):
+    library_id = _library_id(library)
+    removed = 0
+    for batch in _batches(sorted(set(book_ids)), batch_size):
+        # مفيش signals على الـ through model -> fast delete: DELETE واحدة
+        removed += Membership.objects.filter(library_id=library_id, book_id__in=batch).delete()[0]
+    return MembershipResult(removed=removed)
+
+
+def sync_books(library, book_ids, batch_size=BATCH_SIZE):
+    """
+    Make the library's books exactly ``book_ids`` (one transaction). The ids
+    are staged in a temporary table, ``batch_size`` per INSERT, then one
+    DELETE and one INSERT ... SELECT do the diff in the database: the current
+    members are never read into Python.
+    """
+    library_id = _library_id(library)
+    using = router.db_for_write(Membership)
+    connection = connections[using]
+    sql = _staging_sql(connection)
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(sql['create'])
+            _stage(connection, book_ids, batch_size)
+            cursor.execute(sql['delete'], [library_id])
+            removed = cursor.rowcount
+            cursor.execute(sql['insert'], [library_id])
+            added = cursor.rowcount
+            cursor.execute(sql['drop'])
+    return MembershipResult(added=added, removed=removed)
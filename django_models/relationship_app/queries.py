@@ -0,0 +1,113 @@
+"""
+Batched lookups for relationship_app. Every function takes a batch of
+names (or ids) and runs a fixed number of queries no matter how many
+authors / libraries come back:
+
+    books_for_authors(names)         2 queries (authors + their books)
+    books_for_libraries(names)       2 queries (libraries + books/authors)
+    librarians_for_libraries(names)  1 query
+    library_overview(names)          2 queries (the two above together)
+
+Results are small immutable tuples rather than model instances.
+"""
+from typing import NamedTuple, Optional
+
+from django.db.models import Prefetch
+
+from .models import Author, Book, Library
+
+
+class BookInfo(NamedTuple):
+    id: int
+    title: str
+    author: Optional[str] = None
+
+
+class AuthorBooks(NamedTuple):
+    id: int
+    name: str
+    books: tuple
+
+
+class LibraryBooks(NamedTuple):
+    id: int
+    name: str
+    books: tuple
+
+
+class LibrarianInfo(NamedTuple):
+    library_id: int
+    library: str
+    librarian: Optional[str]
+
+
+class LibraryOverview(NamedTuple):
+    id: int
+    name: str
+    librarian: Optional[str]
+    books: tuple
+
+
+def _lookup(queryset, names=None, ids=None):
+    # names أو ids (أو الاتنين)؛ من غير أي واحد = كله
+    if names is not None:
+        queryset = queryset.filter(name__in=list(names))
+    if ids is not None:
+        queryset = queryset.filter(pk__in=list(ids))
+    return queryset.order_by('name', 'pk')
+
+
+def _library_books():
+    # الكتب + اسم الكاتب في نفس الـ query بتاعة الـ prefetch
+    return Prefetch(
+        'books',
+        queryset=Book.objects.select_related('author').only('title', 'author__name').order_by('title', 'pk'),
+    )
+
+
+def _book_infos(books):
+    return tuple(BookInfo(book.pk, book.title, book.author.name) for book in books)
+
+
+def books_for_authors(names=None, ids=None):
+    """``[AuthorBooks, ...]`` for the matching authors, books sorted by title."""
+    authors = _lookup(Author.objects.only('name'), names, ids).prefetch_related(
+        Prefetch('book_set', queryset=Book.objects.only('title', 'author_id').order_by('title', 'pk'))
+    )
+    return [
+        AuthorBooks(author.pk, author.name, tuple(BookInfo(book.pk, book.title, author.name)
+                                                  for book in author.book_set.all()))
+        for author in authors
+    ]
+
+
+def books_for_libraries(names=None, ids=None):
+    """``[LibraryBooks, ...]`` for the matching libraries, each book with its author's name."""
+    libraries = _lookup(Library.objects.only('name'), names, ids).prefetch_related(_library_books())
+    return [LibraryBooks(library.pk, library.name, _book_infos(library.books.all())) for library in libraries]
+
+
+def librarians_for_libraries(names=None, ids=None):
+    """``[LibrarianInfo, ...]``; ``librarian`` is None for a library without one."""
+    # reverse one-to-one: LEFT JOIN واحد بدل query لكل مكتبة
+    libraries = _lookup(Library.objects.select_related('librarian'), names, ids)
+    return [
+        LibrarianInfo(library.pk, library.name, _librarian_name(library))
+        for library in libraries
+    ]
+
+
+def library_overview(names=None, ids=None):
+    """Librarian and books for each matching library in two queries."""
+    libraries = _lookup(Library.objects.select_related('librarian'), names, ids).prefetch_related(_library_books())
+    return [
+        LibraryOverview(library.pk, library.name, _librarian_name(library), _book_infos(library.books.all()))
+        for library in libraries
+    ]
+
+
+def _librarian_name(library):
+    try:
+        return library.librarian.name
+    except Library.librarian.RelatedObjectDoesNotExist:
+        return None
@@ -1,3 +1,120 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
 
-# Create your tests here.
+from .membership import add_books, remove_books, sync_books
+from .models import Author, Book, Librarian, Library
+from .queries import books_for_authors, books_for_libraries, librarians_for_libraries, library_overview
+
+
+class QueryServiceTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            author = Author.objects.create(name=f"Author {i}")
+            books = [Book.objects.create(title=f"Book {i}-{j}", author=author) for j in range(3)]
+            library = Library.objects.create(name=f"Library {i}")
+            library.books.set(books)
+            if i % 2 == 0:
+                Librarian.objects.create(name=f"Librarian {i}", library=library)
+
+    def test_books_for_authors(self):
+        with self.assertNumQueries(2):
+            result = books_for_authors(names=[f"Author {i}" for i in range(5)])
+        self.assertEqual(len(result), 5)
+        self.assertEqual([book.title for book in result[0].books], ["Book 0-0", "Book 0-1", "Book 0-2"])
+        self.assertEqual(result[0].books[0].author, "Author 0")
+
+    def test_books_for_libraries(self):
+        with self.assertNumQueries(2):
+            result = books_for_libraries(names=["Library 1", "Library 3"])
+        self.assertEqual([library.name for library in result], ["Library 1", "Library 3"])
+        self.assertEqual({book.author for book in result[1].books}, {"Author 3"})
+
+    def test_librarians_for_libraries(self):
+        with self.assertNumQueries(1):
+            result = librarians_for_libraries()
+        self.assertEqual([info.librarian for info in result],
+                         ["Librarian 0", None, "Librarian 2", None, "Librarian 4"])
+
+    def test_library_overview(self):
+        ids = list(Library.objects.values_list('pk', flat=True))
+        with self.assertNumQueries(2):
+            result = library_overview(ids=ids)
+        self.assertEqual(result[2].librarian, "Librarian 2")
+        self.assertEqual(len(result[2].books), 3)
+
+    def test_empty_batch(self):
+        # IN () فاضي: Django مش بيبعت query أصلاً
+        with self.assertNumQueries(0):
+            self.assertEqual(books_for_authors(names=[]), [])
+
+
+class MembershipTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(name="Author")
+        Book.objects.bulk_create([Book(title=f"Book {i}", author=author) for i in range(1200)])
+        cls.ids = sorted(Book.objects.values_list('pk', flat=True))
+        cls.library = Library.objects.create(name="Central Library")
+
+    def members(self):
+        return sorted(self.library.books.values_list('pk', flat=True))
+
+    def test_add_books_in_batches(self):
+        # 3 batches: INSERT ... SELECT واحدة لكل batch
+        with self.assertNumQueries(3):
+            result = add_books(self.library, self.ids)
+        self.assertEqual(result.added, 1200)
+        self.assertEqual(self.members(), self.ids)
+        # تاني مرة: مفيش حاجة تتضاف، والـ ids المش موجودة بتتشال
+        self.assertEqual(add_books(self.library, self.ids[:10] + [10 ** 9]).added, 0)
+        # الأعضاء الموجودين مابيتحسبوش: الرقم = الصفوف اللي اتضافت فعلاً
+        remove_books(self.library, self.ids[5:10])
+        self.assertEqual(add_books(self.library, self.ids[:15]).added, 5)
+
+    def test_remove_books(self):
+        add_books(self.library, self.ids[:100])
+        with self.assertNumQueries(1):
+            result = remove_books(self.library, self.ids[:40])
+        self.assertEqual(result.removed, 40)
+        self.assertEqual(self.members(), self.ids[40:100])
+
+    def test_sync_books(self):
+        add_books(self.library, self.ids[:600])
+        # savepoint + CREATE + 2 staging batches + DELETE + INSERT + DROP + release،
+        # مهما كان عدد الأعضاء الحاليين
+        with self.assertNumQueries(8):
+            result = sync_books(self.library.pk, self.ids[300:900] + [10 ** 9])
+        self.assertEqual((result.added, result.removed), (300, 300))
+        self.assertEqual(self.members(), self.ids[300:900])
+        self.assertEqual(sync_books(self.library, []).removed, 600)
+        self.assertEqual(self.members(), [])
+
+    def write_csv(self, text):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        handle.write(text)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_sync_library_inventory_command(self):
+        add_books(self.library, self.ids[:5])
+        rows = ''.join(f"Central Library,{pk}\n" for pk in self.ids[3:8])
+        path = self.write_csv("library,book_id\n" + rows)
+
+        out = StringIO()
+        call_command('sync_library_inventory', path, '--dry-run', stdout=out)
+        self.assertIn("[dry run] 1 libraries: 3 books added, 3 removed.", out.getvalue())
+        self.assertEqual(self.members(), self.ids[:5])
+
+        call_command('sync_library_inventory', path, stdout=StringIO())
+        self.assertEqual(self.members(), self.ids[3:8])
+
+    def test_sync_library_inventory_unknown_library(self):
+        path = self.write_csv(f"library,book_id\nNowhere,{self.ids[0]}\n")
+        with self.assertRaisesMessage(CommandError, "Unknown libraries: Nowhere"):
+            call_command('sync_library_inventory', path, stdout=StringIO())